@@ -0,0 +1,103 @@
+"""Adaptive questionnaire: stop asking once every severity band is decided.
+
+After each answer the engine bounds every category's final percentage: the
+points answered so far, plus the lowest and the highest weight each
+unanswered question of the category could still add. When both bounds fall
+in the same ``get_severity_level`` band, the band is decided whatever the
+remaining answers are (bands are intervals). The overall band, from the
+average of the categories (the one behind the global severity and the
+recommendation), is bounded the same way.
+
+A question is still asked while its category's band or the overall band is
+undecided; the rest are skipped and the questionnaire ends early. Among the
+questions still relevant, the next one is the question that narrows an
+undecided category's interval the most (its weight spread over the
+category's maximum), in bank order on ties.
+
+Only the bands are guaranteed to equal the full questionnaire's: a skipped
+question has no answer, so the scores shown are estimates, the midpoint of
+each category's bounds (exact when nothing was skipped), and always inside
+the decided band.
+
+The order depends only on the answers given, so it is replayed from the
+answer array (``sequence``) instead of being stored: back navigation,
+changed answers and resume tokens keep working.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from progress import ScoreTable
+from store import UNANSWERED_BYTE
+from utils import CATEGORIES, get_severity_level
+
+
+class AdaptiveEngine:
+    """Bounds, skipping and ordering for one question bank."""
+
+    def __init__(self, questions: List[Dict]):
+        self.questions = questions
+        table = ScoreTable(questions)
+        self.weights, self.category, self.max_scores = table.weights, table.category, table.max_scores
+        self.spread = [(max(weights) - min(weights)) / self.max_scores[c]
+                       for weights, c in zip(self.weights, self.category)]
+
+    def bounds(self, answers: bytearray) -> Tuple[List[float], List[float]]:
+        """Lowest and highest reachable percentage per category (in ``CATEGORIES`` order)."""
+        low = [0] * len(CATEGORIES)
+        high = [0] * len(CATEGORIES)
+        for position, index in enumerate(answers):
+            c = self.category[position]
+            weights = self.weights[position]
+            if index == UNANSWERED_BYTE:
+                low[c] += min(weights)
+                high[c] += max(weights)
+            else:
+                low[c] += weights[index]
+                high[c] += weights[index]
+        return ([points / total * 100 for points, total in zip(low, self.max_scores)],
+                [points / total * 100 for points, total in zip(high, self.max_scores)])
+
+    def decided(self, answers: bytearray) -> Tuple[List[bool], bool]:
+        """Whether each category's band, and the overall band, can no longer change."""
+        low, high = self.bounds(answers)
+        categories = [get_severity_level(lo) == get_severity_level(hi) for lo, hi in zip(low, high)]
+        overall = get_severity_level(sum(low) / len(low)) == get_severity_level(sum(high) / len(high))
+        return categories, overall
+
+    def next_question(self, answers: bytearray) -> Optional[int]:
+        """Position of the next question to ask, or ``None`` when every band is decided."""
+        categories, overall = self.decided(answers)
+        candidates = [position for position, index in enumerate(answers)
+                      if index == UNANSWERED_BYTE and not (categories[self.category[position]] and overall)]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda position: (not categories[self.category[position]],
+                                                     self.spread[position], -position))
+
+    def sequence(self, answers: bytearray) -> Tuple[List[int], bool]:
+        """Positions asked so far, in order, and whether the questionnaire is finished.
+
+        Replays the engine over ``answers``; the last position is the question
+        waiting for an answer, unless finished.
+        """
+        replay = bytearray([UNANSWERED_BYTE]) * len(answers)
+        path = []
+        while True:
+            position = self.next_question(replay)
+            if position is None:
+                return path, True
+            path.append(position)
+            if answers[position] == UNANSWERED_BYTE:
+                return path, False
+            replay[position] = answers[position]
+
+    def valid_step(self, step: int, answers: bytearray) -> bool:
+        """Whether a funnel step can be shown for ``answers`` (e.g. one read from a resume token)."""
+        path, finished = self.sequence(answers)
+        if step > len(self.questions):
+            return finished
+        return step <= len(path)
+
+    def estimate(self, answers: bytearray) -> Dict[str, float]:
+        """Category scores: the midpoint of the bounds, exact when every question was answered."""
+        low, high = self.bounds(answers)
+        return {category: (lo + hi) / 2 for category, lo, hi in zip(CATEGORIES, low, high)}
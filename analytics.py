@@ -0,0 +1,209 @@
+"""Population analytics over stored assessments, maintained incrementally.
+
+The assessment store's writer updates these aggregates in the same
+transaction that stores each assessment (see ``store.AssessmentStore``), so
+dashboards never scan raw rows:
+
+- ``assessments``: completed assessments;
+- ``score:<category>``: score histogram, ``HISTOGRAM_BINS`` fixed bins of the
+  0-100 percentage;
+- ``severity:<category>`` and ``severity`` (overall, from the average
+  score): severity mix, one bin per ``SEVERITY_LEVELS`` entry;
+- ``step``: funnel sessions that reached each step, counted once per
+  session and dated by the session's first day, for drop-off.
+
+Each (metric, bin) keeps one row per day holding the running total up to and
+including that day (a prefix sum). Counting a date range is the difference
+of two rows, found by index seeks, so a query costs the same for a week of
+history as for five years. A parent who changes answers and resubmits
+replaces the previous assessment; its old contribution is subtracted.
+
+Usage:
+    python analytics.py summary --from 2026-10-01 --to 2026-10-31
+    python analytics.py rebuild    # recompute from the stored assessments
+"""
+import argparse
+import datetime
+import json
+import sqlite3
+import sys
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils import CATEGORIES, SEVERITY_LEVELS, get_severity_level
+
+HISTOGRAM_BINS = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analytics (
+    metric TEXT NOT NULL,
+    bin INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    PRIMARY KEY (metric, bin, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS analytics_keys (
+    metric TEXT NOT NULL,
+    bin INTEGER NOT NULL,
+    PRIMARY KEY (metric, bin)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS funnel_progress (
+    session_id TEXT PRIMARY KEY,
+    day TEXT NOT NULL,
+    max_step INTEGER NOT NULL
+);
+"""
+
+Key = Tuple[str, int]
+
+
+def day_of(timestamp: float) -> str:
+    """UTC day of a timestamp, as ``YYYY-MM-DD``."""
+    return time.strftime('%Y-%m-%d', time.gmtime(timestamp))
+
+
+def score_bin(score: float) -> int:
+    return min(int(score * HISTOGRAM_BINS // 100), HISTOGRAM_BINS - 1)
+
+
+def assessment_keys(scores: Dict[str, float]) -> List[Key]:
+    """The (metric, bin) counters one assessment contributes to."""
+    keys = [('assessments', 0)]
+    for category in CATEGORIES:
+        keys.append((f'score:{category}', score_bin(scores[category])))
+        keys.append((f'severity:{category}', SEVERITY_LEVELS.index(get_severity_level(scores[category]))))
+    average = sum(scores[category] for category in CATEGORIES) / len(CATEGORIES)
+    keys.append(('severity', SEVERITY_LEVELS.index(get_severity_level(average))))
+    return keys
+
+
+def add(conn: sqlite3.Connection, day: str, counts: Dict[Key, int]):
+    """Add ``counts`` on ``day`` to the running totals of that day and every later one."""
+    for (metric, bin_), count in counts.items():
+        if not count:
+            continue
+        conn.execute('INSERT OR IGNORE INTO analytics_keys (metric, bin) VALUES (?, ?)', (metric, bin_))
+        # First event of the day: start from the previous day's running total
+        conn.execute(
+            'INSERT OR IGNORE INTO analytics (metric, bin, day, total) VALUES (?, ?, ?, COALESCE('
+            '(SELECT total FROM analytics WHERE metric = ? AND bin = ? AND day < ? ORDER BY day DESC LIMIT 1), 0))',
+            (metric, bin_, day, metric, bin_, day)
+        )
+        # Normally only today's row; later rows too if an event arrives for a past day
+        conn.execute('UPDATE analytics SET total = total + ? WHERE metric = ? AND bin = ? AND day >= ?',
+                     (count, metric, bin_, day))
+
+
+def apply_assessments(conn: sqlite3.Connection, rows: Iterable[Tuple]):
+    """Update the aggregates for store assessment rows, before they are upserted.
+
+    Rows are ``(session_id, created_at, bank_version, answers, concentracao,
+    impulsividade, hiperatividade)``.
+    """
+    latest: Dict[str, Tuple] = {}
+    for row in rows:
+        session_id = row[0]
+        previous = latest.get(session_id) or conn.execute(
+            'SELECT session_id, created_at, bank_version, answers, concentracao, impulsividade, hiperatividade '
+            'FROM assessments WHERE session_id = ?', (session_id,)
+        ).fetchone()
+        if previous is not None:
+            removed = assessment_keys(dict(zip(CATEGORIES, previous[4:])))
+            add(conn, day_of(previous[1]), Counter({key: -1 for key in removed}))
+        add(conn, day_of(row[1]), Counter(assessment_keys(dict(zip(CATEGORIES, row[4:])))))
+        latest[session_id] = row
+
+
+def apply_steps(conn: sqlite3.Connection, rows: Iterable[Tuple]):
+    """Count each session once per step it reaches; rows are ``(session_id, created_at, step)``."""
+    for session_id, created_at, step in rows:
+        progress = conn.execute('SELECT day, max_step FROM funnel_progress WHERE session_id = ?',
+                                (session_id,)).fetchone()
+        day, max_step = progress if progress else (day_of(created_at), 0)
+        if step <= max_step:
+            continue
+        add(conn, day, Counter({('step', reached): 1 for reached in range(max_step + 1, step + 1)}))
+        conn.execute('INSERT INTO funnel_progress (session_id, day, max_step) VALUES (?, ?, ?) '
+                     'ON CONFLICT (session_id) DO UPDATE SET max_step = excluded.max_step', (session_id, day, step))
+
+
+def _totals(conn: sqlite3.Connection, day: str, inclusive: bool) -> Dict[Key, int]:
+    """Running total of every counter as of ``day`` (or the day before it)."""
+    operator = '<=' if inclusive else '<'
+    totals = {}
+    for metric, bin_ in conn.execute('SELECT metric, bin FROM analytics_keys').fetchall():
+        row = conn.execute(f'SELECT total FROM analytics WHERE metric = ? AND bin = ? AND day {operator} ? '
+                           'ORDER BY day DESC LIMIT 1', (metric, bin_, day)).fetchone()
+        totals[metric, bin_] = row[0] if row else 0
+    return totals
+
+
+def _parse_day(day: Optional[str]) -> Optional[str]:
+    if day is None:
+        return None
+    try:
+        return datetime.date.fromisoformat(day).isoformat()
+    except (TypeError, ValueError):
+        raise ValueError(f"Data inválida (use AAAA-MM-DD): {day!r}") from None
+
+
+def summary(conn: sqlite3.Connection, start: Optional[str] = None, end: Optional[str] = None) -> Dict:
+    """Histograms, severity mix and funnel drop-off for days ``start`` to ``end`` (inclusive, UTC)."""
+    start, end = _parse_day(start), _parse_day(end)
+    totals = _totals(conn, end or '9999-12-31', inclusive=True)
+    if start:
+        before = _totals(conn, start, inclusive=False)
+        totals = {key: total - before[key] for key, total in totals.items()}
+
+    def mix(metric: str) -> Dict[str, int]:
+        return {level: totals.get((metric, i), 0) for i, level in enumerate(SEVERITY_LEVELS)}
+
+    steps = max((bin_ for metric, bin_ in totals if metric == 'step'), default=0)
+    severity = {'geral': mix('severity')}
+    severity.update({category: mix(f'severity:{category}') for category in CATEGORIES})
+    return {
+        'from': start,
+        'to': end,
+        'assessments': totals.get(('assessments', 0), 0),
+        'bin_width': 100 / HISTOGRAM_BINS,
+        'histograms': {category: [totals.get((f'score:{category}', b), 0) for b in range(HISTOGRAM_BINS)]
+                       for category in CATEGORIES},
+        'severity': severity,
+        # Sessions that reached step 1, 2, ...: questions, then results and testimonials
+        'steps': [totals.get(('step', step), 0) for step in range(1, steps + 1)]
+    }
+
+
+def rebuild(conn: sqlite3.Connection):
+    """Recompute the assessment aggregates from the stored rows (funnel steps cannot be replayed)."""
+    with conn:
+        conn.execute("DELETE FROM analytics WHERE metric != 'step'")
+        conn.execute("DELETE FROM analytics_keys WHERE metric != 'step'")
+        days: Dict[str, Counter] = {}
+        for row in conn.execute('SELECT created_at, concentracao, impulsividade, hiperatividade FROM assessments'):
+            days.setdefault(day_of(row[0]), Counter()).update(assessment_keys(dict(zip(CATEGORIES, row[1:]))))
+        for day in sorted(days):
+            add(conn, day, days[day])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from store import DB_PATH, SCHEMA as STORE_SCHEMA
+
+    parser = argparse.ArgumentParser(description="Indicadores agregados das avaliações armazenadas.")
+    parser.add_argument('command', choices=('summary', 'rebuild'))
+    parser.add_argument('--db', default=DB_PATH, help=f"Banco de dados (padrão: {DB_PATH})")
+    parser.add_argument('--from', dest='start', help="Primeiro dia (AAAA-MM-DD, UTC)")
+    parser.add_argument('--to', dest='end', help="Último dia (AAAA-MM-DD, UTC)")
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db, timeout=30)
+    conn.executescript(STORE_SCHEMA + SCHEMA)
+    if args.command == 'rebuild':
+        rebuild(conn)
+    print(json.dumps(summary(conn, args.start, args.end), indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
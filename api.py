@@ -0,0 +1,348 @@
+"""Stateless JSON scoring service (ASGI), alongside the Streamlit funnel.
+
+Endpoints (all ``POST``, JSON in and out, except ``/health``):
+
+- ``/score``: ``{"responses": {"1": "Raramente", ...}}`` or
+  ``{"batch": [{"1": "Raramente", ...}, ...]}``
+- ``/severity``: ``{"score": 72.5}`` or ``{"batch": [72.5, 40.0]}``
+- ``/feedback``: ``{"question_id": 6, "response": "Abandona a atividade"}`` or
+  ``{"batch": [{"question_id": 6, "response": "..."}, ...]}``
+- ``/recommendation``: ``{"scores": {"concentracao": 55.0, ...}}`` or
+  ``{"batch": [{...}, ...]}``
+- ``/analytics``: ``{"from": "2026-10-01", "to": "2026-10-31"}`` (both
+  optional): score histograms, severity mix and funnel drop-off over the
+  stored assessments, from the incremental aggregates in ``analytics``
+- ``GET /health``
+
+Errors are returned as ``{"error": "..."}`` with status 400/404/405/413.
+The question bank is loaded once per worker at startup, from the content
+registry, so edits to ``data/questions.json`` are picked up without a restart. The app has no
+framework dependency; serve it with any ASGI server, e.g.::
+
+    pip install uvicorn
+    uvicorn api:app --workers 4 --port 8000
+
+Latency profile (one uvicorn worker, keep-alive HTTP/1.1, 64 concurrent
+clients, measured with ``python api.py --bench`` on a single core shared by
+the server and the load generator, so real capacity per core is higher):
+
+==================  =======  ========  ========  =========
+endpoint            req/s    p50 (ms)  p99 (ms)  handler
+==================  =======  ========  ========  =========
+/score (single)     3-5 000  12-20     20-28     ~25 µs
+/score (batch 100)  400-500  110-150   ~210      ~1 ms
+/severity           ~9 500   ~7        12-15     <1 µs
+==================  =======  ========  ========  =========
+
+A batch of 100 scores 40-50 000 assessments/s. Most of the per-request time
+is HTTP handling in the server; "handler" is the cost of the endpoint itself.
+"""
+import argparse
+import functools
+import json
+import math
+import sqlite3
+import sys
+from typing import Callable, Dict, List, Optional
+
+import analytics
+from content_registry import get_registry
+from question_bank import CATEGORIES, QuestionBank
+from utils import get_feedback, get_recommendation, get_severity_level
+
+MAX_BODY_BYTES = 1024 * 1024
+MAX_BATCH = 10000
+
+
+class RequestError(Exception):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _bank() -> QuestionBank:
+    return get_registry().current().bank
+
+
+def _check_scalar(value, name: str):
+    """Answers and question ids are looked up in dicts: reject lists, objects, ... up front."""
+    if isinstance(value, bool) or not isinstance(value, (str, int)):
+        raise RequestError(f"{name} deve ser um texto ou um inteiro")
+
+
+def _responses(payload) -> Dict[int, str]:
+    if not isinstance(payload, dict):
+        raise RequestError("'responses' deve ser um objeto {id_pergunta: resposta}")
+    try:
+        responses = {int(qid): answer for qid, answer in payload.items()}
+    except (TypeError, ValueError):
+        raise RequestError("Os ids das perguntas devem ser inteiros") from None
+    for qid, answer in responses.items():
+        _check_scalar(answer, f"A resposta da pergunta {qid}")
+    return responses
+
+
+def _batch(body: Dict) -> Optional[List]:
+    batch = body.get('batch')
+    if batch is None:
+        return None
+    if not isinstance(batch, list):
+        raise RequestError("'batch' deve ser uma lista")
+    if len(batch) > MAX_BATCH:
+        raise RequestError(f"'batch' aceita no máximo {MAX_BATCH} itens", 413)
+    return batch
+
+
+def score(body: Dict) -> Dict:
+    bank = _bank()
+    batch = _batch(body)
+    try:
+        if batch is None:
+            return {'scores': bank.score(_responses(body.get('responses')))}
+        indices = bank.encode_many([_responses(item) for item in batch])
+    except ValueError as e:
+        raise RequestError(str(e)) from None
+    matrix = bank.score_matrix(indices).tolist()
+    return {'results': [dict(zip(CATEGORIES, row)) for row in matrix]}
+
+
+def _score_value(value) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise RequestError("As pontuações devem ser números")
+    try:
+        value = float(value)
+    except OverflowError:
+        value = math.inf
+    # json.loads accepts NaN and Infinity, which no severity band or recommendation fits
+    if not math.isfinite(value):
+        raise RequestError("As pontuações devem ser números finitos")
+    return value
+
+
+def severity(body: Dict) -> Dict:
+    batch = _batch(body)
+    if batch is None:
+        return {'severity': get_severity_level(_score_value(body.get('score')))}
+    return {'results': [get_severity_level(_score_value(value)) for value in batch]}
+
+
+def _feedback(item) -> str:
+    if not isinstance(item, dict):
+        raise RequestError("Cada item deve ter 'question_id' e 'response'")
+    _check_scalar(item.get('question_id'), "'question_id'")
+    _check_scalar(item.get('response'), "'response'")
+    bank = _bank()
+    position = bank.position.get(item.get('question_id'))
+    if position is None:
+        raise RequestError(f"Pergunta desconhecida: {item.get('question_id')!r}")
+    question = bank.questions[position]
+    if item.get('response') not in bank.option_index[position]:
+        raise RequestError(f"Resposta inválida para a pergunta {question['id']}: {item.get('response')!r}")
+    return get_feedback(question, item['response'])
+
+
+def feedback(body: Dict) -> Dict:
+    batch = _batch(body)
+    if batch is None:
+        return {'feedback': _feedback(body)}
+    return {'results': [_feedback(item) for item in batch]}
+
+
+def _recommendation(scores) -> str:
+    if not isinstance(scores, dict) or not scores:
+        raise RequestError("'scores' deve ser um objeto {categoria: pontuação}")
+    return get_recommendation({category: _score_value(value) for category, value in scores.items()}).strip()
+
+
+def recommendation(body: Dict) -> Dict:
+    batch = _batch(body)
+    if batch is None:
+        return {'recommendation': _recommendation(body.get('scores'))}
+    return {'results': [_recommendation(item) for item in batch]}
+
+
+@functools.lru_cache(maxsize=None)
+def _analytics_db() -> sqlite3.Connection:
+    from store import DB_PATH
+    return sqlite3.connect(f'file:{DB_PATH}?mode=ro', uri=True, timeout=30, check_same_thread=False)
+
+
+def population(body: Dict) -> Dict:
+    try:
+        return analytics.summary(_analytics_db(), body.get('from'), body.get('to'))
+    except ValueError as e:
+        raise RequestError(str(e)) from None
+    except sqlite3.OperationalError:
+        raise RequestError("Nenhuma avaliação armazenada", 404) from None
+
+
+ROUTES: Dict[str, Callable[[Dict], Dict]] = {
+    '/score': score,
+    '/severity': severity,
+    '/feedback': feedback,
+    '/recommendation': recommendation,
+    '/analytics': population
+}
+
+
+async def _send_json(send, status: int, payload: Dict):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json; charset=utf-8'),
+                    (b'content-length', str(len(body)).encode())]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _read_body(receive) -> bytes:
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise RequestError("Corpo da requisição muito grande", 413)
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def app(scope, receive, send):
+    """ASGI entry point."""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                _bank()  # Load the question bank once per worker, before serving
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    path, method = scope['path'], scope['method']
+    if path == '/health':
+        await _send_json(send, 200, {'status': 'ok', 'questions': len(_bank())})
+        return
+    handler = ROUTES.get(path)
+    if handler is None:
+        await _send_json(send, 404, {'error': f"Rota desconhecida: {path}"})
+        return
+    if method != 'POST':
+        await _send_json(send, 405, {'error': "Use POST"})
+        return
+
+    try:
+        try:
+            body = json.loads(await _read_body(receive) or b'{}')
+        except ValueError:
+            raise RequestError("JSON inválido") from None
+        if not isinstance(body, dict):
+            raise RequestError("O corpo deve ser um objeto JSON")
+        await _send_json(send, 200, handler(body))
+    except RequestError as e:
+        await _send_json(send, e.status, {'error': str(e)})
+
+
+BENCH_PAYLOADS = {
+    '/score (single)': ('/score', None),
+    '/score (batch 100)': ('/score', 100),
+    '/severity': ('/severity', 0)
+}
+
+
+def _bench_body(path: str, batch: Optional[int]) -> Dict:
+    bank = _bank()
+    responses = {str(q['id']): q['options'][q['id'] % len(q['options'])] for q in bank.questions}
+    if path == '/severity':
+        return {'score': 72.5}
+    if batch:
+        return {'batch': [responses] * batch}
+    return {'responses': responses}
+
+
+async def _bench_client(host: str, port: int, request: bytes, count: int, latencies: List[float]):
+    import asyncio
+    import time
+
+    reader, writer = await asyncio.open_connection(host, port)
+    for _ in range(count):
+        start = time.perf_counter()
+        writer.write(request)
+        await writer.drain()
+        head = await reader.readuntil(b'\r\n\r\n')
+        length = int(next(line.split(b':')[1] for line in head.split(b'\r\n')
+                          if line.lower().startswith(b'content-length')))
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+def bench(port: int = 8765, clients: int = 64, requests_per_client: int = 100):
+    """Measure the latency profile against a local single-worker uvicorn."""
+    import asyncio
+    import subprocess
+    import time
+    import timeit
+    import urllib.request
+
+    server = subprocess.Popen([sys.executable, '-m', 'uvicorn', 'api:app', '--port', str(port),
+                               '--log-level', 'warning', '--no-access-log'])
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/health')
+                break
+            except OSError:
+                time.sleep(0.1)
+
+        for name, (path, batch) in BENCH_PAYLOADS.items():
+            body = json.dumps(_bench_body(path, batch)).encode('utf-8')
+            request = (f'POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+                       f'Content-Length: {len(body)}\r\n\r\n').encode() + body
+            latencies: List[float] = []
+
+            async def run():
+                await asyncio.gather(*[_bench_client('127.0.0.1', port, request, requests_per_client, latencies)
+                                       for _ in range(clients)])
+
+            start = time.perf_counter()
+            asyncio.run(run())
+            elapsed = time.perf_counter() - start
+            latencies.sort()
+            handler = ROUTES[path]
+            parsed = json.loads(body)
+            in_process = timeit.timeit(lambda: handler(parsed), number=200) / 200
+            print(f"{name:20s} {len(latencies) / elapsed:8.0f} req/s  "
+                  f"p50 {latencies[len(latencies) // 2] * 1000:6.1f} ms  "
+                  f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.1f} ms  "
+                  f"handler {in_process * 1e6:7.1f} µs")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Serviço HTTP de pontuação (ASGI).")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--bench', action='store_true', help="Medir o perfil de latência localmente")
+    args = parser.parse_args(argv)
+
+    try:
+        import uvicorn
+    except ImportError:
+        print("Instale um servidor ASGI: pip install uvicorn", file=sys.stderr)
+        return 1
+    if args.bench:
+        bench()
+        return 0
+    uvicorn.run('api:app', port=args.port, workers=args.workers)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""Static asset build: minified CSS and resized images, content-hashed.
+
+``python assets.py build`` writes into ``static/``, which Streamlit serves
+at ``app/static/`` (``server.enableStaticServing`` in
+``.streamlit/config.toml``):
+
+- ``styles.<hash>.css``: ``styles.css`` minified;
+- ``<image>-<width>.<hash>.<format>``: every image in ``IMAGES`` at each of
+  ``IMAGE_WIDTHS`` (never upscaled), as AVIF (when Pillow supports it) and
+  WebP;
+- ``manifest.json``: source name -> built file.
+
+The hash is of the file's bytes, so a name never changes meaning and the
+files can be cached forever (``Cache-Control: public, max-age=31536000,
+immutable`` for ``/app/static/`` on the CDN or reverse proxy in front;
+Streamlit itself only sends validators). Each rerun then carries a
+``<link>`` to the stylesheet instead of the whole CSS inline; without a
+build, or with static serving off, the app inlines the minified CSS.
+
+Usage:
+    python assets.py build
+    python assets.py build --out static --widths 128,256,512
+"""
+import argparse
+import functools
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+from typing import Dict, List, Optional, Sequence
+
+STATIC_DIR = 'static'
+STATIC_URL = 'app/static'
+MANIFEST_NAME = 'manifest.json'
+STYLESHEET = 'styles.css'
+IMAGES = {
+    'icon': 'generated-icon.png',
+    'logo': "DALL·E 2024-11-05 14.57.07 - Design a logo for a children's platform called 'Ativa-Mente', "
+            "focused on enhancing focus and attention in young people with ADHD. The logo should be b.webp"
+}
+IMAGE_WIDTHS = (64, 128, 256, 512)
+IMAGE_QUALITY = {'avif': 50, 'webp': 75}
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and insignificant whitespace."""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    # Not before ':', where a space is a descendant combinator (``div :hover``)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+
+def _write_hashed(out_dir: str, stem: str, extension: str, data: bytes) -> str:
+    name = f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}.{extension}"
+    path = os.path.join(out_dir, name)
+    if not os.path.exists(path):
+        with open(f'{path}.tmp', 'wb') as file:
+            file.write(data)
+        os.replace(f'{path}.tmp', path)
+    return name
+
+
+def image_formats() -> List[str]:
+    from PIL import features
+    return [fmt for fmt in ('avif', 'webp') if features.check(fmt)]
+
+
+def build_images(out_dir: str, widths: Sequence[int] = IMAGE_WIDTHS) -> Dict[str, Dict]:
+    """Resized variants of every image in ``IMAGES``: ``{name: {format: {width: file}}}``."""
+    try:
+        from PIL import Image
+    except ImportError:
+        raise ImportError("As variantes de imagem requerem o Pillow: pip install pillow") from None
+
+    built = {}
+    formats = image_formats()
+    for name, source in IMAGES.items():
+        with Image.open(source) as original:
+            original.load()
+            image = original.convert('RGBA')
+        variants = {fmt: {} for fmt in formats}
+        for width in sorted({min(width, image.width) for width in widths}):
+            resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            for fmt in formats:
+                buffer = io.BytesIO()
+                resized.save(buffer, fmt.upper(), quality=IMAGE_QUALITY[fmt])
+                variants[fmt][width] = _write_hashed(out_dir, f'{name}-{width}', fmt, buffer.getvalue())
+        built[name] = variants
+    return built
+
+
+def build(out_dir: str = STATIC_DIR, widths: Sequence[int] = IMAGE_WIDTHS) -> Dict:
+    """Build every asset into ``out_dir`` and write its manifest."""
+    os.makedirs(out_dir, exist_ok=True)
+    with open(STYLESHEET, 'r', encoding='utf-8') as file:
+        css = minify_css(file.read())
+    manifest = {
+        'styles': _write_hashed(out_dir, 'styles', 'css', css.encode('utf-8')),
+        'images': build_images(out_dir, widths)
+    }
+    with open(os.path.join(out_dir, f'{MANIFEST_NAME}.tmp'), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(os.path.join(out_dir, f'{MANIFEST_NAME}.tmp'), os.path.join(out_dir, MANIFEST_NAME))
+    return manifest
+
+
+@functools.lru_cache(maxsize=None)
+def _load_manifest(path: str, mtime: int) -> Dict:
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def load_manifest(static_dir: str = STATIC_DIR) -> Optional[Dict]:
+    """The built manifest, reread after a rebuild; ``None`` if nothing was built."""
+    path = os.path.join(static_dir, MANIFEST_NAME)
+    try:
+        return _load_manifest(path, os.stat(path).st_mtime_ns)
+    except (OSError, ValueError):
+        return None
+
+
+def stylesheet_url() -> Optional[str]:
+    manifest = load_manifest()
+    return f"{STATIC_URL}/{manifest['styles']}" if manifest else None
+
+
+@functools.lru_cache(maxsize=None)
+def _inline_stylesheet(path: str, mtime: int) -> str:
+    with open(path, 'r', encoding='utf-8') as file:
+        return minify_css(file.read())
+
+
+def inline_stylesheet() -> str:
+    """Minified ``styles.css``, reread only when it changes."""
+    return _inline_stylesheet(STYLESHEET, os.stat(STYLESHEET).st_mtime_ns)
+
+
+def picture_html(name: str, alt: str, sizes: str = '100vw') -> str:
+    """``<picture>`` offering every built variant of image ``name``, so the browser picks the smallest fit."""
+    manifest = load_manifest()
+    variants = manifest['images'][name] if manifest else {}
+    sources = ''.join(
+        f'<source type="{MIME_TYPES[fmt]}" sizes="{sizes}" srcset="'
+        + ', '.join(f'{STATIC_URL}/{file} {width}w' for width, file in files.items()) + '">'
+        for fmt, files in variants.items()
+    )
+    fallback = next(iter(variants.get('webp', {}).values()), None)
+    src = f'{STATIC_URL}/{fallback}' if fallback else ''
+    return f'<picture>{sources}<img src="{src}" alt="{alt}" style="max-width: 100%; height: auto;"></picture>'
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Gera os arquivos estáticos (CSS minificado e imagens redimensionadas).")
+    parser.add_argument('command', choices=('build',))
+    parser.add_argument('--out', default=STATIC_DIR, help=f"Diretório de saída (padrão: {STATIC_DIR})")
+    parser.add_argument('--widths', default=','.join(map(str, IMAGE_WIDTHS)),
+                        help="Larguras das imagens, separadas por vírgula")
+    args = parser.parse_args(argv)
+
+    manifest = build(args.out, [int(width) for width in args.widths.split(',')])
+    sizes = {STYLESHEET: (os.path.getsize(STYLESHEET), os.path.getsize(os.path.join(args.out, manifest['styles'])))}
+    for name, variants in manifest['images'].items():
+        # The largest variant the browser can pick, against the original
+        largest = max(os.path.getsize(os.path.join(args.out, file)) for files in variants.values() for file in files.values())
+        sizes[IMAGES[name][:40]] = (os.path.getsize(IMAGES[name]), largest)
+    for source, (before, after) in sizes.items():
+        print(f"{source:42s} {before / 1024:8.1f} KiB -> {after / 1024:7.1f} KiB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""Bulk offline scoring of assessment response files.
+
+Usage:
+    python batch_score.py respostas.csv -o resultados.csv
+    python batch_score.py respostas.jsonl -o resultados.jsonl --workers 8
+
+CSV input has an optional ``id`` column plus one column per question, named
+by question id (``1``, ``2``, ... or ``q1``, ``q2``, ...), holding the option
+text; empty cells are unanswered. JSONL input has one object per line:
+``{"id": ..., "responses": {"1": "Raramente", ...}}``.
+
+With ``--norms`` the output also gets norm-referenced percentiles per
+category (see ``percentiles.py``), stratified by ``--age-column`` when given.
+
+Input is read in chunks, each chunk is scored as a matrix in a worker process
+and results are written in input order as soon as they are ready, so memory
+stays bounded by ``chunk_size * workers`` regardless of the file size.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from percentiles import get_norm_tables
+from question_bank import CATEGORIES, QuestionBank, get_question_bank
+from utils import SEVERITY_THRESHOLDS
+
+SCORE_COLUMNS = list(CATEGORIES) + ['media']
+OUTPUT_COLUMNS = ['id'] + SCORE_COLUMNS + [f'severidade_{c}' for c in SCORE_COLUMNS]
+PERCENTILE_COLUMNS = [f'percentil_{c}' for c in CATEGORIES]
+
+# (format, header, raw rows, index of the first row in the input)
+Chunk = Tuple[str, Optional[List[str]], List, int]
+
+
+def severity_levels(scores: np.ndarray) -> np.ndarray:
+    """Vectorized ``get_severity_level`` over an array of percentages."""
+    return np.select(
+        [scores >= threshold for threshold, _ in SEVERITY_THRESHOLDS],
+        [level for _, level in SEVERITY_THRESHOLDS],
+        default='Baixo'
+    )
+
+
+def question_id(column: str) -> Optional[int]:
+    """Map a CSV header (``7`` or ``q7``) to a question id."""
+    column = column.strip().lower()
+    if column.startswith('q'):
+        column = column[1:]
+    return int(column) if column.isdigit() else None
+
+
+def parse_chunk(fmt: str, header: Optional[List[str]], rows: List, start: int,
+                age_column: Optional[str] = None) -> Tuple[List[str], List[Dict[int, str]], List[Optional[str]]]:
+    """Turn raw CSV rows or JSONL lines into ids, response dicts and age bands."""
+    ids, responses, age_bands = [], [], []
+    if fmt == 'csv':
+        id_col = header.index('id') if 'id' in header else None
+        age_col = header.index(age_column) if age_column in header else None
+        columns = [(i, question_id(name)) for i, name in enumerate(header)]
+        columns = [(i, qid) for i, qid in columns if qid is not None]
+        for n, row in enumerate(rows):
+            ids.append(row[id_col] if id_col is not None else str(start + n + 1))
+            responses.append({qid: row[i] for i, qid in columns if i < len(row) and row[i] != ''})
+            age_bands.append(row[age_col] or None if age_col is not None else None)
+    else:
+        for n, line in enumerate(rows):
+            record = json.loads(line)
+            ids.append(str(record.get('id', start + n + 1)))
+            responses.append({int(qid): answer for qid, answer in record['responses'].items() if answer})
+            age_bands.append(record.get(age_column) if age_column else None)
+    return ids, responses, age_bands
+
+
+def score_chunk(chunk: Chunk, bank: Optional[QuestionBank] = None, out_format: str = 'csv',
+                norms_dir: Optional[str] = None, age_column: Optional[str] = None) -> str:
+    """Score one chunk as a matrix and return its serialized output rows."""
+    fmt, header, rows, start = chunk
+    bank = bank or get_question_bank()
+    ids, responses, age_bands = parse_chunk(fmt, header, rows, start, age_column)
+
+    indices = np.empty((len(responses), len(bank)), dtype=np.int8)
+    for n, answers in enumerate(responses):
+        try:
+            indices[n] = bank.encode(answers)
+        except ValueError as e:
+            raise ValueError(f"Linha {start + n + 1}: {e}") from None
+
+    scores = bank.score_matrix(indices)
+    scores = np.column_stack([scores, scores.mean(axis=1)])
+    levels = severity_levels(scores)
+    percentiles = None
+    if norms_dir:
+        percentiles = get_norm_tables(norms_dir).percentile_matrix(scores[:, :len(CATEGORIES)], age_bands)
+
+    out = io.StringIO()
+    if out_format == 'csv':
+        writer = csv.writer(out, lineterminator='\n')
+        for n, row_id in enumerate(ids):
+            row = [row_id] + [f'{s:.2f}' for s in scores[n]] + list(levels[n])
+            if percentiles is not None:
+                row += [f'{p:.1f}' for p in percentiles[n]]
+            writer.writerow(row)
+    else:
+        for n, row_id in enumerate(ids):
+            record = {'id': row_id}
+            record.update({c: round(float(s), 2) for c, s in zip(SCORE_COLUMNS, scores[n])})
+            record.update({f'severidade_{c}': str(l) for c, l in zip(SCORE_COLUMNS, levels[n])})
+            if percentiles is not None:
+                record.update({c: round(float(p), 1) for c, p in zip(PERCENTILE_COLUMNS, percentiles[n])})
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+    return out.getvalue()
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[Chunk]:
+    """Stream an input file as raw row chunks without parsing answers."""
+    fmt = 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        if fmt == 'csv':
+            reader = csv.reader(file)
+            header = [name.strip() for name in next(reader)]
+            rows = reader
+        else:
+            header = None
+            rows = (line for line in file if line.strip())
+
+        chunk, start = [], 0
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield fmt, header, chunk, start
+                start += len(chunk)
+                chunk = []
+        if chunk:
+            yield fmt, header, chunk, start
+
+
+def _init_worker(questions_path: str, norms_dir: Optional[str]):
+    get_question_bank(questions_path)
+    if norms_dir:
+        get_norm_tables(norms_dir)
+
+
+def _score_in_worker(chunk: Chunk, questions_path: str, out_format: str,
+                     norms_dir: Optional[str], age_column: Optional[str]) -> str:
+    return score_chunk(chunk, get_question_bank(questions_path), out_format, norms_dir, age_column)
+
+
+def run(input_path: str, output_path: str, chunk_size: int = 10000, workers: int = 0,
+        questions_path: str = 'data/questions.json', norms_dir: Optional[str] = None,
+        age_column: Optional[str] = None) -> int:
+    """Score ``input_path`` into ``output_path`` and return the number of rows written."""
+    out_format = 'jsonl' if output_path.endswith(('.jsonl', '.ndjson')) else 'csv'
+    bank = get_question_bank(questions_path)
+    if norms_dir and get_norm_tables(norms_dir) is None:
+        raise ValueError(f"Tabelas normativas não encontradas em {norms_dir}")
+    written = 0
+
+    with open(output_path, 'w', encoding='utf-8', newline='') as out:
+        if out_format == 'csv':
+            out.write(','.join(OUTPUT_COLUMNS + (PERCENTILE_COLUMNS if norms_dir else [])) + '\n')
+
+        if workers <= 1:
+            for chunk in read_chunks(input_path, chunk_size):
+                out.write(score_chunk(chunk, bank, out_format, norms_dir, age_column))
+                written += len(chunk[2])
+            return written
+
+        # Keep at most two chunks per worker in flight so memory stays flat
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(questions_path, norms_dir)) as pool:
+            pending = deque()
+            for chunk in read_chunks(input_path, chunk_size):
+                future = pool.submit(_score_in_worker, chunk, questions_path, out_format, norms_dir, age_column)
+                pending.append((future, len(chunk[2])))
+                if len(pending) >= workers * 2:
+                    future, rows = pending.popleft()
+                    out.write(future.result())
+                    written += rows
+            while pending:
+                future, rows = pending.popleft()
+                out.write(future.result())
+                written += rows
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pontuação em lote de respostas da avaliação TDAH.")
+    parser.add_argument('input', help="Arquivo de respostas (.csv ou .jsonl)")
+    parser.add_argument('-o', '--output', required=True, help="Arquivo de saída (.csv ou .jsonl)")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="Linhas por bloco (padrão: 10000)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Processos de pontuação (padrão: número de CPUs; 1 = sem pool)")
+    parser.add_argument('--questions', default='data/questions.json', help="Banco de perguntas")
+    parser.add_argument('--norms', help="Diretório de tabelas normativas para incluir percentis")
+    parser.add_argument('--age-column', help="Coluna (CSV) ou campo (JSONL) com a faixa etária")
+    args = parser.parse_args(argv)
+
+    try:
+        written = run(args.input, args.output, args.chunk_size, args.workers, args.questions,
+                      args.norms, args.age_column)
+    except (ValueError, KeyError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    print(f"{written} avaliações pontuadas em {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""Benchmark suite for scoring, rendering and full funnel reruns.
+
+Micro-benchmarks time the functions on the results path one call at a time.
+End-to-end benchmarks drive ``main.py`` through every step with Streamlit's
+headless AppTest harness and time each rerun.
+
+Results are written as JSON (per-call median and minimum, in microseconds)
+and can be compared against a stored baseline. A benchmark regresses when
+its median exceeds the baseline by more than its threshold, which is
+``--threshold`` unless the baseline sets one under ``"thresholds"``.
+
+Usage:
+    python benchmark.py                                  # run and print
+    python benchmark.py --output resultados.json
+    python benchmark.py --compare benchmark_baseline.json --threshold 0.25
+    python benchmark.py --save-baseline benchmark_baseline.json
+    python benchmark.py --only micro
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from typing import Callable, Dict, List, Optional
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+BASELINE_FILE = 'benchmark_baseline.json'
+
+
+def _time_call(func: Callable, repeat: int = 7, min_time: float = 0.05) -> Dict[str, float]:
+    """Per-call median and minimum (µs) over ``repeat`` timing runs."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    runs = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return {'median_us': statistics.median(runs), 'min_us': min(runs)}
+
+
+def micro_benchmarks() -> Dict[str, Dict[str, float]]:
+    from charts import create_bar_chart, create_radar_chart
+    from content_registry import get_registry
+    from report import render_category_card
+    from utils import (calculate_score, get_category_description, get_category_recommendations,
+                       get_feedback, get_severity_level)
+
+    snapshot = get_registry().current()
+    questions = snapshot.questions
+    responses = {q['id']: q['options'][q['id'] % len(q['options'])] for q in questions}
+    scores = calculate_score(responses)
+    custom_question = next(q for q in questions if q['id'] == 6)
+
+    cases = {
+        'calculate_score': lambda: calculate_score(responses),
+        'get_feedback': lambda: get_feedback(custom_question, custom_question['options'][2]),
+        'get_severity_level': lambda: get_severity_level(72.5),
+        'get_category_description': lambda: get_category_description('concentracao', 'Alto'),
+        'get_category_recommendations': lambda: get_category_recommendations('concentracao', 'Alto'),
+        'render_category_card': lambda: render_category_card('concentracao', 'Alto', 72.5, 80, snapshot.version),
+        'create_radar_chart': lambda: create_radar_chart(scores),
+        'create_bar_chart': lambda: create_bar_chart(scores)
+    }
+    return {name: _time_call(func) for name, func in cases.items()}
+
+
+def _timed_run(at, action: Optional[Callable] = None) -> float:
+    start = time.perf_counter()
+    (action() if action else at).run()
+    if at.exception:
+        raise RuntimeError(f"main.py raised: {at.exception}")
+    return (time.perf_counter() - start) * 1e6
+
+
+def drive_funnel(rounds: int = 3) -> Dict[str, List[float]]:
+    """Drive main.py from the intro to the testimonials and time every rerun (µs).
+
+    The server compiles ``main.py`` once and reuses the bytecode for every
+    rerun, while AppTest compiles it again on each run; the runs share one
+    script cache so the timings are the rerun's, not the compiler's.
+    """
+    from unittest import mock
+
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import AppTest, local_script_runner
+
+    timings: Dict[str, List[float]] = {}
+    script_cache = ScriptCache()
+
+    def record(name, value):
+        timings.setdefault(name, []).append(value)
+
+    with mock.patch.object(local_script_runner, 'ScriptCache', lambda: script_cache):
+        for _ in range(rounds):
+            at = AppTest.from_file(APP_PATH, default_timeout=60)
+            funnel_start = time.perf_counter()
+            record('e2e_intro', _timed_run(at))
+            record('e2e_start', _timed_run(at, at.button[0].click))
+
+            step = 1
+            while at.radio:
+                radio = at.radio[0]
+                record('e2e_answer', _timed_run(at, lambda: radio.set_value(radio.options[step % len(radio.options)])))
+                label = at.button[1].label
+                if label.startswith('Ver Resultados'):
+                    break
+                record('e2e_next_question', _timed_run(at, at.button[1].click))
+                step += 1
+
+            record('e2e_results', _timed_run(at, at.button[1].click))
+            record('e2e_testimonials', _timed_run(at, at.button[1].click))
+            record('e2e_full_funnel', (time.perf_counter() - funnel_start) * 1e6)
+    return timings
+
+
+def e2e_benchmarks(rounds: int = 3) -> Dict[str, Dict[str, float]]:
+    # The first pass warms imports and caches so rounds measure steady-state reruns
+    drive_funnel(rounds=1)
+    timings = drive_funnel(rounds)
+    return {name: {'median_us': statistics.median(values), 'min_us': min(values)}
+            for name, values in timings.items()}
+
+
+def compare(results: Dict, baseline: Dict, threshold: float, min_delta_us: float = 1.0) -> List[str]:
+    """Return one message per benchmark slower than its baseline by more than its threshold.
+
+    Differences under ``min_delta_us`` are timer noise on sub-microsecond
+    calls and never count as regressions.
+    """
+    thresholds = baseline.get('thresholds', {})
+    regressions = []
+    for name, current in results['benchmarks'].items():
+        reference = baseline['benchmarks'].get(name)
+        if reference is None:
+            continue
+        limit = thresholds.get(name, threshold)
+        ratio = current['median_us'] / reference['median_us'] - 1
+        if ratio > limit and current['median_us'] - reference['median_us'] > min_delta_us:
+            regressions.append(f"{name}: {current['median_us']:.1f} µs vs {reference['median_us']:.1f} µs "
+                               f"(+{ratio:.0%}, limite +{limit:.0%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de pontuação, renderização e funil completo.")
+    parser.add_argument('--only', choices=['micro', 'e2e'], help="Executar só um grupo")
+    parser.add_argument('--rounds', type=int, default=3, help="Passagens completas pelo funil (padrão: 3)")
+    parser.add_argument('--output', help="Salvar os resultados em JSON")
+    parser.add_argument('--compare', nargs='?', const=BASELINE_FILE,
+                        help=f"Comparar com um baseline salvo (padrão: {BASELINE_FILE})")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Regressão tolerada sobre a mediana do baseline (padrão: 0.25 = +25%%)")
+    parser.add_argument('--min-delta-us', type=float, default=1.0,
+                        help="Diferença absoluta mínima para contar como regressão (padrão: 1 µs)")
+    parser.add_argument('--save-baseline', help="Salvar os resultados como novo baseline")
+    args = parser.parse_args(argv)
+
+    # Keep benchmark sessions out of the real assessment database, session store and event log
+    os.environ.setdefault('ASSESSMENT_DB', os.path.join(tempfile.mkdtemp(), 'benchmark.db'))
+    os.environ.setdefault('SESSION_STORE', 'memory')
+    os.environ.setdefault('TELEMETRY_SINK', 'off')
+
+    benchmarks = {}
+    if args.only in (None, 'micro'):
+        benchmarks.update(micro_benchmarks())
+    if args.only in (None, 'e2e'):
+        benchmarks.update(e2e_benchmarks(args.rounds))
+    results = {'python': sys.version.split()[0], 'created_at': time.time(), 'benchmarks': benchmarks}
+
+    for name, result in benchmarks.items():
+        print(f"{name:30s} {result['median_us']:12.1f} µs  (min {result['min_us']:.1f})")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+    if args.save_baseline:
+        baseline = dict(results)
+        if os.path.exists(args.save_baseline):
+            # Keep hand-tuned per-benchmark thresholds across baseline refreshes
+            with open(args.save_baseline, 'r', encoding='utf-8') as file:
+                baseline['thresholds'] = json.load(file).get('thresholds', {})
+        with open(args.save_baseline, 'w', encoding='utf-8') as file:
+            json.dump(baseline, file, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            regressions = compare(results, json.load(file), args.threshold, args.min_delta_us)
+        for regression in regressions:
+            print(f"Regressão: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
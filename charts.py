@@ -0,0 +1,291 @@
+"""Results-page charts.
+
+The static parts of each figure (threshold traces, layout, axes, color
+scale) are built and validated once per set of categories and cached as
+plain dicts; per session only the score trace is filled in.
+
+Two backends are available, selected with the ``CHART_BACKEND`` environment
+variable:
+
+- ``plotly`` (default): interactive Plotly figures.
+- ``vega``: a lightweight backend that needs neither Plotly nor pandas. The
+  radar chart is an inline SVG and the bar chart a Vega-Lite spec, both
+  assembled from precomputed templates.
+
+Plotly is imported on first use, so neither backend costs anything until the
+first results page is rendered.
+"""
+import copy
+import functools
+import math
+import os
+from typing import Dict, List, Tuple
+
+from report import SEVERITY_COLORS
+from utils import get_severity_level
+
+CHART_BACKEND = os.environ.get('CHART_BACKEND', 'plotly')
+
+BAR_COLOR_SCALE = [
+    [0, '#4CAF50'],    # Verde para baixo
+    [0.4, '#FFA500'],  # Laranja para moderado
+    [0.7, '#FF6B6B'],  # Vermelho para alto
+    [1, '#FF0000']     # Vermelho escuro para muito alto
+]
+
+THRESHOLDS = [
+    (70, 'Limiar Clínico', 'rgba(255,0,0,0.5)', 'red'),
+    (40, 'Limiar Moderado', 'rgba(255,165,0,0.5)', 'orange')
+]
+
+
+def _figure(template: Dict, data: List[Dict]) -> 'go.Figure':
+    import plotly.graph_objects as go
+
+    # The template was validated when it was built and the score trace comes
+    # from our own code, so skip Plotly's per-property validation, which is
+    # most of the cost of building a figure.
+    return go.Figure({'data': data, 'layout': template['layout']}, _validate=False)
+
+
+@functools.lru_cache(maxsize=8)
+def _radar_template(categories: Tuple[str, ...]) -> Dict:
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+
+    # Add clinical and moderate thresholds
+    for value, name, color, _ in THRESHOLDS:
+        fig.add_trace(go.Scatterpolar(
+            r=[value] * len(categories),
+            theta=list(categories),
+            fill=None,
+            name=name,
+            line=dict(color=color, dash='dash')
+        ))
+
+    # Placeholder for the scores, replaced per session
+    fig.add_trace(go.Scatterpolar(
+        r=[0] * len(categories),
+        theta=list(categories),
+        fill='toself',
+        name='Perfil TDAH',
+        line_color='#1B365D',
+        fillcolor='rgba(27,54,93,0.3)',
+        hovertemplate='%{theta}: %{r:.1f}%<br>Severidade: %{customdata}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 100],
+                tickvals=[0, 20, 40, 60, 70, 80, 100],
+                ticktext=['0%', '20%', '40%', '60%', '70%', '80%', '100%']
+            )
+        ),
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        height=400,
+        margin=dict(t=30, b=30)
+    )
+    return fig.to_dict()
+
+
+def create_radar_chart(scores: Dict[str, float]) -> 'go.Figure':
+    """Enhanced radar chart with clinical thresholds."""
+    template = _radar_template(tuple(scores))
+    values = list(scores.values())
+    *thresholds, score_trace = template['data']
+    score_trace = dict(score_trace, r=values, customdata=[get_severity_level(v) for v in values])
+    return _figure(template, thresholds + [score_trace])
+
+
+@functools.lru_cache(maxsize=8)
+def _bar_template(categories: Tuple[str, ...]) -> Dict:
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Bar(
+        x=list(categories),
+        y=[0] * len(categories),
+        marker=dict(color=[0] * len(categories), coloraxis='coloraxis'),
+        hovertemplate='<b>%{x}</b><br>' +
+                      'Pontuação: %{y:.1f}%<br>' +
+                      'Severidade: %{customdata}<extra></extra>',
+        showlegend=False
+    ))
+
+    fig.update_layout(
+        xaxis=dict(title=dict(text='Categoria')),
+        yaxis=dict(title=dict(text='Pontuação'), range=[0, 100]),
+        coloraxis=dict(colorscale=BAR_COLOR_SCALE, colorbar=dict(title=dict(text='Pontuação'))),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        height=300,
+        margin=dict(t=30, b=30)
+    )
+
+    # Add threshold lines
+    fig.add_hline(y=70, line_dash="dash", line_color="red",
+                  annotation_text="Limiar Clínico (70%)")
+    fig.add_hline(y=40, line_dash="dash", line_color="orange",
+                  annotation_text="Limiar Moderado (40%)")
+    return fig.to_dict()
+
+
+def create_bar_chart(scores: Dict[str, float]) -> 'go.Figure':
+    """Enhanced bar chart with clinical context."""
+    template = _bar_template(tuple(scores))
+    values = list(scores.values())
+    bar = template['data'][0]
+    bar = dict(bar, y=values, marker=dict(bar['marker'], color=values),
+               customdata=[get_severity_level(v) for v in values])
+    return _figure(template, [bar])
+
+
+# Lightweight backend
+
+RADAR_SIZE = 400
+RADAR_RADIUS = 140
+
+
+def _radar_point(index: int, count: int, value: float) -> Tuple[float, float]:
+    angle = 2 * math.pi * index / count - math.pi / 2
+    r = RADAR_RADIUS * value / 100
+    return RADAR_SIZE / 2 + r * math.cos(angle), RADAR_SIZE / 2 + r * math.sin(angle)
+
+
+def _radar_polygon(values: List[float]) -> str:
+    return ' '.join('{:.1f},{:.1f}'.format(*_radar_point(i, len(values), v)) for i, v in enumerate(values))
+
+
+@functools.lru_cache(maxsize=8)
+def _radar_svg_template(categories: Tuple[str, ...]) -> Tuple[str, str]:
+    n = len(categories)
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {RADAR_SIZE} {RADAR_SIZE}" '
+             f'width="100%" height="{RADAR_SIZE}" font-family="sans-serif" font-size="12">']
+    for level in (20, 40, 60, 80, 100):
+        parts.append(f'<polygon points="{_radar_polygon([level] * n)}" fill="none" stroke="#e9ecef"/>')
+    for i, category in enumerate(categories):
+        x, y = _radar_point(i, n, 100)
+        lx, ly = _radar_point(i, n, 115)
+        parts.append(f'<line x1="{RADAR_SIZE / 2}" y1="{RADAR_SIZE / 2}" x2="{x:.1f}" y2="{y:.1f}" stroke="#e9ecef"/>')
+        parts.append(f'<text x="{lx:.1f}" y="{ly:.1f}" text-anchor="middle" fill="#1B365D">{category}</text>')
+    for value, name, color, _ in THRESHOLDS:
+        parts.append(f'<polygon points="{_radar_polygon([value] * n)}" fill="none" stroke="{color}" '
+                     f'stroke-dasharray="6,4"><title>{name} ({value}%)</title></polygon>')
+    return ''.join(parts), '</svg>'
+
+
+def radar_svg(scores: Dict[str, float]) -> str:
+    """Radar chart as inline SVG, without Plotly."""
+    head, tail = _radar_svg_template(tuple(scores))
+    values = list(scores.values())
+    points = _radar_polygon(values)
+    markers = ''.join(
+        '<circle cx="{:.1f}" cy="{:.1f}" r="4" fill="{}"><title>{}: {:.1f}% ({})</title></circle>'.format(
+            *_radar_point(i, len(values), v), SEVERITY_COLORS[get_severity_level(v)], c, v, get_severity_level(v))
+        for i, (c, v) in enumerate(scores.items())
+    )
+    return (f'{head}<polygon points="{points}" fill="rgba(27,54,93,0.3)" stroke="#1B365D" stroke-width="2">'
+            f'<title>Perfil TDAH</title></polygon>{markers}{tail}')
+
+
+BAR_WIDTH, BAR_HEIGHT = 400, 300
+BAR_PLOT = (40, 20, 390, 260)  # left, top, right, bottom of the plot area
+
+
+def _bar_y(value: float) -> float:
+    left, top, right, bottom = BAR_PLOT
+    return bottom - (bottom - top) * value / 100
+
+
+@functools.lru_cache(maxsize=8)
+def _bar_svg_template(categories: Tuple[str, ...]) -> Tuple[str, str]:
+    left, top, right, bottom = BAR_PLOT
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {BAR_WIDTH} {BAR_HEIGHT}" '
+             f'width="100%" height="{BAR_HEIGHT}" font-family="sans-serif" font-size="12">']
+    for level in (0, 20, 40, 60, 80, 100):
+        y = _bar_y(level)
+        parts.append(f'<line x1="{left}" y1="{y:.1f}" x2="{right}" y2="{y:.1f}" stroke="#e9ecef"/>')
+        parts.append(f'<text x="{left - 6}" y="{y + 4:.1f}" text-anchor="end" fill="#1B365D">{level}</text>')
+    slot = (right - left) / len(categories)
+    for i, category in enumerate(categories):
+        parts.append(f'<text x="{left + slot * (i + 0.5):.1f}" y="{bottom + 18}" text-anchor="middle" '
+                     f'fill="#1B365D">{category}</text>')
+    tail = [
+        f'<line x1="{left}" y1="{_bar_y(value):.1f}" x2="{right}" y2="{_bar_y(value):.1f}" stroke="{color}" '
+        f'stroke-dasharray="6,4"/><text x="{right}" y="{_bar_y(value) - 4:.1f}" text-anchor="end" '
+        f'fill="{color}">{name} ({value}%)</text>'
+        for value, name, _, color in THRESHOLDS
+    ]
+    return ''.join(parts), ''.join(tail) + '</svg>'
+
+
+def bar_svg(scores: Dict[str, float]) -> str:
+    """Bar chart as inline SVG, without Plotly or a Vega runtime (e.g. for exported reports)."""
+    head, tail = _bar_svg_template(tuple(scores))
+    left, top, right, bottom = BAR_PLOT
+    slot = (right - left) / len(scores)
+    bars = ''.join(
+        '<rect x="{:.1f}" y="{:.1f}" width="{:.1f}" height="{:.1f}" fill="{}"><title>{}: {:.1f}% ({})</title></rect>'.format(
+            left + slot * (i + 0.2), _bar_y(v), slot * 0.6, bottom - _bar_y(v),
+            SEVERITY_COLORS[get_severity_level(v)], c, v, get_severity_level(v))
+        for i, (c, v) in enumerate(scores.items())
+    )
+    return head + bars + tail
+
+
+BAR_SPEC_TEMPLATE = {
+    '$schema': 'https://vega.github.io/schema/vega-lite/v5.json',
+    'height': 300,
+    'background': 'transparent',
+    'layer': [
+        {
+            'mark': {'type': 'bar'},
+            'encoding': {
+                'x': {'field': 'Categoria', 'type': 'nominal', 'sort': None},
+                'y': {'field': 'Pontuação', 'type': 'quantitative', 'scale': {'domain': [0, 100]}},
+                'color': {
+                    'field': 'Pontuação', 'type': 'quantitative',
+                    'scale': {'domain': [stop * 100 for stop, _ in BAR_COLOR_SCALE],
+                              'range': [color for _, color in BAR_COLOR_SCALE]}
+                },
+                'tooltip': [
+                    {'field': 'Categoria', 'type': 'nominal'},
+                    {'field': 'Pontuação', 'type': 'quantitative', 'format': '.1f'},
+                    {'field': 'Severidade', 'type': 'nominal'}
+                ]
+            }
+        },
+        *[
+            {
+                'data': {'values': [{'y': value, 'label': f'{name} ({value}%)'}]},
+                'layer': [
+                    {'mark': {'type': 'rule', 'strokeDash': [6, 4], 'color': color},
+                     'encoding': {'y': {'field': 'y', 'type': 'quantitative'}}},
+                    {'mark': {'type': 'text', 'align': 'right', 'baseline': 'bottom', 'x': 'width', 'dy': -2},
+                     'encoding': {'y': {'field': 'y', 'type': 'quantitative'}, 'text': {'field': 'label'}}}
+                ]
+            }
+            for value, name, _, color in THRESHOLDS
+        ]
+    ]
+}
+
+
+def bar_spec(scores: Dict[str, float]) -> Dict:
+    """Bar chart as a Vega-Lite spec, without Plotly or pandas."""
+    spec = copy.copy(BAR_SPEC_TEMPLATE)
+    spec['data'] = {'values': [
+        {'Categoria': c, 'Pontuação': v, 'Severidade': get_severity_level(v)} for c, v in scores.items()
+    ]}
+    return spec
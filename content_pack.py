@@ -0,0 +1,267 @@
+"""Compiled, memory-mapped content pack.
+
+``python content_pack.py build`` compiles every feedback text, category
+description and recommendation into one binary file. Workers open it with
+``mmap``: the bytes live in the page cache and are shared by every process on
+the machine (forked or not), instead of each worker building its own copy of
+the texts, and a lookup is a fixed-offset read plus one UTF-8 decode::
+
+    header        magic, format, source version, code version, counts
+    entries       (offset, length) of every string, u32 each
+    id table      question id -> position, i32 (-1 for unused ids)
+    strings       UTF-8, each distinct text stored once
+
+Entries are two per (category, severity), description and recommendations,
+then one per (question, option) feedback text. Both lookups are a
+multiply-add into the entry table. The questions and page content themselves
+are not in the pack: the content registry reads and hashes the JSON files
+anyway to notice changes.
+
+A pack is only used while it matches its sources: the source version is the
+content registry's version of the JSON files, and the code version is a hash
+of ``utils.py``, where the descriptions, recommendations and feedback rules
+live. Otherwise callers fall back to computing the texts as before.
+
+Usage:
+    python content_pack.py build             # writes data/content.pack
+    python content_pack.py stats --workers 8 # load time, lookup time and per-worker memory, JSON vs pack
+"""
+import argparse
+import functools
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from typing import Dict, List, Optional
+
+from utils import CATEGORIES, SEVERITY_LEVELS
+
+PACK_PATH = os.environ.get('CONTENT_PACK', 'data/content.pack')
+PACK_MAGIC = b'AMCP'
+PACK_FORMAT = 2
+
+HEADER = struct.Struct('<4sHH12s12sIIII')  # magic, format, reserved, source, code, questions, options, ids, entries
+ENTRY = struct.Struct('<II')
+CATEGORY_POSITION = {category: i for i, category in enumerate(CATEGORIES)}
+SEVERITY_POSITION = {severity: i for i, severity in enumerate(SEVERITY_LEVELS)}
+
+
+def code_version() -> str:
+    """Hash of ``utils.py``, where the compiled texts and feedback rules are defined."""
+    import utils
+    with open(utils.__file__, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()[:12]
+
+
+def build_pack(questions_bytes: bytes, content_bytes: bytes, path: str = PACK_PATH) -> int:
+    """Compile the sources into a pack at ``path`` (replaced atomically); returns its size in bytes."""
+    from utils import get_category_description, get_category_recommendations, get_feedback, validate_questions
+
+    questions = json.loads(questions_bytes)['questions']
+    validate_questions(questions)
+    json.loads(content_bytes)
+    max_options = max(len(q['options']) for q in questions)
+    id_limit = max(q['id'] for q in questions) + 1
+
+    texts: List[bytes] = []
+    for category in CATEGORIES:
+        for severity in SEVERITY_LEVELS:
+            texts.append(get_category_description(category, severity).encode('utf-8'))
+            texts.append(get_category_recommendations(category, severity).encode('utf-8'))
+    for q in questions:
+        feedback = [get_feedback(q, option) for option in q['options']]
+        feedback += [''] * (max_options - len(feedback))
+        texts.extend(text.encode('utf-8') for text in feedback)
+
+    strings = bytearray()
+    offsets: Dict[bytes, int] = {}
+    entries = bytearray()
+    for text in texts:
+        if text not in offsets:
+            offsets[text] = len(strings)
+            strings += text
+        entries += ENTRY.pack(offsets[text], len(text))
+
+    positions = [-1] * id_limit
+    for position, q in enumerate(questions):
+        positions[q['id']] = position
+
+    source = hashlib.sha1(questions_bytes + b'\0' + content_bytes).hexdigest()[:12]
+    header = HEADER.pack(PACK_MAGIC, PACK_FORMAT, 0, source.encode('ascii'), code_version().encode('ascii'),
+                         len(questions), max_options, id_limit, len(texts))
+    data = header + entries + struct.pack(f'<{id_limit}i', *positions) + strings
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+class ContentPack:
+    """Read-only view of a pack file through ``mmap``."""
+
+    def __init__(self, path: str = PACK_PATH):
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, pack_format, _, source, code, self.question_count, self.max_options,
+         self._id_limit, entry_count) = HEADER.unpack_from(self._map)
+        if magic != PACK_MAGIC or pack_format != PACK_FORMAT:
+            raise ValueError(f"Pacote de conteúdo inválido: {path}")
+        self.source_version = source.decode('ascii')
+        self.code_version = code.decode('ascii')
+        # Typed views straight over the mapped pages (native order, little-endian on every supported host)
+        view = memoryview(self._map)
+        ids_start = HEADER.size + entry_count * ENTRY.size
+        self._entries = view[HEADER.size:ids_start].cast('I')
+        self._positions = view[ids_start:ids_start + self._id_limit * 4].cast('i')
+        self._strings = ids_start + self._id_limit * 4
+        self._feedback_base = len(CATEGORIES) * len(SEVERITY_LEVELS) * 2
+
+    def _text(self, entry: int) -> str:
+        start = self._strings + self._entries[2 * entry]
+        return self._map[start:start + self._entries[2 * entry + 1]].decode('utf-8')
+
+    def _category_entry(self, category: str, severity: str) -> int:
+        return (CATEGORY_POSITION[category] * len(SEVERITY_LEVELS) + SEVERITY_POSITION[severity]) * 2
+
+    def description(self, category: str, severity: str) -> str:
+        return self._text(self._category_entry(category, severity))
+
+    def recommendations(self, category: str, severity: str) -> str:
+        return self._text(self._category_entry(category, severity) + 1)
+
+    def feedback(self, question_id: int, option: int) -> str:
+        """Feedback for option index ``option`` of question ``question_id``."""
+        position = self._positions[question_id] if 0 <= question_id < self._id_limit else -1
+        if position < 0 or not 0 <= option < self.max_options:
+            raise KeyError((question_id, option))
+        return self._text(self._feedback_base + position * self.max_options + option)
+
+    def question_ids(self) -> List[int]:
+        """Ids of the questions the pack holds feedback for."""
+        return [qid for qid in range(self._id_limit) if self._positions[qid] >= 0]
+
+
+@functools.lru_cache(maxsize=2)
+def _load_pack(path: str, mtime: int) -> ContentPack:
+    pack = ContentPack(path)
+    if pack.code_version != code_version():
+        raise ValueError(f"Pacote de conteúdo desatualizado: {path}")
+    return pack
+
+
+def get_pack(path: str = PACK_PATH) -> Optional[ContentPack]:
+    """Process-wide pack, reopened after a rebuild; ``None`` if none was built or ``utils.py`` changed since."""
+    try:
+        return _load_pack(path, os.stat(path).st_mtime_ns)
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def open_pack(source_version: str) -> Optional[ContentPack]:
+    """The pack, if it was built from exactly the content version ``source_version``."""
+    pack = get_pack()
+    return pack if pack is not None and pack.source_version == source_version else None
+
+
+def private_memory_kb() -> int:
+    """Memory only this process holds (Linux): private clean plus private dirty pages."""
+    with open('/proc/self/smaps_rollup') as file:
+        return sum(int(line.split()[1]) for line in file if line.startswith('Private_'))
+
+
+def probe(source: str, workers: int, questions_path: str, content_path: str) -> Dict:
+    """Load the texts from ``source`` ('json' or 'pack'), then fork ``workers`` that each look up all of them."""
+    from utils import get_category_description, get_category_recommendations, get_feedback
+
+    start = time.perf_counter()
+    if source == 'pack':
+        pack = ContentPack()
+        lookups = ([lambda c=c, s=s: (pack.description(c, s), pack.recommendations(c, s))
+                    for c in CATEGORIES for s in SEVERITY_LEVELS]
+                   + [lambda q=q, i=i: pack.feedback(q, i) for q in pack.question_ids() for i in range(pack.max_options)])
+    else:
+        with open(questions_path, 'rb') as file:
+            parsed = json.loads(file.read())['questions']
+        with open(content_path, 'rb') as file:
+            json.loads(file.read())
+        lookups = ([lambda c=c, s=s: (get_category_description(c, s), get_category_recommendations(c, s))
+                    for c in CATEGORIES for s in SEVERITY_LEVELS]
+                   + [lambda q=q, o=o: get_feedback(q, o) for q in parsed for o in q['options']])
+    load_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for lookup in lookups:
+        lookup()
+    lookup_us = (time.perf_counter() - start) / len(lookups) * 1e6
+
+    growth = []
+    for _ in range(workers):
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_end)
+            before = private_memory_kb()
+            # A worker's day: every text, many times over
+            for _ in range(100):
+                for lookup in lookups:
+                    lookup()
+            os.write(write_end, str(private_memory_kb() - before).encode())
+            os._exit(0)
+        os.close(write_end)
+        with os.fdopen(read_end) as pipe:
+            growth.append(int(pipe.read()))
+        os.waitpid(pid, 0)
+
+    return {'source': source, 'load_ms': load_ms, 'lookup_us': lookup_us,
+            'worker_private_kb': sum(growth) / len(growth) if growth else 0}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from content_registry import CONTENT_PATH, QUESTIONS_PATH
+
+    parser = argparse.ArgumentParser(description="Pacote de conteúdo compilado e mapeado em memória.")
+    parser.add_argument('command', choices=('build', 'stats'))
+    parser.add_argument('--out', default=PACK_PATH, help=f"Arquivo do pacote (padrão: {PACK_PATH})")
+    parser.add_argument('--questions', default=QUESTIONS_PATH)
+    parser.add_argument('--content', default=CONTENT_PATH)
+    parser.add_argument('--workers', type=int, default=4, help="Processos filhos medidos em stats (padrão: 4)")
+    parser.add_argument('--probe', choices=('json', 'pack'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.probe:
+        print(json.dumps(probe(args.probe, args.workers, args.questions, args.content)))
+        return 0
+
+    if args.command == 'build':
+        with open(args.questions, 'rb') as file:
+            questions_bytes = file.read()
+        with open(args.content, 'rb') as file:
+            content_bytes = file.read()
+        size = build_pack(questions_bytes, content_bytes, args.out)
+        print(f"Pacote gravado em {args.out}: {size / 1024:.1f} KiB")
+        return 0
+
+    if get_pack(args.out) is None:
+        print("Pacote ausente ou desatualizado; execute: python content_pack.py build", file=sys.stderr)
+        return 1
+    import subprocess
+    print(f"{'origem':8s} {'carga (ms)':>11s} {'consulta (µs)':>14s} {'privada/worker (KiB)':>21s}")
+    for source in ('json', 'pack'):
+        # Each source in a fresh interpreter, so neither inherits the other's allocations
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), 'stats', '--probe', source, '--workers', str(args.workers),
+             '--questions', args.questions, '--content', args.content],
+            capture_output=True, text=True, check=True, env=dict(os.environ, CONTENT_PACK=args.out)
+        )
+        stats = json.loads(result.stdout)
+        print(f"{source:8s} {stats['load_ms']:11.2f} {stats['lookup_us']:14.2f} {stats['worker_private_kb']:21.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
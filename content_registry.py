@@ -0,0 +1,174 @@
+"""Versioned, hot-reloadable question bank and page content.
+
+A ``ContentRegistry`` holds an immutable ``ContentSnapshot`` built from
+``data/questions.json`` and ``data/content.json``. A background thread polls
+the files' mtimes and, when the bytes' hash changes, parses and validates a
+new snapshot off the request path and swaps it in with a single reference
+assignment. A file that fails validation is ignored and the previous
+snapshot keeps serving.
+
+Every snapshot has a version id. Recent snapshots stay addressable by that id,
+so a session can keep scoring against the version it started with while new
+sessions pick up the latest one.
+"""
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from utils import get_feedback, questions_version, validate_questions
+
+logger = logging.getLogger(__name__)
+
+QUESTIONS_PATH = 'data/questions.json'
+CONTENT_PATH = 'data/content.json'
+REQUIRED_CONTENT_KEYS = ('intro', 'testimonials', 'institutional_testimonials', 'partner_institutions')
+
+
+class ContentSnapshot:
+    """Parsed and validated questions and content, identified by ``version``."""
+
+    def __init__(self, version: str, questions: List[Dict], content: Dict):
+        self.version = version
+        self.questions = questions
+        self.content = content
+        self.loaded_at = time.time()
+
+        validate_questions(questions)
+        missing = [key for key in REQUIRED_CONTENT_KEYS if key not in content]
+        if missing:
+            raise ValueError(f"Conteúdo sem as chaves: {', '.join(missing)}")
+
+    @functools.cached_property
+    def questions_version(self) -> str:
+        """Version of the questions alone, equal to ``bank.version`` without compiling the bank."""
+        return questions_version(self.questions)
+
+    @functools.cached_property
+    def bank(self) -> 'QuestionBank':
+        """Compiled question bank, built on first use so question pages never load NumPy."""
+        from question_bank import QuestionBank
+        return QuestionBank(self.questions)
+
+    @functools.cached_property
+    def score_table(self) -> 'ScoreTable':
+        """Weights for running totals, without compiling the NumPy bank."""
+        from progress import ScoreTable
+        return ScoreTable(self.questions)
+
+    @functools.cached_property
+    def adaptive(self) -> 'AdaptiveEngine':
+        """Adaptive sequencing engine for these questions."""
+        from adaptive import AdaptiveEngine
+        return AdaptiveEngine(self.questions)
+
+    @property
+    def pack(self) -> Optional['ContentPack']:
+        """Memory-mapped content pack built from exactly this version, if there is one.
+
+        Looked up on every access, so a pack built, rebuilt or removed after
+        the snapshot was loaded is picked up (``get_pack`` caches by mtime).
+        """
+        from content_pack import open_pack
+        return open_pack(self.version)
+
+    def feedback(self, question: Dict, index: int) -> str:
+        """Feedback for option ``index`` of ``question``, read from the pack when available."""
+        if self.pack is not None:
+            return self.pack.feedback(question['id'], index)
+        return get_feedback(question, question['options'][index])
+
+
+class ContentRegistry:
+    """Holds the current snapshot and reloads it when the source files change."""
+
+    def __init__(self, questions_path: str = QUESTIONS_PATH, content_path: str = CONTENT_PATH,
+                 poll_interval: float = 2.0, keep: int = 16):
+        self.questions_path = questions_path
+        self.content_path = content_path
+        self.poll_interval = poll_interval
+        self.keep = keep
+        self.last_error: Optional[str] = None
+        self._snapshots: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple] = None
+        self._digest: Optional[str] = None
+        self._current: Optional[ContentSnapshot] = None
+        self._thread: Optional[threading.Thread] = None
+        if not self.check():
+            raise ValueError(self.last_error)
+
+    def _file_stamp(self) -> Tuple:
+        return tuple((s.st_mtime_ns, s.st_size) for s in map(os.stat, (self.questions_path, self.content_path)))
+
+    def check(self) -> bool:
+        """Reload if the files changed; returns ``False`` if a changed file was rejected."""
+        with self._lock:
+            try:
+                stamp = self._file_stamp()
+            except OSError as e:
+                # Usually a file caught mid-replace; retry on the next poll
+                self.last_error = f"{type(e).__name__}: {e}"
+                return False
+            if stamp == self._stamp:
+                return self.last_error is None
+            # Remember the stamp even if parsing fails, so a broken file is not re-read every poll
+            self._stamp = stamp
+            try:
+                with open(self.questions_path, 'rb') as file:
+                    questions_bytes = file.read()
+                with open(self.content_path, 'rb') as file:
+                    content_bytes = file.read()
+                digest = hashlib.sha1(questions_bytes + b'\0' + content_bytes).hexdigest()[:12]
+                if digest != self._digest:
+                    snapshot = ContentSnapshot(
+                        digest,
+                        json.loads(questions_bytes)['questions'],
+                        json.loads(content_bytes)
+                    )
+                    self._snapshots[digest] = snapshot
+                    self._snapshots.move_to_end(digest)
+                    while len(self._snapshots) > self.keep:
+                        self._snapshots.popitem(last=False)
+                    self._current = snapshot
+                    self._digest = digest
+                    logger.info("Conteúdo carregado: versão %s", digest)
+                self.last_error = None
+                return True
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.warning("Conteúdo rejeitado, mantendo a versão %s: %s", self._digest, self.last_error)
+                return False
+
+    def current(self) -> ContentSnapshot:
+        return self._current
+
+    def get(self, version: Optional[str]) -> Optional[ContentSnapshot]:
+        """Snapshot for ``version``, or ``None`` if it is unknown or was evicted."""
+        return self._snapshots.get(version)
+
+    def start(self) -> 'ContentRegistry':
+        """Start polling for changes in a daemon thread (idempotent)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._poll, name='content-registry', daemon=True)
+            self._thread.start()
+        return self
+
+    def _poll(self):
+        while True:
+            time.sleep(self.poll_interval)
+            previous = self._current
+            self.check()
+            if self._current is not previous:
+                self._current.bank  # Compile here rather than on the first request that scores
+
+
+@functools.lru_cache(maxsize=None)
+def get_registry() -> ContentRegistry:
+    """Process-wide registry, polling for changes from first use."""
+    return ContentRegistry().start()
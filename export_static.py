@@ -0,0 +1,301 @@
+"""Static export of the funnel for CDN serving.
+
+Question pages, feedback texts and result sections are deterministic
+functions of ``data/questions.json``, ``data/content.json`` and the tables in
+``utils.py``. This command pre-renders them into plain files:
+
+    dist/index.html           intro, every question and the testimonials
+    dist/funnel.<hash>.js     navigation and in-browser scoring, with option
+                              weights, feedback and every (category, severity)
+                              result template inlined
+    dist/styles.<hash>.css    the app's styles plus the static page layout
+
+Scoring in the browser follows ``QuestionBank``: option weights summed per
+category as a percentage of the category maximum, with the same severity
+thresholds, result cards and recommendation texts as the app. Assets are
+content-hashed so a CDN can cache them indefinitely; only ``index.html``
+needs a short TTL. Charts are plain CSS bars and percentiles are not shown,
+since the norm tables stay on the server.
+
+Usage:
+    python export_static.py
+    python export_static.py --out dist --app-url https://app.example.com/
+"""
+import argparse
+import hashlib
+import html
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+from content_registry import ContentRegistry
+from form_mode import feedback_table
+from report import (GLOBAL_SEVERITY_TEMPLATE, PLATFORM_PROMOTION, RECOMMENDATION_BLOCK_TEMPLATE, SEVERITY_COLORS,
+                    category_template, render_social_proof, render_testimonial)
+from utils import (CATEGORIES, MAX_OPTION_SCORE, OPTION_WEIGHTS, RECOMMENDATION_TEMPLATES, SEVERITY_THRESHOLDS)
+
+STATIC_CSS = """
+body { margin: 0; font-family: sans-serif; color: #1B365D; background: #FFFFFF; }
+.static-app { max-width: 800px; margin: 0 auto; padding: 0.5rem 0.5rem 7rem; }
+.static-progress { height: 8px; background-color: #e9ecef; border-radius: 5px; margin-bottom: 0.5rem; }
+.static-progress > div { height: 100%; width: 0; background-color: #4CAF50; border-radius: 5px; transition: width 0.3s ease; }
+.static-options { border: none; padding: 0; margin: 0 0 1rem 0; }
+.static-options label { display: block; padding: 0.5rem 0; cursor: pointer; }
+.static-nav { display: flex; gap: 1rem; max-width: 800px; margin: 0 auto; }
+.static-button { flex: 1; border: none; border-radius: 25px; padding: 0.75rem 2rem; font-size: 16px; font-weight: 500;
+                 background-color: #1B365D; color: white; cursor: pointer; text-align: center; text-decoration: none; }
+.static-button:hover:not(:disabled) { background-color: #FFA500; }
+.static-button:disabled { opacity: 0.5; cursor: not-allowed; }
+.static-bar { display: flex; align-items: center; gap: 0.5rem; margin: 0.5rem 0; }
+.static-bar > span { width: 8rem; }
+.static-bar > div { flex: 1; background-color: #e9ecef; border-radius: 4px; }
+.static-bar > div > div { height: 1.5rem; border-radius: 4px; }
+.static-success { background-color: #d4edda; color: #155724; padding: 1rem; border-radius: 8px; margin: 1rem 0; }
+"""
+
+FUNNEL_JS = """(function () {
+    const data = __DATA__;
+    const total = data.questions.length;
+    const answers = new Array(total).fill(-1);
+    const sections = document.querySelectorAll('section[data-step]');
+    let step = 0;
+
+    // The subset of Python's str.format used by the templates: {name}, {name:.1f}, {{ and }}
+    function fill(template, values) {
+        return template.replace(/\\{\\{|\\}\\}|\\{(\\w+)(:\\.1f)?\\}/g, (match, key, fixed) => {
+            if (match === '{{') return '{';
+            if (match === '}}') return '}';
+            return fixed ? values[key].toFixed(1) : values[key];
+        });
+    }
+
+    function severity(score) {
+        for (const [threshold, level] of data.severityThresholds) {
+            if (score >= threshold) return level;
+        }
+        return 'Baixo';
+    }
+
+    function score() {
+        const points = Object.fromEntries(data.categories.map(c => [c, 0]));
+        data.questions.forEach((question, i) => {
+            if (answers[i] >= 0) points[question.category] += question.weights[answers[i]];
+        });
+        return Object.fromEntries(data.categories.map(c => [c, points[c] / data.maxScores[c] * 100]));
+    }
+
+    function bars(scores) {
+        return data.categories.map(c => {
+            const color = data.severityColors[severity(scores[c])];
+            return '<div class="static-bar"><span>' + c.charAt(0).toUpperCase() + c.slice(1) + '</span>' +
+                '<div><div style="width: ' + scores[c] + '%; background-color: ' + color + ';"></div></div>' +
+                '<strong>' + scores[c].toFixed(1) + '%</strong></div>';
+        }).join('');
+    }
+
+    function showResults() {
+        const scores = score();
+        const average = data.categories.reduce((sum, c) => sum + scores[c], 0) / data.categories.length;
+        const level = severity(average);
+        let top = fill(data.globalSeverity, {color: data.severityColors[level], severity: level, avg_score: average});
+        top += '<h2 style="text-align: center; font-size: 20px;">Análise Comparativa</h2>' + bars(scores);
+        top += '<h2 style="text-align: center; font-size: 20px;">Análise Clínica Detalhada</h2>';
+        for (const c of data.categories) {
+            top += fill(data.cards[c + '|' + severity(scores[c])], {score: scores[c], percentile_html: ''});
+        }
+        document.getElementById('resultado').innerHTML = top;
+
+        let highest = data.categories[0];
+        for (const c of data.categories) if (scores[c] > scores[highest]) highest = c;
+        const template = data.recommendations.find(([threshold]) => threshold === null || average >= threshold)[1];
+        const recommendation = fill(template, {avg_score: average, category: highest, category_score: scores[highest]});
+        document.getElementById('recomendacao').innerHTML = fill(data.recommendationBlock, {recommendation: recommendation});
+    }
+
+    function show(next) {
+        step = next;
+        sections.forEach(section => { section.hidden = Number(section.dataset.step) !== step; });
+        document.getElementById('progresso').style.width = (step / (total + 3) * 100) + '%';
+        if (step === total + 1) showResults();
+        window.scrollTo(0, 0);
+    }
+
+    document.addEventListener('change', event => {
+        const input = event.target;
+        if (!input.matches('input[data-position]')) return;
+        const position = Number(input.dataset.position);
+        const question = data.questions[position];
+        answers[position] = Number(input.value);
+        const box = document.querySelector('[data-feedback-for="' + question.id + '"]');
+        box.textContent = data.feedback[question.id][answers[position]];
+        box.hidden = false;
+        document.querySelector('section[data-step="' + (position + 1) + '"] [data-action="next"]').disabled = false;
+    });
+
+    document.addEventListener('click', event => {
+        const button = event.target.closest('button[data-action]');
+        if (!button) return;
+        if (button.dataset.action === 'next') show(step + 1);
+        else if (button.dataset.action === 'prev') show(step - 1);
+        else if (button.dataset.action === 'lead') document.getElementById('obrigado').hidden = false;
+    });
+
+    show(0);
+})();
+"""
+
+
+def _hashed_name(prefix: str, suffix: str, content: str) -> str:
+    return f"{prefix}.{hashlib.sha256(content.encode('utf-8')).hexdigest()[:10]}{suffix}"
+
+
+def funnel_data(questions: List[Dict], version: str) -> Dict:
+    """Everything the browser needs to navigate, score and render the results."""
+    return {
+        'version': version,
+        'categories': list(CATEGORIES),
+        'questions': [{'id': q['id'], 'category': q['category'],
+                       'weights': [OPTION_WEIGHTS[option] for option in q['options']]} for q in questions],
+        'maxScores': {c: sum(q['category'] == c for q in questions) * MAX_OPTION_SCORE for c in CATEGORIES},
+        'severityThresholds': [list(pair) for pair in SEVERITY_THRESHOLDS],
+        'severityColors': SEVERITY_COLORS,
+        'feedback': feedback_table(questions),
+        'cards': {f'{c}|{severity}': category_template(c, severity, version)
+                  for c in CATEGORIES for severity in SEVERITY_COLORS},
+        'globalSeverity': GLOBAL_SEVERITY_TEMPLATE,
+        'recommendations': [[None if threshold == float('-inf') else threshold, template]
+                            for threshold, template in RECOMMENDATION_TEMPLATES],
+        'recommendationBlock': RECOMMENDATION_BLOCK_TEMPLATE
+    }
+
+
+def _navigation(*buttons: str) -> str:
+    return f'<div class="navigation-container"><div class="static-nav">{"".join(buttons)}</div></div>'
+
+
+def _button(label: str, action: str, disabled: bool = False) -> str:
+    return (f'<button type="button" class="static-button" data-action="{action}"'
+            f'{" disabled" if disabled else ""}>{label}</button>')
+
+
+def render_pages(questions: List[Dict], content: Dict, version: str, script: str, stylesheet: str,
+                 app_url: Optional[str] = None) -> str:
+    """index.html with every page pre-rendered; the script shows one at a time."""
+    total = len(questions)
+    sections = [f"""
+<section data-step="0">
+    <div class="content-container">
+        <h1 style='text-align: center; font-size: 24px;'>{content['intro']['title']}</h1>
+        <p style='text-align: center; margin: 1rem 0;'>{content['intro']['description']}</p>
+    </div>
+    {_navigation(_button("Começar Avaliação", 'next'))}
+</section>"""]
+
+    for position, question in enumerate(questions):
+        options = ''.join(
+            f'<label><input type="radio" name="q_{question["id"]}" value="{i}" data-position="{position}"> '
+            f'{html.escape(option)}</label>'
+            for i, option in enumerate(question['options'])
+        )
+        next_label = "Próximo →" if position + 1 < total else "Ver Resultados →"
+        sections.append(f"""
+<section data-step="{position + 1}" hidden>
+    <div class="content-container">
+        <h2 style='text-align: center; font-size: 20px;'>Pergunta {position + 1} de {total}</h2>
+        <p style='text-align: center; margin: 1rem 0;'>{question['text']}</p>
+        <fieldset class="static-options">{options}</fieldset>
+        <div class="feedback-box" data-feedback-for="{question['id']}" hidden></div>
+    </div>
+    {_navigation(_button("← Voltar", 'prev', disabled=position == 0), _button(next_label, 'next', disabled=True))}
+</section>""")
+
+    sections.append(f"""
+<section data-step="{total + 1}" hidden>
+    <div class="content-container">
+        <h1 style='text-align: center; font-size: 24px;'>Resultados da Avaliação</h1>
+        <div id="resultado"></div>
+        {render_social_proof(content, version)}
+        {PLATFORM_PROMOTION}
+        <div id="recomendacao"></div>
+    </div>
+    {_navigation(_button("← Voltar ao Questionário", 'prev'), _button("Ver Depoimentos →", 'next'))}
+</section>""")
+
+    if app_url:
+        call_to_action = f'<a class="static-button" href="{html.escape(app_url)}">Experimente Gratuitamente →</a>'
+    else:
+        call_to_action = _button("Experimente Gratuitamente →", 'lead')
+    sections.append(f"""
+<section data-step="{total + 2}" hidden>
+    <div class="content-container">
+        <h1 style='text-align: center; font-size: 24px;'>Depoimentos de Pais</h1>
+        {''.join(render_testimonial(testimonial) for testimonial in content['testimonials'])}
+        <h2 style='text-align: center; font-size: 20px;'>Comece sua jornada com a Ativa-Mente</h2>
+        <div id="obrigado" class="static-success" hidden>Obrigado por seu interesse! Em breve você receberá um e-mail com as instruções de acesso.</div>
+    </div>
+    {_navigation(_button("← Voltar para os Resultados", 'prev'), call_to_action)}
+</section>""")
+
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Avaliação TDAH - Ativa-Mente</title>
+<link rel="stylesheet" href="{stylesheet}">
+</head>
+<body>
+<main class="static-app">
+<div class="static-progress"><div id="progresso"></div></div>
+{''.join(sections)}
+<p style='text-align: center; padding: 2rem 0;'>Desenvolvido com ❤️ pela Ativa-Mente | Este questionário não substitui uma avaliação profissional</p>
+</main>
+<script src="{script}"></script>
+</body>
+</html>
+"""
+
+
+def export(out_dir: str, registry: ContentRegistry, app_url: Optional[str] = None,
+           css_path: str = 'styles.css') -> Dict[str, str]:
+    """Write the static funnel into ``out_dir``; returns ``{asset: file name}``."""
+    snapshot = registry.current()
+    questions, content = snapshot.questions, snapshot.content
+
+    data = json.dumps(funnel_data(questions, snapshot.questions_version), ensure_ascii=False)
+    script = FUNNEL_JS.replace('__DATA__', data.replace('</', '<\\/'))
+    with open(css_path, 'r', encoding='utf-8') as file:
+        stylesheet = file.read() + STATIC_CSS
+
+    assets = {'script': _hashed_name('funnel', '.js', script), 'stylesheet': _hashed_name('styles', '.css', stylesheet)}
+    page = render_pages(questions, content, snapshot.questions_version, assets['script'], assets['stylesheet'], app_url)
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name, text in ((assets['script'], script), (assets['stylesheet'], stylesheet), ('index.html', page)):
+        with open(os.path.join(out_dir, name), 'w', encoding='utf-8') as file:
+            file.write(text)
+    return dict(assets, page='index.html')
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Exporta o funil como páginas estáticas para servir por CDN.")
+    parser.add_argument('--out', default='dist', help="Diretório de saída (padrão: dist)")
+    parser.add_argument('--app-url', help="Link do botão final para o app completo (padrão: apenas agradece)")
+    parser.add_argument('--questions', default='data/questions.json')
+    parser.add_argument('--content', default='data/content.json')
+    args = parser.parse_args(argv)
+
+    try:
+        registry = ContentRegistry(args.questions, args.content)
+    except ValueError as e:
+        print(f"Conteúdo inválido: {e}", file=sys.stderr)
+        return 1
+    assets = export(args.out, registry, args.app_url)
+    for name in assets.values():
+        print(os.path.join(args.out, name))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Batched questionnaire pages: one form per category, or one for everything.
+
+In the default ``step`` mode every answer and every "Próximo →" click reruns
+the whole script, 40+ runs per assessment. In ``category`` and ``all`` modes
+the questions of a page are an ``st.form``: answering does not touch the
+server, and the page is submitted once, so reaching the results takes 5
+script runs (``category``) or 3 (``all``). Feedback for each answer is
+rendered in the browser from a lookup precomputed with ``get_feedback``.
+
+The mode comes from ``QUESTIONNAIRE_MODE`` (``step``, ``category``, ``all``
+or ``adaptive``), and can be overridden per visit with ``?modo=``.
+``adaptive`` is one question per page in the order chosen by ``adaptive``,
+ending as soon as every severity band is decided.
+
+Pages keep the funnel's step numbering: a page is shown at the step of its
+first question, so results, testimonials and resume tokens work unchanged.
+"""
+import json
+import os
+from typing import Dict, List
+
+from utils import CATEGORIES, get_feedback
+
+MODES = ('step', 'category', 'all', 'adaptive')
+DEFAULT_MODE = os.environ.get('QUESTIONNAIRE_MODE', 'step')
+
+
+def page_groups(questions: List[Dict], mode: str) -> List[List[int]]:
+    """Question positions on each page, pages ordered by their first question."""
+    if mode == 'all':
+        return [list(range(len(questions)))]
+    if mode == 'category':
+        groups = [[i for i, q in enumerate(questions) if q['category'] == category] for category in CATEGORIES]
+        return sorted((group for group in groups if group), key=lambda group: group[0])
+    return [[i] for i in range(len(questions))]
+
+
+def page_for_step(groups: List[List[int]], step: int) -> int:
+    """Index of the page holding question ``step`` (1-based)."""
+    return next(page for page, group in enumerate(groups) if step - 1 in group)
+
+
+def feedback_table(questions: List[Dict]) -> Dict[int, List[str]]:
+    """``get_feedback`` for every option of every question."""
+    return {q['id']: [get_feedback(q, option) for option in q['options']] for q in questions}
+
+
+FEEDBACK_SCRIPT = """
+<script>
+const feedback = %s;
+const order = %s;
+const doc = window.parent.document;
+
+function bind(attempt) {
+    const groups = doc.querySelectorAll('[data-testid="stForm"] [data-testid="stRadio"]');
+    if (groups.length < order.length) {
+        if (attempt < 50) setTimeout(() => bind(attempt + 1), 100);
+        return;
+    }
+    groups.forEach((group, i) => {
+        const qid = order[i];
+        group.querySelectorAll('input[type="radio"]').forEach((input, option) => {
+            input.addEventListener('change', () => {
+                const box = doc.querySelector('[data-feedback-for="' + qid + '"]');
+                box.textContent = feedback[qid][option];
+                box.hidden = false;
+            });
+        });
+    });
+}
+bind(0);
+</script>
+"""
+
+
+def feedback_script(questions: List[Dict]) -> str:
+    """Script showing each answer's feedback as soon as an option is picked, without a rerun."""
+    table = json.dumps(feedback_table(questions), ensure_ascii=False).replace('</', '<\\/')
+    return FEEDBACK_SCRIPT % (table, json.dumps([q['id'] for q in questions]))
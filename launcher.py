@@ -0,0 +1,206 @@
+"""Multi-worker deployment: K app workers behind a sticky TCP load balancer.
+
+A single ``streamlit run main.py`` serves every session from one core. The
+launcher starts ``--workers`` copies of the app on consecutive local ports
+and listens on ``--port`` itself, forwarding each connection to a worker:
+
+- sticky: the worker is chosen by rendezvous hashing of the client address,
+  so a browser's page load and websocket reach the same worker, and only the
+  clients of a worker that goes away are moved. Behind another proxy, pass
+  ``--trust-proxy`` to hash the first ``X-Forwarded-For`` entry instead;
+  without it the header is ignored, since any client could set it to pick
+  a worker;
+- supervised: a worker that exits is started again, and with ``--max-age``
+  workers are recycled one at a time.
+
+Funnel state lives in the shared session store (``session_store.py``,
+SQLite by default), not in a worker: when a worker dies, the browser
+reconnects through the balancer to another one and the session resumes at
+the same step with the same answers. Telemetry written to JSONL goes to one
+file per worker (``data/events.0.jsonl``, ...).
+
+Load is spread by client address, not by session: every browser behind one
+NAT, corporate proxy or carrier-grade gateway shares an address and lands on
+the same worker, so a few large networks can leave workers unevenly loaded.
+Behind a proxy without ``--trust-proxy``, every client has the proxy's
+address and one worker takes all of them.
+
+Usage:
+    python launcher.py                                     # one worker per CPU on :8501
+    python launcher.py --workers 4 --port 8501 --max-age 3600
+    python launcher.py --address 127.0.0.1 --trust-proxy  # behind nginx or another proxy
+    SESSION_STORE=redis://localhost:6379/0 python launcher.py
+"""
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+from session_store import SESSION_STORE_URL
+from telemetry import TELEMETRY_SINK, worker_sink_url
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 65536
+
+
+class Worker:
+    """One ``streamlit run main.py`` process on a local port."""
+
+    def __init__(self, index: int, port: int):
+        self.index = index
+        self.port = port
+        self.process: Optional[subprocess.Popen] = None
+        self.started_at = 0.0
+        self.restarts = 0
+
+    def start(self):
+        # A JSONL telemetry file per worker: two processes rotating one file would lose events
+        env = dict(os.environ, SESSION_STORE=SESSION_STORE_URL,
+                   TELEMETRY_SINK=worker_sink_url(TELEMETRY_SINK, self.index))
+        if os.environ.get('METRICS_PORT'):
+            # One metrics endpoint per worker
+            env['METRICS_PORT'] = str(int(os.environ['METRICS_PORT']) + self.index)
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'streamlit', 'run', 'main.py', '--server.headless', 'true',
+             '--server.address', '127.0.0.1', '--server.port', str(self.port),
+             '--browser.gatherUsageStats', 'false'],
+            env=env
+        )
+        self.started_at = time.monotonic()
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self, timeout: float = 10):
+        if self.alive():
+            self.process.terminate()
+            try:
+                self.process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+
+def client_key(head: bytes, peer: str, trust_proxy: bool = False) -> str:
+    """Affinity key: the connecting address, or the original client when ``trust_proxy`` is set."""
+    if not trust_proxy:
+        return peer
+    for line in head.split(b'\r\n\r\n', 1)[0].split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        if name.strip().lower() == b'x-forwarded-for':
+            return value.split(b',')[0].strip().decode('latin-1')
+    return peer
+
+
+def rendezvous_order(key: str, workers: List[Worker]) -> List[Worker]:
+    """Workers by preference for ``key``; a key's first choice only changes when that worker is gone."""
+    return sorted(workers, key=lambda worker: hashlib.sha1(f'{key}/{worker.index}'.encode()).digest(), reverse=True)
+
+
+async def pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            data = await reader.read(READ_SIZE)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+class StickyBalancer:
+    """TCP proxy from the public port to the workers."""
+
+    def __init__(self, workers: List[Worker], trust_proxy: bool = False):
+        self.workers = workers
+        self.trust_proxy = trust_proxy
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        head = await reader.read(READ_SIZE)
+        if not head:
+            writer.close()
+            return
+        key = client_key(head, writer.get_extra_info('peername')[0], self.trust_proxy)
+        for worker in rendezvous_order(key, [worker for worker in self.workers if worker.alive()]):
+            try:
+                upstream_reader, upstream_writer = await asyncio.open_connection('127.0.0.1', worker.port)
+                break
+            except OSError:
+                # Still starting, or just died: the next worker in this client's order takes it
+                continue
+        else:
+            writer.write(b'HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+            await writer.drain()
+            writer.close()
+            return
+        upstream_writer.write(head)
+        await asyncio.gather(pipe(reader, upstream_writer), pipe(upstream_reader, writer))
+
+
+async def supervise(workers: List[Worker], max_age: float, interval: float = 1.0):
+    """Restart workers that exited; recycle the oldest one past ``max_age`` (one at a time)."""
+    while True:
+        await asyncio.sleep(interval)
+        for worker in workers:
+            if not worker.alive():
+                logger.warning("Worker %d (porta %d) parou; reiniciando", worker.index, worker.port)
+                worker.restarts += 1
+                worker.start()
+        if max_age and all(worker.alive() for worker in workers):
+            oldest = min(workers, key=lambda worker: worker.started_at)
+            if time.monotonic() - oldest.started_at > max_age:
+                logger.info("Reciclando o worker %d", oldest.index)
+                await asyncio.to_thread(oldest.stop)
+                oldest.start()
+
+
+async def serve(workers: List[Worker], address: str, port: int, max_age: float, trust_proxy: bool = False):
+    balancer = StickyBalancer(workers, trust_proxy)
+    server = await asyncio.start_server(balancer.handle, address, port)
+    logger.info("Balanceador em %s:%d com %d workers", address, port, len(workers))
+    async with server:
+        await asyncio.gather(server.serve_forever(), supervise(workers, max_age))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Vários workers do funil atrás de um balanceador com afinidade.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Número de workers (padrão: um por CPU)")
+    parser.add_argument('--port', type=int, default=8501, help="Porta pública (padrão: 8501)")
+    parser.add_argument('--address', default='0.0.0.0', help="Endereço público (padrão: 0.0.0.0)")
+    parser.add_argument('--base-port', type=int, default=8600,
+                        help="Primeira porta local dos workers (padrão: 8600)")
+    parser.add_argument('--max-age', type=float, default=0,
+                        help="Reciclar workers após este número de segundos (padrão: 0, nunca)")
+    parser.add_argument('--trust-proxy', action='store_true',
+                        help="Usar o X-Forwarded-For para a afinidade (só atrás de um proxy confiável)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    # Stop the workers too when the launcher itself is stopped
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    workers = [Worker(i, args.base_port + i) for i in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    try:
+        asyncio.run(serve(workers, args.address, args.port, args.max_age, args.trust_proxy))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            worker.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
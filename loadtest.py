@@ -0,0 +1,261 @@
+"""Concurrent-session load test for the funnel.
+
+Starts ``streamlit run main.py`` (or targets a running instance with
+``--url``) and simulates N parents going through it at the same time, each
+over its own websocket speaking the same protocol as the browser: intro,
+every question (with a think time before answering and before moving on, and
+an occasional step back to revise an answer), results and testimonials.
+Concurrency ramps through the given levels; for each level the report shows
+completed sessions per second, reruns per second, p50/p95/p99 rerun latency
+per funnel step (from the click to the end of the script run, as the browser
+sees it) and the growth of the server's resident memory per live session.
+
+Usage:
+    python loadtest.py                                   # 1, 5, 10, 20 sessions
+    python loadtest.py --levels 10,50,100 --think 2.0 --back 0.1
+    python loadtest.py --think 0 --output carga.json     # no think time
+    python loadtest.py --url ws://localhost:8501         # an already running server
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+STEPS = ('intro', 'question', 'results', 'testimonials')
+
+
+def percentile_summary(values: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 in milliseconds."""
+    if not values:
+        return {}
+    if len(values) == 1:
+        return {'p50_ms': values[0] * 1000, 'p95_ms': values[0] * 1000, 'p99_ms': values[0] * 1000}
+    cuts = statistics.quantiles(values, n=100, method='inclusive')
+    return {'p50_ms': cuts[49] * 1000, 'p95_ms': cuts[94] * 1000, 'p99_ms': cuts[98] * 1000}
+
+
+class FunnelSession:
+    """One simulated browser tab: sends reruns and tracks the widgets on the page."""
+
+    def __init__(self, websocket, latencies: Dict[str, List[float]]):
+        self.websocket = websocket
+        self.latencies = latencies
+        self.buttons: Dict[str, object] = {}
+        self.radio = None
+        self.radio_value: Optional[str] = None
+        # The page's query string as the app last set it, sent back on every rerun like a browser's URL
+        self.query_string = ''
+
+    @classmethod
+    async def open(cls, url: str, latencies: Dict[str, List[float]]) -> 'FunnelSession':
+        import websockets
+
+        websocket = await websockets.connect(f'{url}/_stcore/stream', subprotocols=['streamlit'],
+                                             max_size=None)
+        return cls(websocket, latencies)
+
+    async def rerun(self, step: str, trigger: Optional[str] = None):
+        """Rerun the script with the current widget values (plus a button click) and wait for it."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        message = BackMsg()
+        message.rerun_script.query_string = self.query_string
+        if self.radio is not None and self.radio_value is not None:
+            state = message.rerun_script.widget_states.widgets.add()
+            state.id = self.radio.id
+            state.string_value = self.radio_value
+        if trigger is not None:
+            state = message.rerun_script.widget_states.widgets.add()
+            state.id = self.buttons[trigger].id
+            state.trigger_value = True
+
+        start = time.perf_counter()
+        await self.websocket.send(message.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(await self.websocket.recv())
+            kind = forward.WhichOneof('type')
+            if kind == 'new_session':
+                # A new script run: the page is rebuilt from scratch
+                self.buttons, self.radio = {}, None
+            elif kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                element = forward.delta.new_element
+                if element.WhichOneof('type') == 'button':
+                    self.buttons[element.button.label] = element.button
+                elif element.WhichOneof('type') == 'radio':
+                    if self.radio is None or self.radio.id != element.radio.id:
+                        self.radio_value = None
+                    self.radio = element.radio
+            elif kind == 'page_info_changed':
+                self.query_string = forward.page_info_changed.query_string
+            elif kind == 'script_finished' and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                break
+        self.latencies[step].append(time.perf_counter() - start)
+
+    async def click(self, label_prefix: str, step: str):
+        label = next(label for label in self.buttons if label.startswith(label_prefix))
+        await self.rerun(step, trigger=label)
+
+    async def answer(self, option: str):
+        self.radio_value = option
+        await self.rerun('question')
+
+    async def close(self):
+        await self.websocket.close()
+
+
+async def simulate_session(url: str, rng: random.Random, latencies: Dict[str, List[float]],
+                           think: float, back: float) -> FunnelSession:
+    """Take one simulated parent from the intro to the testimonials; the connection stays open."""
+    async def pause():
+        if think > 0:
+            # Log-normal think time with median ``think`` seconds
+            await asyncio.sleep(rng.lognormvariate(math.log(think), 0.6))
+
+    session = await FunnelSession.open(url, latencies)
+    await session.rerun('intro')
+    await pause()
+    await session.click('Começar Avaliação', 'question')
+
+    question = 1
+    while session.radio is not None:
+        await pause()
+        await session.answer(rng.choice(session.radio.options))
+        await pause()
+        if question > 1 and rng.random() < back:
+            await session.click('← Voltar', 'question')
+            question -= 1
+            continue
+        if 'Ver Resultados →' in session.buttons:
+            await session.click('Ver Resultados', 'results')
+            break
+        await session.click('Próximo', 'question')
+        question += 1
+
+    await pause()
+    await session.click('Ver Depoimentos', 'testimonials')
+    return session
+
+
+def server_memory(pid: Optional[int]) -> Optional[int]:
+    """Resident memory of the server process, in bytes (Linux only)."""
+    if pid is None:
+        return None
+    try:
+        with open(f'/proc/{pid}/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+async def run_level(url: str, pid: Optional[int], concurrency: int, think: float, back: float,
+                    seed: int) -> Dict:
+    """Run ``concurrency`` sessions at once and summarize them."""
+    latencies: Dict[str, List[float]] = {step: [] for step in STEPS}
+    memory_before = server_memory(pid)
+    start = time.perf_counter()
+    sessions = await asyncio.gather(*[
+        simulate_session(url, random.Random(seed + i), latencies, think, back) for i in range(concurrency)
+    ])
+    elapsed = time.perf_counter() - start
+    # Measured while every session is still connected, so their state is still held by the server
+    memory_after = server_memory(pid)
+    for session in sessions:
+        await session.close()
+
+    return {
+        'concurrency': concurrency,
+        'elapsed_s': elapsed,
+        'sessions_per_s': concurrency / elapsed,
+        'reruns_per_s': sum(len(values) for values in latencies.values()) / elapsed,
+        'memory_per_session_kb': ((memory_after - memory_before) / concurrency / 1024
+                                  if memory_before is not None and memory_after is not None else None),
+        'steps': {step: dict(percentile_summary(values), reruns=len(values)) for step, values in latencies.items()}
+    }
+
+
+def print_level(result: Dict):
+    memory = result['memory_per_session_kb']
+    print(f"\n{result['concurrency']} sessões simultâneas: {result['elapsed_s']:.1f} s, "
+          f"{result['sessions_per_s']:.2f} sessões/s, {result['reruns_per_s']:.1f} reruns/s"
+          + (f", {memory:.0f} KiB/sessão" if memory is not None else ''))
+    print(f"  {'etapa':14s} {'reruns':>7s} {'p50 (ms)':>10s} {'p95 (ms)':>10s} {'p99 (ms)':>10s}")
+    for step, summary in result['steps'].items():
+        if summary['reruns']:
+            print(f"  {step:14s} {summary['reruns']:7d} {summary['p50_ms']:10.1f} "
+                  f"{summary['p95_ms']:10.1f} {summary['p99_ms']:10.1f}")
+
+
+def start_server(port: int) -> subprocess.Popen:
+    """Start ``streamlit run main.py`` headless on ``port`` and wait until it is healthy."""
+    env = dict(os.environ)
+    # Keep simulated sessions out of the real assessment database
+    env.setdefault('ASSESSMENT_DB', os.path.join(tempfile.mkdtemp(), 'loadtest.db'))
+    env.setdefault('SESSION_STORE', 'memory')
+    env.setdefault('TELEMETRY_SINK', 'off')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', 'main.py', '--server.headless', 'true',
+         '--server.port', str(port), '--server.fileWatcherType', 'none',
+         '--browser.gatherUsageStats', 'false'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(300):
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health')
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("O servidor Streamlit não respondeu")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga com sessões simultâneas no funil.")
+    parser.add_argument('--levels', default='1,5,10,20',
+                        help="Níveis de concorrência, separados por vírgula (padrão: 1,5,10,20)")
+    parser.add_argument('--think', type=float, default=0.5,
+                        help="Mediana do tempo de reflexão por ação, em segundos (padrão: 0.5; 0 desativa)")
+    parser.add_argument('--back', type=float, default=0.1,
+                        help="Probabilidade de voltar à pergunta anterior (padrão: 0.1)")
+    parser.add_argument('--url', help="Servidor já em execução (ex.: ws://localhost:8501); "
+                                      "por padrão inicia um local")
+    parser.add_argument('--port', type=int, default=8599, help="Porta do servidor local (padrão: 8599)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Salvar os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    server = None if args.url else start_server(args.port)
+    url = args.url or f'ws://127.0.0.1:{args.port}'
+    pid = server.pid if server else None
+    try:
+        # Warm imports and caches so the first level is not charged for them
+        asyncio.run(run_level(url, None, 1, 0, 0, args.seed))
+
+        results = []
+        for concurrency in (int(level) for level in args.levels.split(',')):
+            result = asyncio.run(run_level(url, pid, concurrency, args.think, args.back, args.seed))
+            print_level(result)
+            results.append(result)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump({'think_s': args.think, 'back': args.back, 'levels': results}, file, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,21 @@
+import re
+import uuid
+from typing import Optional
+
 import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-from utils import load_json_data, calculate_score, get_feedback, get_recommendation, get_category_description, get_category_recommendations
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from assets import inline_stylesheet, stylesheet_url
+from content_registry import get_registry
+from form_mode import DEFAULT_MODE, MODES, feedback_script, page_for_step, page_groups
+from metrics import get_metrics, step_label
+from progress import decode_token, encode_token, new_answers
+from report import (GLOBAL_SEVERITY_TEMPLATE, PLATFORM_PROMOTION, RECOMMENDATION_BLOCK_TEMPLATE, SEVERITY_COLORS,
+                    render_category_card, render_social_proof, render_testimonial)
+from session_lifecycle import get_lifecycle
+from session_store import SESSION_TTL, get_session_store, session_key
+from store import UNANSWERED_BYTE, AssessmentStore, unpack_answers
+from telemetry import get_telemetry
+from utils import get_recommendation, get_severity_level
 
 # Page configuration
 st.set_page_config(
@@ -11,38 +24,109 @@ st.set_page_config(
     layout="centered"
 )
 
-# Cache data loading
-@st.cache_data
-def get_cached_data():
-    return {
-        'questions': load_json_data('data/questions.json')['questions'],
-        'content': load_json_data('data/content.json')
-    }
+@st.cache_resource
+def get_store():
+    return AssessmentStore()
 
-# Load cached data
-cached_data = get_cached_data()
-questions = cached_data['questions']
-content = cached_data['content']
+def touch_session():
+    """Mark this session active, first restoring the funnel state evicted while the tab sat idle."""
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        get_lifecycle().touch(ctx.session_id, ctx.session_state)
 
-# Load custom CSS
-with open('styles.css') as f:
-    st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+touch_session()
 
 # Initialize session state with improved validation
 if 'step' not in st.session_state:
     st.session_state.step = 0
-if 'responses' not in st.session_state:
-    st.session_state.responses = {}
 if 'validation_message' not in st.session_state:
     st.session_state.validation_message = None
-if 'transition_state' not in st.session_state:
-    st.session_state.transition_state = 'ready'
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if 'recorded_answers' not in st.session_state:
+    st.session_state.recorded_answers = None
+if 'mode' not in st.session_state:
+    # One question per page, or batched form pages (see form_mode)
+    mode = st.query_params.get('modo', DEFAULT_MODE)
+    st.session_state.mode = mode if mode in MODES else 'step'
+
+# Sampled timing of this rerun's stages, tagged with the funnel step once it is known
+metrics = get_metrics()
+metrics.begin_rerun(st.session_state.session_id)
+
+# Load custom CSS: a cacheable link once `python assets.py build` has run, else inline
+with metrics.span('css_injection'):
+    stylesheet = stylesheet_url()
+    if stylesheet and st.get_option('server.enableStaticServing'):
+        st.markdown(f'<link rel="stylesheet" href="{stylesheet}">', unsafe_allow_html=True)
+    else:
+        st.markdown(f'<style>{inline_stylesheet()}</style>', unsafe_allow_html=True)
+
+# Content comes from the hot-reloaded registry. A session is pinned to the
+# version it started with; it only moves to a newer one before the first question.
+with metrics.span('data_loading'):
+    registry = get_registry()
+    if 'answers' not in st.session_state:
+        # Answers are one option index per question; a new session may resume from the
+        # shared session store (e.g. after its worker died) or from the URL token
+        current = registry.current()
+        st.session_state.answers = new_answers(current.questions)
+        token = st.query_params.get('p')
+        if re.fullmatch('[0-9a-f]{32}', st.query_params.get('sid', '')):
+            st.session_state.session_id = st.query_params['sid']
+            saved = get_session_store().get(session_key(st.session_state.session_id))
+            token = saved.decode('ascii') if saved else token
+        if token:
+            try:
+                # Adaptive sessions skip questions, so their steps are checked against the replayed order
+                adaptive = st.session_state.mode == 'adaptive'
+                step, answers = decode_token(token, current.questions, current.questions_version,
+                                             check_steps=not adaptive)
+                if adaptive and not current.adaptive.valid_step(step, answers):
+                    raise ValueError("Token de progresso inválido")
+                st.session_state.step, st.session_state.answers = step, answers
+            except ValueError:
+                st.query_params.pop('p', None)
+    if 'content_version' not in st.session_state or st.session_state.step == 0:
+        st.session_state.content_version = registry.current().version
+    snapshot = registry.get(st.session_state.content_version)
+    if snapshot is None:
+        # The pinned version was evicted: switch to the current one, keeping the answers that still fit
+        snapshot = registry.current()
+        st.session_state.content_version = snapshot.version
+        answers = new_answers(snapshot.questions)
+        for position, (question, index) in enumerate(zip(snapshot.questions, st.session_state.answers)):
+            if index < len(question['options']):
+                answers[position] = index
+        st.session_state.answers = answers
+        st.session_state.pop('totals', None)
+    if 'totals' not in st.session_state:
+        # Running score totals, kept in step with the answers by O(1) deltas from here on
+        st.session_state.totals = snapshot.score_table.totals(st.session_state.answers)
+    questions = snapshot.questions
+    content = snapshot.content
+    content_version = snapshot.version
+    metrics.set_step(step_label(st.session_state.step, len(questions)))
+
+def sync_progress_token():
+    """Mirror the step and answers into the URL and the session store so the session can be resumed."""
+    token = encode_token(questions, snapshot.questions_version, st.session_state.step, st.session_state.answers)
+    if st.query_params.get('p') != token:
+        st.query_params['p'] = token
+        st.query_params['sid'] = st.session_state.session_id
+        get_session_store().set(session_key(st.session_state.session_id), token.encode('ascii'), ex=SESSION_TTL)
+        get_store().record_step(st.session_state.session_id, st.session_state.step)
+
+def current_position() -> int:
+    """Position of the question shown at the current step."""
+    if st.session_state.mode == 'adaptive':
+        return snapshot.adaptive.sequence(st.session_state.answers)[0][st.session_state.step - 1]
+    return st.session_state.step - 1
 
 def validate_current_step():
     """Enhanced validation with specific feedback."""
     if 1 <= st.session_state.step <= len(questions):
-        current_question = questions[st.session_state.step - 1]
-        is_valid = current_question['id'] in st.session_state.responses
+        is_valid = st.session_state.answers[current_position()] != UNANSWERED_BYTE
         if not is_valid:
             st.session_state.validation_message = "Por favor, selecione uma resposta antes de continuar."
         else:
@@ -50,140 +134,107 @@ def validate_current_step():
         return is_valid
     return True
 
+def emit_event(event: str, detail: Optional[str] = None):
+    """Queue a funnel event at the current step; the telemetry flusher writes it off the rerun."""
+    get_telemetry().emit(event, st.session_state.session_id, st.session_state.step, detail)
+
 def update_step(new_step):
     """Smooth step transition with validation."""
     if validate_current_step() and 0 <= new_step <= len(questions) + 2:
-        st.session_state.transition_state = 'transitioning'
         st.session_state.step = new_step
         st.session_state.validation_message = None
+        emit_event('step_entered')
         st.rerun()
 
 def next_step():
     """Enhanced navigation to next step."""
     if validate_current_step():
-        update_step(st.session_state.step + 1)
+        new_step = st.session_state.step + 1
+        if st.session_state.mode == 'adaptive' and 1 <= st.session_state.step <= len(questions):
+            path, finished = snapshot.adaptive.sequence(st.session_state.answers)
+            if finished and st.session_state.step >= len(path):
+                # Every band is decided: the remaining questions are skipped
+                new_step = len(questions) + 1
+        update_step(new_step)
 
 def prev_step():
     """Enhanced navigation to previous step."""
-    if st.session_state.step > 0:
+    emit_event('back_pressed')
+    if st.session_state.mode == 'adaptive' and st.session_state.step == len(questions) + 1:
+        update_step(len(snapshot.adaptive.sequence(st.session_state.answers)[0]))
+    elif st.session_state.step > 0:
         update_step(st.session_state.step - 1)
 
-def handle_response(question_id: int, response: str):
+def handle_response(position: int, response: str):
     """Enhanced response handling with validation."""
-    if response and (question_id not in st.session_state.responses or 
-                    st.session_state.responses[question_id] != response):
-        st.session_state.responses[question_id] = response
+    index = questions[position]['options'].index(response)
+    if st.session_state.answers[position] != index:
+        snapshot.score_table.apply(st.session_state.totals, position, st.session_state.answers[position], index)
+        st.session_state.answers[position] = index
         st.session_state.validation_message = None
+        emit_event('answer_selected', f"{questions[position]['id']}:{index}")
+        sync_progress_token()
 
-def create_radar_chart(scores):
-    """Enhanced radar chart with clinical thresholds."""
-    categories = list(scores.keys())
-    values = list(scores.values())
-    
-    fig = go.Figure()
-    
-    # Add clinical thresholds
-    fig.add_trace(go.Scatterpolar(
-        r=[70] * len(categories),
-        theta=categories,
-        fill=None,
-        name='Limiar Clínico',
-        line=dict(color='rgba(255,0,0,0.5)', dash='dash')
-    ))
-    
-    # Add moderate threshold
-    fig.add_trace(go.Scatterpolar(
-        r=[40] * len(categories),
-        theta=categories,
-        fill=None,
-        name='Limiar Moderado',
-        line=dict(color='rgba(255,165,0,0.5)', dash='dash')
-    ))
-    
-    # Add scores
-    fig.add_trace(go.Scatterpolar(
-        r=values,
-        theta=categories,
-        fill='toself',
-        name='Perfil TDAH',
-        line_color='#1B365D',
-        fillcolor='rgba(27,54,93,0.3)',
-        hovertemplate='%{theta}: %{r:.1f}%<br>Severidade: %{customdata}<extra></extra>',
-        customdata=[get_severity_level(v) for v in values]
-    ))
-
-    fig.update_layout(
-        polar=dict(
-            radialaxis=dict(
-                visible=True,
-                range=[0, 100],
-                tickvals=[0, 20, 40, 60, 70, 80, 100],
-                ticktext=['0%', '20%', '40%', '60%', '70%', '80%', '100%']
-            )
-        ),
-        showlegend=True,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        ),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        height=400,
-        margin=dict(t=30, b=30)
-    )
-    return fig
-
-def create_bar_chart(scores):
-    """Enhanced bar chart with clinical context."""
-    df = pd.DataFrame({
-        'Categoria': list(scores.keys()),
-        'Pontuação': list(scores.values()),
-        'Severidade': [get_severity_level(score) for score in scores.values()]
-    })
-    
-    fig = px.bar(df, x='Categoria', y='Pontuação',
-                 color='Pontuação',
-                 color_continuous_scale=[
-                     [0, '#4CAF50'],    # Verde para baixo
-                     [0.4, '#FFA500'],  # Laranja para moderado
-                     [0.7, '#FF6B6B'],  # Vermelho para alto
-                     [1, '#FF0000']     # Vermelho escuro para muito alto
-                 ],
-                 range_y=[0, 100])
-    
-    # Add threshold lines
-    fig.add_hline(y=70, line_dash="dash", line_color="red", 
-                 annotation_text="Limiar Clínico (70%)")
-    fig.add_hline(y=40, line_dash="dash", line_color="orange",
-                 annotation_text="Limiar Moderado (40%)")
-    
-    fig.update_traces(
-        hovertemplate='<b>%{x}</b><br>' +
-                      'Pontuação: %{y:.1f}%<br>' +
-                      'Severidade: %{customdata}<extra></extra>',
-        customdata=df['Severidade']
-    )
-    
-    fig.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        height=300,
-        margin=dict(t=30, b=30)
-    )
-    return fig
-
-def get_severity_level(score):
-    """Get clinical severity level."""
-    if score >= 80:
-        return "Muito Alto"
-    elif score >= 70:
-        return "Alto"
-    elif score >= 40:
-        return "Moderado"
-    return "Baixo"
+def submit_page(groups, page: int, direction: int):
+    """Store a submitted form page's answers and move to the neighbouring page."""
+    # Callbacks run before the script body, so the state may still be on disk
+    touch_session()
+    group = groups[page]
+    for position in group:
+        response = st.session_state.get(f"q_{questions[position]['id']}")
+        if response is not None:
+            index = questions[position]['options'].index(response)
+            if st.session_state.answers[position] != index:
+                emit_event('answer_selected', f"{questions[position]['id']}:{index}")
+            snapshot.score_table.apply(st.session_state.totals, position, st.session_state.answers[position], index)
+            st.session_state.answers[position] = index
+    if direction < 0:
+        emit_event('back_pressed')
+    if direction > 0 and any(st.session_state.answers[position] == UNANSWERED_BYTE for position in group):
+        st.session_state.validation_message = "Por favor, responda todas as perguntas antes de continuar."
+        return
+    st.session_state.validation_message = None
+    target = page + direction
+    st.session_state.step = groups[target][0] + 1 if target < len(groups) else len(questions) + 1
+    emit_event('step_entered')
+
+def render_partial_profile():
+    """Live profile over the questions answered so far, read from the running totals."""
+    partial = snapshot.score_table.partial_scores(st.session_state.totals)
+    if partial:
+        items = ' · '.join(
+            f"{category.title()}: <span style='color: {SEVERITY_COLORS[get_severity_level(score)]};'>{score:.0f}%</span>"
+            for category, score in partial.items()
+        )
+        st.markdown(f"<p style='text-align: center; font-size: 14px; margin: 0.5rem 0;'>Perfil parcial: {items}</p>", unsafe_allow_html=True)
+
+def report_downloads(scores, percentiles, polling: bool):
+    """Report export buttons; a download button replaces each one once its file is ready."""
+    from report_export import FORMATS, MIME_TYPES, get_report_exporter
+
+    exporter = get_report_exporter()
+    handles = {fmt: exporter.handle(fmt, scores, percentiles) for fmt in FORMATS}
+    for column, (fmt, handle) in zip(st.columns(len(handles)), handles.items()):
+        with column:
+            status = exporter.status(handle)
+            if status == 'ready':
+                with open(exporter.path(handle), 'rb') as file:
+                    st.download_button(f"Baixar Relatório ({fmt.upper()})", file.read(), file_name=f"relatorio-tdah.{fmt}",
+                                       mime=MIME_TYPES[fmt], use_container_width=True)
+            elif status == 'pending':
+                st.button(f"Gerando {fmt.upper()}...", disabled=True, use_container_width=True, key=f"report_{fmt}")
+            else:
+                if status == 'failed':
+                    st.error(f"Não foi possível gerar o relatório: {exporter.error(handle)}")
+                if st.button(f"Gerar Relatório ({fmt.upper()})", use_container_width=True, key=f"report_{fmt}"):
+                    exporter.submit(fmt, scores, percentiles)
+                    st.rerun()
+    # Start polling after a submit, stop once nothing is pending
+    if any(exporter.status(handle) == 'pending' for handle in handles.values()) != polling:
+        st.rerun()
+
+if st.session_state.step > 0:
+    sync_progress_token()
 
 # Pre-calculate progress
 total_steps = len(questions) + 3  # +3 for intro, results, and CTA
@@ -203,30 +254,80 @@ if st.session_state.step == 0:
         next_step()
     st.markdown('</div>', unsafe_allow_html=True)
 
+elif 1 <= st.session_state.step <= len(questions) and st.session_state.mode in ('category', 'all'):
+    # Batched form page: answering stays in the browser until the page is submitted
+    groups = page_groups(questions, st.session_state.mode)
+    page = page_for_step(groups, st.session_state.step)
+    page_questions = [questions[position] for position in groups[page]]
+
+    with st.form(f"pagina_{page}"):
+        st.markdown('<div class="content-container">', unsafe_allow_html=True)
+        st.progress(progress)
+        st.markdown(f"<h2 style='text-align: center; font-size: 20px;'>Parte {page + 1} de {len(groups)}</h2>", unsafe_allow_html=True)
+        render_partial_profile()
+
+        for position, question in zip(groups[page], page_questions):
+            st.markdown(f"<p style='margin: 1rem 0 0.25rem 0;'><strong>{position + 1}.</strong> {question['text']}</p>", unsafe_allow_html=True)
+            current_index = st.session_state.answers[position]
+            st.radio(
+                "Selecione uma opção",
+                options=question['options'],
+                key=f"q_{question['id']}",
+                index=None if current_index == UNANSWERED_BYTE else current_index,
+                label_visibility="collapsed"
+            )
+            # Filled in by the browser when an option is picked (form_mode.feedback_script)
+            feedback = '' if current_index == UNANSWERED_BYTE else snapshot.feedback(question, current_index)
+            hidden = '' if feedback else ' hidden'
+            st.markdown(f'<div class="feedback-box" data-feedback-for="{question["id"]}"{hidden}>{feedback}</div>', unsafe_allow_html=True)
+
+        if st.session_state.validation_message:
+            st.warning(st.session_state.validation_message)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.form_submit_button("← Voltar", use_container_width=True, disabled=page == 0,
+                                  on_click=submit_page, args=(groups, page, -1))
+        with col2:
+            next_button_label = "Próximo →" if page < len(groups) - 1 else "Ver Resultados →"
+            st.form_submit_button(next_button_label, use_container_width=True,
+                                  on_click=submit_page, args=(groups, page, 1))
+
+    if hasattr(st, 'iframe'):
+        st.iframe(feedback_script(page_questions), height=1)
+    else:
+        import streamlit.components.v1 as components
+        components.html(feedback_script(page_questions), height=1)
+
 elif 1 <= st.session_state.step <= len(questions):
-    question = questions[st.session_state.step - 1]
+    position = current_position()
+    question = questions[position]
+    adaptive = st.session_state.mode == 'adaptive'
     
     with st.container():
         st.markdown('<div class="content-container">', unsafe_allow_html=True)
         st.progress(progress)
-        st.markdown(f"<h2 style='text-align: center; font-size: 20px;'>Pergunta {st.session_state.step} de {len(questions)}</h2>", unsafe_allow_html=True)
+        question_count = f"até {len(questions)}" if adaptive else len(questions)
+        st.markdown(f"<h2 style='text-align: center; font-size: 20px;'>Pergunta {st.session_state.step} de {question_count}</h2>", unsafe_allow_html=True)
         st.markdown(f"<p style='text-align: center; margin: 1rem 0;'>{question['text']}</p>", unsafe_allow_html=True)
         
-        current_value = st.session_state.responses.get(question['id'], None)
+        current_index = st.session_state.answers[position]
         response = st.radio(
             "Selecione uma opção",
             options=question['options'],
             key=f"q_{question['id']}",
-            index=None if current_value is None else question['options'].index(current_value),
+            index=None if current_index == UNANSWERED_BYTE else current_index,
             label_visibility="collapsed"
         )
         
         if response is not None:
-            handle_response(question['id'], response)
+            handle_response(position, response)
         
-        if question['id'] in st.session_state.responses:
-            feedback = get_feedback(question, st.session_state.responses[question['id']])
+        if st.session_state.answers[position] != UNANSWERED_BYTE:
+            feedback = snapshot.feedback(question, st.session_state.answers[position])
             st.markdown(f'<div class="feedback-box">{feedback}</div>', unsafe_allow_html=True)
+        render_partial_profile()
             
         if st.session_state.validation_message:
             st.warning(st.session_state.validation_message)
@@ -239,13 +340,38 @@ elif 1 <= st.session_state.step <= len(questions):
         if st.button("← Voltar", use_container_width=True, disabled=st.session_state.step == 1):
             prev_step()
     with col2:
-        next_button_label = "Próximo →" if st.session_state.step < len(questions) else "Ver Resultados →"
+        if adaptive:
+            path, finished = snapshot.adaptive.sequence(st.session_state.answers)
+            last_question = finished and st.session_state.step >= len(path)
+        else:
+            last_question = st.session_state.step == len(questions)
+        next_button_label = "Ver Resultados →" if last_question else "Próximo →"
         if st.button(next_button_label, use_container_width=True, disabled=not validate_current_step()):
             next_step()
     st.markdown('</div>', unsafe_allow_html=True)
 
 elif st.session_state.step == len(questions) + 1:
-    scores = calculate_score(st.session_state.responses)
+    # Deferred so the intro and question steps never pay for charting and NumPy
+    from charts import CHART_BACKEND, bar_spec, create_bar_chart, create_radar_chart, radar_svg
+    from percentiles import get_norm_tables
+    from report_export import FORMATS as REPORT_FORMATS
+    from report_export import get_report_exporter
+
+    indices = unpack_answers(st.session_state.answers)
+    with metrics.span('calculate_score'):
+        if st.session_state.mode == 'adaptive':
+            # Skipped questions have no answer: estimated scores, within the exact bands
+            scores = snapshot.adaptive.estimate(st.session_state.answers)
+        else:
+            # Already summed answer by answer; no scoring pass over the whole bank
+            scores = snapshot.score_table.scores(st.session_state.totals)
+
+    # Persist once per distinct answer set; the write happens on the store's background thread
+    answers = bytes(st.session_state.answers)
+    if st.session_state.recorded_answers != answers:
+        emit_event('results_viewed')
+        if get_store().record_assessment(st.session_state.session_id, snapshot.questions_version, indices, scores):
+            st.session_state.recorded_answers = answers
     
     with st.container():
         st.markdown('<div class="content-container">', unsafe_allow_html=True)
@@ -255,150 +381,53 @@ elif st.session_state.step == len(questions) + 1:
         # Clinical Overview with Severity Indicators
         avg_score = sum(scores.values()) / len(scores)
         severity_level = get_severity_level(avg_score)
-        severity_color = "#FF0000" if avg_score >= 80 else "#FF6B6B" if avg_score >= 70 else "#FFA500" if avg_score >= 40 else "#4CAF50"
+        severity_color = SEVERITY_COLORS[severity_level]
         
-        st.markdown(f"""
-        <div style="text-align: center; margin: 1rem 0;">
-            <h2 style="font-size: 20px;">Nível de Severidade Global</h2>
-            <div style="background-color: {severity_color}; color: white; padding: 1rem; border-radius: 8px; display: inline-block;">
-                <span style="font-size: 24px; font-weight: bold;">{severity_level}</span>
-                <br>
-                <span>Score Global: {avg_score:.1f}%</span>
-            </div>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(GLOBAL_SEVERITY_TEMPLATE.format(color=severity_color, severity=severity_level, avg_score=avg_score), unsafe_allow_html=True)
         
         # Enhanced Visualization Section
         st.markdown("<h2 style='text-align: center; font-size: 20px;'>Análise Comparativa</h2>", unsafe_allow_html=True)
         
-        # Radar Chart with clinical thresholds
-        radar_fig = create_radar_chart(scores)
-        st.plotly_chart(radar_fig, use_container_width=True)
-        
-        # Bar Chart with severity levels
-        bar_fig = create_bar_chart(scores)
-        st.plotly_chart(bar_fig, use_container_width=True)
+        with metrics.span('chart_construction'):
+            if CHART_BACKEND == 'vega':
+                st.markdown(radar_svg(scores), unsafe_allow_html=True)
+                st.vega_lite_chart(bar_spec(scores), use_container_width=True)
+            else:
+                # Radar Chart with clinical thresholds
+                radar_fig = create_radar_chart(scores)
+                st.plotly_chart(radar_fig, use_container_width=True)
+
+                # Bar Chart with severity levels
+                bar_fig = create_bar_chart(scores)
+                st.plotly_chart(bar_fig, use_container_width=True)
         
         # Clinical Insights
         st.markdown("<h2 style='text-align: center; font-size: 20px;'>Análise Clínica Detalhada</h2>", unsafe_allow_html=True)
         
-        # Add percentile information
-        percentiles = {
-            'concentracao': min(round(scores['concentracao'] / 0.8), 99),
-            'impulsividade': min(round(scores['impulsividade'] / 0.8), 99),
-            'hiperatividade': min(round(scores['hiperatividade'] / 0.8), 99)
-        }
+        # Add percentile information from the reference norms, when they have been built
+        norm_tables = get_norm_tables()
+        percentiles = norm_tables.lookup(scores) if norm_tables else None
         
-        for category, score in scores.items():
-            severity = get_severity_level(score)
-            color = "#FF0000" if score >= 80 else "#FF6B6B" if score >= 70 else "#FFA500" if score >= 40 else "#4CAF50"
-            
-            st.markdown(f"""
-            <div style="padding: 1.5rem; border-radius: 8px; background-color: #FFFFFF; margin: 1rem 0; border-left: 4px solid {color}">
-                <h4 style="margin: 0 0 1rem 0;">{category.title()}</h4>
-                <div style="display: flex; justify-content: space-between; margin-bottom: 1rem;">
-                    <div>
-                        <strong>Nível de Severidade:</strong> {severity} ({score:.1f}%)
-                        <br>
-                        <strong>Percentil:</strong> {percentiles[category]}
-                    </div>
-                    <div style="text-align: right;">
-                        <span style="background-color: {color}; color: white; padding: 0.25rem 0.5rem; border-radius: 4px;">
-                            {severity}
-                        </span>
-                    </div>
-                </div>
-                <div style="margin: 1rem 0;">
-                    <strong>Padrões Comportamentais:</strong>
-                    <p style="margin: 0.5rem 0;">{get_category_description(category, severity)}</p>
-                </div>
-                <div style="margin-top: 1rem;">
-                    <strong>Recomendações da Ativa-Mente:</strong>
-                    <ul style="margin: 0.5rem 0; padding-left: 1.5rem;">
-                        {get_category_recommendations(category, severity)}
-                    </ul>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-
-        # Social Proof Section
-        st.markdown("""
-            <div style="background-color: #f8f9fa; padding: 2rem; border-radius: 8px; margin: 2rem 0;">
-                <h2 style="text-align: center; color: #1B365D; margin-bottom: 1.5rem;">Reconhecido por Especialistas</h2>
-                
-                <!-- Partner Institutions Grid -->
-                <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem; margin-bottom: 2rem;">
-                    {partner_logos_html}
-                </div>
-
-                <!-- Institutional Testimonials -->
-                <div style="margin-top: 2rem;">
-                    <h3 style="text-align: center; color: #1B365D; margin-bottom: 1.5rem;">O que dizem os especialistas</h3>
-                    <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 1.5rem;">
-                        {institutional_testimonials_html}
-                    </div>
-                </div>
-            </div>
-        """.format(
-            partner_logos_html=''.join([
-                f"""
-                <div style="background: white; padding: 1rem; border-radius: 8px; text-align: center; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                    <div style="font-size: 2rem; margin-bottom: 0.5rem;">{partner['logo']}</div>
-                    <h4 style="margin: 0.5rem 0; color: #1B365D;">{partner['name']}</h4>
-                    <p style="margin: 0; color: #666; font-size: 0.9em;">{partner['description']}</p>
-                </div>
-                """ for partner in content['partner_institutions']
-            ]),
-            institutional_testimonials_html=''.join([
-                f"""
-                <div style="background: white; padding: 1.5rem; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
-                    <p style="font-style: italic; margin-bottom: 1rem;">"{testimonial['text']}"</p>
-                    <div>
-                        <strong style="color: #1B365D;">{testimonial['author']}</strong>
-                        <br>
-                        <small style="color: #666;">{testimonial['role']}</small>
-                        <br>
-                        <small style="color: #666;">{testimonial['institution']}</small>
-                    </div>
-                </div>
-                """ for testimonial in content['institutional_testimonials']
-            ])
-        ), unsafe_allow_html=True)
+        with metrics.span('html_rendering'):
+            for category, score in scores.items():
+                severity = get_severity_level(score)
+                percentile = percentiles[category] if percentiles else None
+                st.markdown(render_category_card(category, severity, score, percentile, content_version), unsafe_allow_html=True)
+
+            # Social Proof Section
+            st.markdown(render_social_proof(content, content_version), unsafe_allow_html=True)
 
         # Platform Promotion
-        st.markdown('''
-            <div style="background-color: #1B365D; color: white; padding: 2rem; border-radius: 8px; text-align: center; margin: 2rem 0;">
-                <h2 style="color: white;">Conheça a Ativa-Mente</h2>
-                <p style="font-size: 1.1em; margin: 1rem 0;">
-                    Plataforma completa de treinamento cognitivo com:
-                    <br>• 6+ Jogos Interativos (Memória, Padrões, Foco e mais)
-                    <br>• Sistema de Progresso com Níveis
-                    <br>• Dicas Diárias Personalizadas
-                    <br>• Acompanhamento de Evolução
-                    <br>• Histórias de Sucesso Inspiradoras
-                </p>
-                <div style="background-color: #FFA500; padding: 1.5rem; border-radius: 8px; margin-top: 1.5rem;">
-                    <h3 style="color: #1B365D; margin: 0; font-size: 1.5em;">Oferta Especial</h3>
-                    <p style="margin: 0.5rem 0; font-size: 1.2em;">
-                        <strong>R$ 37,00</strong> - Acesso Vitalício
-                        <br>
-                        <span style="font-size: 0.9em;">Inclui todos os jogos e atualizações futuras</span>
-                    </p>
-                    <button style="background-color: #1B365D; color: white; border: none; padding: 0.75rem 2rem; border-radius: 25px; margin-top: 1rem; font-weight: bold; cursor: pointer;">
-                        Começar Agora
-                    </button>
-                </div>
-            </div>
-        ''', unsafe_allow_html=True)
+        st.markdown(PLATFORM_PROMOTION, unsafe_allow_html=True)
         
         # Clinical Recommendation
         recommendation = get_recommendation(scores)
-        st.markdown("""
-        <div style="background-color: #f8f9fa; padding: 1.5rem; border-radius: 8px; margin: 1.5rem 0;">
-            <h3 style="margin: 0 0 1rem 0;">Recomendação Clínica</h3>
-            <p style="margin: 0;">{}</p>
-        </div>
-        """.format(recommendation), unsafe_allow_html=True)
+        st.markdown(RECOMMENDATION_BLOCK_TEMPLATE.format(recommendation=recommendation), unsafe_allow_html=True)
+
+        # Downloadable copy, built in worker processes; while one is pending only this fragment reruns, every second
+        exporter = get_report_exporter()
+        polling = any(exporter.status(exporter.handle(fmt, scores, percentiles)) == 'pending' for fmt in REPORT_FORMATS)
+        st.fragment(report_downloads, run_every=1.0 if polling else None)(scores, percentiles, polling)
         
         st.markdown('</div>', unsafe_allow_html=True)
     
@@ -419,13 +448,7 @@ elif st.session_state.step == len(questions) + 2:
         st.markdown("<h1 style='text-align: center; font-size: 24px;'>Depoimentos de Pais</h1>", unsafe_allow_html=True)
         
         for testimonial in content['testimonials']:
-            st.markdown(f"""
-            <div class="testimonial">
-                <p style="margin: 1rem 0;">"{testimonial['text']}"</p>
-                <p style="margin: 0.5rem 0;"><strong>{testimonial['name']}</strong></p>
-                <p style="margin: 0;">{'⭐' * testimonial['rating']}</p>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(render_testimonial(testimonial), unsafe_allow_html=True)
         
         st.markdown("<h2 style='text-align: center; font-size: 20px;'>Comece sua jornada com a Ativa-Mente</h2>", unsafe_allow_html=True)
         st.markdown('</div>', unsafe_allow_html=True)
@@ -437,8 +460,12 @@ elif st.session_state.step == len(questions) + 2:
             prev_step()
     with col2:
         if st.button("Experimente Gratuitamente →", use_container_width=True):
+            get_store().record_lead(st.session_state.session_id, 'experimente_gratuitamente')
+            emit_event('cta_clicked', 'experimente_gratuitamente')
             st.success("Obrigado por seu interesse! Em breve você receberá um e-mail com as instruções de acesso.")
     st.markdown('</div>', unsafe_allow_html=True)
 
 # Footer
-st.markdown("<p style='text-align: center; padding: 2rem 0;'>Desenvolvido com ❤️ pela Ativa-Mente | Este questionário não substitui uma avaliação profissional</p>", unsafe_allow_html=True)
\ No newline at end of file
+st.markdown("<p style='text-align: center; padding: 2rem 0;'>Desenvolvido com ❤️ pela Ativa-Mente | Este questionário não substitui uma avaliação profissional</p>", unsafe_allow_html=True)
+
+metrics.end_rerun()
\ No newline at end of file
@@ -0,0 +1,256 @@
+"""Low-overhead timing of funnel reruns, exported in Prometheus text format.
+
+Each rerun of ``main.py`` is tagged with its funnel step (``intro``,
+``question_N``, ``results``, ``testimonials``) and split into stages (data
+loading, CSS injection, scoring, chart construction, HTML rendering), each
+timed into a fixed-bucket latency histogram. Whole reruns are sampled: with
+``METRICS_SAMPLE_RATE=0.1`` only one rerun in ten is timed, and an
+unsampled span costs one attribute lookup.
+
+Configuration (environment variables):
+
+- ``METRICS_SAMPLE_RATE``: fraction of reruns timed (default ``1.0``).
+- ``METRICS_PORT``: serve ``/metrics`` over HTTP on this port.
+- ``METRICS_FILE``: periodically write the same text to this file (e.g. for
+  node_exporter's textfile collector or offline analysis), every
+  ``METRICS_FILE_INTERVAL`` seconds (default ``15``).
+"""
+import contextlib
+import functools
+import os
+import random
+import resource
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SESSION_TTL = 30 * 60  # Sessions unseen for this long no longer count as active
+
+
+def step_label(step: int, question_count: int) -> str:
+    """Funnel step name used as the ``step`` label."""
+    if step == 0:
+        return 'intro'
+    if step <= question_count:
+        return f'question_{step}'
+    if step == question_count + 1:
+        return 'results'
+    return 'testimonials'
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+def resident_memory_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # ru_maxrss is the peak, in KiB on Linux, which is the best we can do elsewhere
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Metrics:
+    """Per-process collection of rerun/stage histograms and session gauges."""
+
+    def __init__(self, sample_rate: float = 1.0):
+        self.sample_rate = sample_rate
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self.reruns: Dict[str, int] = {}
+        # Last seen time per session, oldest first, so expired ones are pruned from the front
+        self.sessions: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def begin_rerun(self, session_id: Optional[str] = None):
+        """Start a rerun; decides whether its spans are timed."""
+        now = time.perf_counter()
+        if session_id:
+            seen = time.time()
+            with self._lock:
+                self.sessions[session_id] = seen
+                self.sessions.move_to_end(session_id)
+                self._prune_sessions(seen - SESSION_TTL)
+        self._local.step = 'unknown'
+        self._local.started = now if random.random() < self.sample_rate else None
+
+    def set_step(self, step: str):
+        """Tag the current rerun, and spans still open in it, with its funnel step."""
+        with self._lock:
+            self.reruns[step] = self.reruns.get(step, 0) + 1
+        self._local.step = step
+
+    def end_rerun(self):
+        """Record the whole rerun's duration, if it was sampled."""
+        started = getattr(self._local, 'started', None)
+        if started is not None:
+            self.observe('rerun', self._local.step, time.perf_counter() - started)
+            self._local.started = None
+
+    @contextlib.contextmanager
+    def span(self, stage: str):
+        """Time a stage of the current rerun (no-op when the rerun is not sampled)."""
+        if getattr(self._local, 'started', None) is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, self._local.step, time.perf_counter() - start)
+
+    def observe(self, stage: str, step: str, seconds: float):
+        with self._lock:
+            histogram = self.histograms.get((stage, step))
+            if histogram is None:
+                histogram = self.histograms[(stage, step)] = Histogram()
+            histogram.observe(seconds)
+
+    def _prune_sessions(self, cutoff: float):
+        # Caller holds the lock
+        while self.sessions and next(iter(self.sessions.values())) < cutoff:
+            self.sessions.popitem(last=False)
+
+    def active_sessions(self) -> int:
+        with self._lock:
+            self._prune_sessions(time.time() - SESSION_TTL)
+            return len(self.sessions)
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        from report import fragment_cache
+        from session_lifecycle import get_lifecycle
+        from telemetry import get_telemetry
+
+        lines = [
+            '# HELP funnel_stage_seconds Time spent per funnel stage and step.',
+            '# TYPE funnel_stage_seconds histogram'
+        ]
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            reruns = sorted(self.reruns.items())
+            for (stage, step), histogram in histograms:
+                labels = f'stage="{stage}",step="{step}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'funnel_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f'funnel_stage_seconds_sum{{{labels}}} {histogram.sum:.6f}')
+                lines.append(f'funnel_stage_seconds_count{{{labels}}} {histogram.count}')
+
+        lines += ['# HELP funnel_reruns_total Script reruns per step, sampled or not.',
+                  '# TYPE funnel_reruns_total counter']
+        lines += [f'funnel_reruns_total{{step="{step}"}} {count}' for step, count in reruns]
+
+        cache = fragment_cache.stats()
+        lines += [
+            '# HELP funnel_active_sessions Sessions seen in the last 30 minutes.',
+            '# TYPE funnel_active_sessions gauge',
+            f'funnel_active_sessions {self.active_sessions()}',
+            '# HELP process_resident_memory_bytes Resident memory of this worker.',
+            '# TYPE process_resident_memory_bytes gauge',
+            f'process_resident_memory_bytes {resident_memory_bytes()}',
+            '# HELP report_fragment_cache_hits_total Results fragment cache hits.',
+            '# TYPE report_fragment_cache_hits_total counter',
+            f'report_fragment_cache_hits_total {cache["hits"]}',
+            '# HELP report_fragment_cache_misses_total Results fragment cache misses.',
+            '# TYPE report_fragment_cache_misses_total counter',
+            f'report_fragment_cache_misses_total {cache["misses"]}'
+        ]
+        lifecycle = get_lifecycle().stats()
+        lines += [
+            '# HELP funnel_sessions_evicted_total Idle sessions whose funnel state was moved to disk.',
+            '# TYPE funnel_sessions_evicted_total counter',
+            f'funnel_sessions_evicted_total{{reason="idle"}} {lifecycle["evicted_idle"]}',
+            f'funnel_sessions_evicted_total{{reason="memory"}} {lifecycle["evicted_memory"]}',
+            '# HELP funnel_sessions_restored_total Evicted sessions restored when the parent returned.',
+            '# TYPE funnel_sessions_restored_total counter',
+            f'funnel_sessions_restored_total {lifecycle["restored"]}',
+            '# HELP funnel_sessions_resident Sessions with their funnel state in this worker.',
+            '# TYPE funnel_sessions_resident gauge',
+            f'funnel_sessions_resident {lifecycle["resident"]}',
+            '# HELP funnel_sessions_evicted Sessions currently evicted to disk.',
+            '# TYPE funnel_sessions_evicted gauge',
+            f'funnel_sessions_evicted {lifecycle["evicted"]}'
+        ]
+        telemetry = get_telemetry()
+        lines += [
+            '# HELP funnel_events_emitted_total Funnel telemetry events queued.',
+            '# TYPE funnel_events_emitted_total counter',
+            f'funnel_events_emitted_total {telemetry.emitted}',
+            '# HELP funnel_events_dropped_total Funnel telemetry events lost to a full queue or a failed write.',
+            '# TYPE funnel_events_dropped_total counter',
+            f'funnel_events_dropped_total {telemetry.dropped}',
+            '# HELP funnel_events_written_total Funnel telemetry events written to the sink.',
+            '# TYPE funnel_events_written_total counter',
+            f'funnel_events_written_total {telemetry.written}',
+            '# HELP funnel_events_pending Funnel telemetry events waiting for the flusher.',
+            '# TYPE funnel_events_pending gauge',
+            f'funnel_events_pending {telemetry.pending()}'
+        ]
+        return '\n'.join(lines) + '\n'
+
+    def serve_http(self, port: int) -> 'ThreadingHTTPServer':
+        """Serve ``/metrics`` from a daemon thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(('0.0.0.0', port), Handler)
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        return server
+
+    def export_to_file(self, path: str, interval: float = 15.0):
+        """Rewrite ``path`` every ``interval`` seconds from a daemon thread."""
+        def run():
+            while True:
+                time.sleep(interval)
+                with open(path + '.tmp', 'w', encoding='utf-8') as file:
+                    file.write(self.render_prometheus())
+                os.replace(path + '.tmp', path)
+
+        threading.Thread(target=run, name='metrics-file', daemon=True).start()
+
+
+@functools.lru_cache(maxsize=None)
+def get_metrics() -> Metrics:
+    """Process-wide metrics, with exporters configured from the environment."""
+    metrics = Metrics(float(os.environ.get('METRICS_SAMPLE_RATE', '1.0')))
+    if os.environ.get('METRICS_PORT'):
+        metrics.serve_http(int(os.environ['METRICS_PORT']))
+    if os.environ.get('METRICS_FILE'):
+        metrics.export_to_file(os.environ['METRICS_FILE'], float(os.environ.get('METRICS_FILE_INTERVAL', '15')))
+    return metrics
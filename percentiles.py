@@ -0,0 +1,166 @@
+"""Norm-referenced percentiles from a reference distribution of category scores.
+
+Reference samples are CSV files with one column per category (percentage
+scores, as produced by ``batch_score.py``) and an optional age-band column.
+They are compiled into one sorted ``.npy`` array per (age band, category)
+under a norms directory, listed in ``manifest.json``. Tables are opened with
+``mmap_mode='r'`` so every worker on a machine shares the same pages, and a
+lookup is a bisection (``np.searchsorted``) over the sorted scores.
+
+Usage:
+    python percentiles.py build referencia.csv --out data/norms --age-column faixa_etaria
+    python percentiles.py update novas_referencias.csv --out data/norms --age-column faixa_etaria
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from question_bank import CATEGORIES
+
+NORMS_DIR = 'data/norms'
+ALL_AGES = 'todas'
+
+
+class NormTables:
+    """Memory-mapped sorted score arrays per age band and category."""
+
+    def __init__(self, norms_dir: str = NORMS_DIR):
+        with open(os.path.join(norms_dir, 'manifest.json'), 'r', encoding='utf-8') as file:
+            self.manifest = json.load(file)
+        self.tables = {
+            (band, category): np.load(os.path.join(norms_dir, entry['file']), mmap_mode='r')
+            for band, categories in self.manifest['bands'].items()
+            for category, entry in categories.items()
+        }
+
+    def table(self, category: str, age_band: Optional[str] = None) -> np.ndarray:
+        """Sorted reference scores for a category, falling back to all ages."""
+        return self.tables.get((age_band, category), self.tables[(ALL_AGES, category)])
+
+    def percentiles(self, scores, category: str, age_band: Optional[str] = None) -> np.ndarray:
+        """Mid-rank percentile of each score within the reference sample (O(log n) each)."""
+        table = self.table(category, age_band)
+        scores = np.asarray(scores, dtype=np.float64)
+        below = np.searchsorted(table, scores, side='left')
+        at_or_below = np.searchsorted(table, scores, side='right')
+        return (below + at_or_below) / 2 / len(table) * 100
+
+    def percentile_matrix(self, scores: np.ndarray, age_bands: Optional[List[Optional[str]]] = None) -> np.ndarray:
+        """Percentiles for an (assessments x categories) score matrix."""
+        scores = np.asarray(scores, dtype=np.float64)
+        result = np.empty_like(scores)
+        if age_bands is None:
+            for i, category in enumerate(CATEGORIES):
+                result[:, i] = self.percentiles(scores[:, i], category)
+            return result
+
+        age_bands = np.asarray([band or ALL_AGES for band in age_bands], dtype=object)
+        for band in set(age_bands):
+            rows = age_bands == band
+            for i, category in enumerate(CATEGORIES):
+                result[rows, i] = self.percentiles(scores[rows, i], category, band)
+        return result
+
+    def lookup(self, scores: Dict[str, float], age_band: Optional[str] = None) -> Dict[str, int]:
+        """Percentiles for a single assessment, rounded for display (1-99)."""
+        return {
+            category: int(min(max(round(float(self.percentiles(score, category, age_band))), 1), 99))
+            for category, score in scores.items()
+        }
+
+
+_loaded: Dict[str, tuple] = {}
+
+
+def get_norm_tables(norms_dir: str = NORMS_DIR) -> Optional[NormTables]:
+    """Return the norm tables for ``norms_dir``, reopening them after a rebuild.
+
+    Returns ``None`` when no tables have been built yet.
+    """
+    try:
+        mtime = os.stat(os.path.join(norms_dir, 'manifest.json')).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _loaded.get(norms_dir)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, NormTables(norms_dir))
+        _loaded[norms_dir] = cached
+    return cached[1]
+
+
+def read_reference(path: str, age_column: Optional[str] = None) -> Dict[str, Dict[str, np.ndarray]]:
+    """Read a reference CSV into sorted score arrays per age band and category."""
+    samples: Dict[str, Dict[str, List[float]]] = {}
+    with open(path, 'r', encoding='utf-8', newline='') as file:
+        for row in csv.DictReader(file):
+            bands = [ALL_AGES]
+            if age_column and row.get(age_column):
+                bands.append(row[age_column])
+            for band in bands:
+                for category in CATEGORIES:
+                    samples.setdefault(band, {}).setdefault(category, []).append(float(row[category]))
+    return {
+        band: {category: np.sort(np.asarray(values, dtype=np.float64)) for category, values in categories.items()}
+        for band, categories in samples.items()
+    }
+
+
+def merge_sorted(existing: np.ndarray, new: np.ndarray) -> np.ndarray:
+    """Merge two sorted arrays in linear time."""
+    return np.insert(existing, np.searchsorted(existing, new, side='right'), new)
+
+
+def write_tables(samples: Dict[str, Dict[str, np.ndarray]], norms_dir: str = NORMS_DIR, incremental: bool = False):
+    """Write sorted tables and the manifest, merging into existing tables if ``incremental``.
+
+    Each file is written next to its target and swapped in with
+    ``os.replace``, so processes that still map the previous tables keep
+    reading a consistent copy until they reopen.
+    """
+    os.makedirs(norms_dir, exist_ok=True)
+    manifest_path = os.path.join(norms_dir, 'manifest.json')
+    manifest = {'categories': list(CATEGORIES), 'bands': {}}
+    if incremental and os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+
+    for band, categories in samples.items():
+        for category, values in categories.items():
+            file_name = f'{band}__{category}.npy'
+            path = os.path.join(norms_dir, file_name)
+            if incremental and band in manifest['bands'] and category in manifest['bands'][band]:
+                values = merge_sorted(np.load(path), values)
+            with open(path + '.tmp', 'wb') as file:
+                np.save(file, values)
+            os.replace(path + '.tmp', path)
+            manifest['bands'].setdefault(band, {})[category] = {'file': file_name, 'n': int(len(values))}
+
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return manifest
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Tabelas normativas de percentis por categoria.")
+    parser.add_argument('command', choices=['build', 'update'], help="build recria as tabelas; update acrescenta dados")
+    parser.add_argument('reference', help="CSV de referência com uma coluna por categoria")
+    parser.add_argument('--out', default=NORMS_DIR, help=f"Diretório das tabelas (padrão: {NORMS_DIR})")
+    parser.add_argument('--age-column', help="Coluna com a faixa etária, para tabelas estratificadas")
+    args = parser.parse_args(argv)
+
+    samples = read_reference(args.reference, args.age_column)
+    manifest = write_tables(samples, args.out, incremental=args.command == 'update')
+    for band, categories in manifest['bands'].items():
+        sizes = ', '.join(f"{category}={entry['n']}" for category, entry in categories.items())
+        print(f"{band}: {sizes}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""Cold-start profile of the funnel, built on ``python -X importtime``.
+
+Runs ``main.py`` headlessly with Streamlit's AppTest in a fresh interpreter
+and measures:
+
+- ``streamlit_import_ms``: importing Streamlit itself;
+- ``time_to_first_question_ms``: rendering the intro and the first question;
+- ``time_to_first_result_ms``: rendering the results page for the first time,
+  after all questions have been answered.
+
+Module imports traced during each phase are attributed to it, so a heavy
+dependency creeping back into the question steps shows up by name.
+
+Usage:
+    python profile_startup.py                    # print the profile
+    python profile_startup.py --output perfil.json
+    python profile_startup.py --check            # compare against startup_budget.json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+BUDGET_FILE = 'startup_budget.json'
+PHASE_MARKER = 'startup-phase:'
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def run_phases():
+    """Child process: drive the app through the measured phases."""
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')
+    timings = {}
+
+    def phase(name):
+        sys.stderr.write(f'{PHASE_MARKER}{name}\n')
+        sys.stderr.flush()
+
+    phase('streamlit_import')
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    timings['streamlit_import_ms'] = (time.perf_counter() - start) * 1000
+
+    phase('first_question')
+    start = time.perf_counter()
+    at = AppTest.from_file(app_path, default_timeout=60).run()
+    at.button[0].click().run()
+    timings['time_to_first_question_ms'] = (time.perf_counter() - start) * 1000
+
+    phase('answering')
+    with open(os.path.join(os.path.dirname(app_path), 'data', 'questions.json'), 'r', encoding='utf-8') as file:
+        question_count = len(json.load(file)['questions'])
+    for _ in range(question_count):
+        at.radio[0].set_value(at.radio[0].options[0]).run()
+        if at.session_state.step == question_count:
+            break
+        at.button[1].click().run()
+
+    phase('first_result')
+    start = time.perf_counter()
+    at.button[1].click().run()
+    timings['time_to_first_result_ms'] = (time.perf_counter() - start) * 1000
+
+    phase('end')
+    if at.exception:
+        raise RuntimeError(f"App raised during profiling: {at.exception}")
+    print(json.dumps(timings))
+
+
+def parse_imports(stderr: str) -> Dict[str, List[Dict]]:
+    """Attribute top-level imports traced by ``-X importtime`` to each phase."""
+    phases: Dict[str, List[Dict]] = {}
+    current = None
+    for line in stderr.splitlines():
+        if line.startswith(PHASE_MARKER):
+            current = line[len(PHASE_MARKER):]
+            phases[current] = []
+            continue
+        match = IMPORT_LINE.match(line)
+        # Only top-level entries: their cumulative time covers nested imports
+        if match and current and len(match.group(3)) == 1:
+            phases[current].append({'module': match.group(4), 'ms': int(match.group(2)) / 1000})
+    return phases
+
+
+def profile() -> Dict:
+    """Run the phases in a fresh interpreter with import tracing enabled."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--child'],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        # Keep profiling sessions out of the real assessment database
+        env=dict(os.environ, ASSESSMENT_DB=os.path.join(tempfile.mkdtemp(), 'profile.db'), SESSION_STORE='memory',
+                 TELEMETRY_SINK='off')
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    imports = parse_imports(result.stderr)
+    report['imports'] = {}
+    for name in ('first_question', 'first_result'):
+        modules = sorted(imports.get(name, []), key=lambda m: m['ms'], reverse=True)
+        report['imports'][name] = {
+            'total_ms': round(sum(m['ms'] for m in modules), 1),
+            'slowest': [{'module': m['module'], 'ms': round(m['ms'], 1)} for m in modules[:10]]
+        }
+    for key in ('streamlit_import_ms', 'time_to_first_question_ms', 'time_to_first_result_ms'):
+        report[key] = round(report[key], 1)
+    return report
+
+
+def check_budget(report: Dict, budget: Dict) -> List[str]:
+    """Return one message per metric that exceeds its budget."""
+    failures = []
+    for key, limit in budget.items():
+        value = report['imports'][key[len('imports.'):]]['total_ms'] if key.startswith('imports.') else report[key]
+        if value > limit:
+            failures.append(f"{key}: {value:.1f} ms > {limit:.1f} ms")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Perfil de inicialização do funil (tempo até a primeira pergunta e resultado).")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help="Salvar o perfil em JSON")
+    parser.add_argument('--check', action='store_true', help=f"Falhar se algum valor exceder {BUDGET_FILE}")
+    parser.add_argument('--budget', default=BUDGET_FILE, help="Arquivo de orçamento")
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_phases()
+        return 0
+
+    report = profile()
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    print(text)
+
+    if args.check:
+        with open(args.budget, 'r', encoding='utf-8') as file:
+            failures = check_budget(report, json.load(file))
+        for failure in failures:
+            print(f"Acima do orçamento: {failure}", file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Compact answer arrays and URL-safe resume tokens.
+
+A session keeps its answers as a ``bytearray`` with one option index per
+question (in bank order), ``UNANSWERED_BYTE`` where there is no answer yet.
+
+The same answers, plus the current step, are encoded into a short token for
+the query string, so a parent can resume after a disconnect or a worker
+restart without any server-side session memory::
+
+    byte 0        token format (1)
+    bytes 1-6     question bank version (first 12 hex digits of its hash)
+    byte 7        step
+    mask          one bit per question, set when answered
+    answers       ``bits`` bits per question (2 for four options)
+
+base64url-encoded without padding: 22 characters for 20 questions. A token
+is only accepted by the exact question bank version it was made for.
+
+Scores are kept as running totals next to the answers: points and answered
+questions per category, updated with an O(1) delta on every answer change
+(``ScoreTable.apply``), so the results never need a full scoring pass and
+the question pages can show a partial profile.
+"""
+import base64
+from typing import Dict, List, Tuple
+
+from store import UNANSWERED_BYTE
+from utils import CATEGORIES, MAX_OPTION_SCORE, OPTION_WEIGHTS
+
+TOKEN_FORMAT = 1
+HEADER_SIZE = 8
+
+
+def new_answers(questions: List[Dict]) -> bytearray:
+    """Empty answer array for ``questions``."""
+    return bytearray([UNANSWERED_BYTE]) * len(questions)
+
+
+class ScoreTable:
+    """Option weights and category maxima of a question bank, for running totals.
+
+    Totals are a list of ``2 * len(CATEGORIES)`` integers: points per category,
+    then answered questions per category.
+    """
+
+    def __init__(self, questions: List[Dict]):
+        self.weights = [[OPTION_WEIGHTS[option] for option in q['options']] for q in questions]
+        self.category = [CATEGORIES.index(q['category']) for q in questions]
+        # Same denominator as QuestionBank: every question of the category at MAX_OPTION_SCORE
+        self.max_scores = [self.category.count(c) * MAX_OPTION_SCORE for c in range(len(CATEGORIES))]
+
+    def totals(self, answers: bytearray) -> List[int]:
+        """Running totals for ``answers`` computed from scratch."""
+        totals = [0] * (2 * len(CATEGORIES))
+        for position, index in enumerate(answers):
+            if index != UNANSWERED_BYTE:
+                self.apply(totals, position, UNANSWERED_BYTE, index)
+        return totals
+
+    def apply(self, totals: List[int], position: int, old: int, new: int):
+        """Update ``totals`` in place for the answer at ``position`` changing from ``old`` to ``new``."""
+        c = self.category[position]
+        if old != UNANSWERED_BYTE:
+            totals[c] -= self.weights[position][old]
+            totals[len(CATEGORIES) + c] -= 1
+        if new != UNANSWERED_BYTE:
+            totals[c] += self.weights[position][new]
+            totals[len(CATEGORIES) + c] += 1
+
+    def scores(self, totals: List[int]) -> Dict[str, float]:
+        """Category percentages, as ``QuestionBank.score_indices`` (unanswered questions score 0)."""
+        return {category: totals[c] / self.max_scores[c] * 100 for c, category in enumerate(CATEGORIES)}
+
+    def partial_scores(self, totals: List[int]) -> Dict[str, float]:
+        """Category percentages over the questions answered so far; categories without answers are left out."""
+        return {category: totals[c] / (totals[len(CATEGORIES) + c] * MAX_OPTION_SCORE) * 100
+                for c, category in enumerate(CATEGORIES) if totals[len(CATEGORIES) + c]}
+
+
+def _bits_per_answer(questions: List[Dict]) -> int:
+    return max(1, (max(len(q['options']) for q in questions) - 1).bit_length())
+
+
+def encode_token(questions: List[Dict], version: str, step: int, answers: bytearray) -> str:
+    """Resume token for ``step`` and ``answers`` against bank ``version``."""
+    bits = _bits_per_answer(questions)
+    mask = 0
+    packed = 0
+    for position, index in enumerate(answers):
+        if index != UNANSWERED_BYTE:
+            mask |= 1 << position
+            packed |= index << (position * bits)
+    n = len(questions)
+    raw = (bytes([TOKEN_FORMAT]) + bytes.fromhex(version)[:6] + bytes([step])
+           + mask.to_bytes((n + 7) // 8, 'little') + packed.to_bytes((n * bits + 7) // 8, 'little'))
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+def decode_token(token: str, questions: List[Dict], version: str, check_steps: bool = True) -> Tuple[int, bytearray]:
+    """Inverse of ``encode_token``; raises ``ValueError`` for a malformed token or another bank version.
+
+    ``check_steps=False`` skips the check that every question before ``step``
+    is answered, for orders that skip questions (``adaptive``).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    except ValueError:
+        raise ValueError("Token de progresso inválido") from None
+
+    n = len(questions)
+    bits = _bits_per_answer(questions)
+    mask_size, answers_size = (n + 7) // 8, (n * bits + 7) // 8
+    if len(raw) != HEADER_SIZE + mask_size + answers_size or raw[0] != TOKEN_FORMAT:
+        raise ValueError("Token de progresso inválido")
+    if raw[1:7] != bytes.fromhex(version)[:6]:
+        raise ValueError("Token de progresso de outra versão do questionário")
+    step = raw[7]
+    if step > n + 2:
+        raise ValueError("Token de progresso inválido")
+
+    mask = int.from_bytes(raw[HEADER_SIZE:HEADER_SIZE + mask_size], 'little')
+    packed = int.from_bytes(raw[HEADER_SIZE + mask_size:], 'little')
+    answers = new_answers(questions)
+    for position, question in enumerate(questions):
+        if mask >> position & 1:
+            index = packed >> (position * bits) & ((1 << bits) - 1)
+            if index >= len(question['options']):
+                raise ValueError("Token de progresso inválido")
+            answers[position] = index
+    # A step past an unanswered question would skip validation
+    if check_steps and any(answers[position] == UNANSWERED_BYTE for position in range(min(step, n + 1) - 1)):
+        raise ValueError("Token de progresso inválido")
+    return step, answers
@@ -0,0 +1,84 @@
+import functools
+import json
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from utils import CATEGORIES, MAX_OPTION_SCORE, OPTION_WEIGHTS, questions_version, validate_questions
+
+UNANSWERED = -1
+
+
+class QuestionBank:
+    """Question bank compiled into weight arrays for vectorized scoring.
+
+    Answers are represented as option-index vectors with one entry per
+    question (in bank order); ``UNANSWERED`` marks a missing answer. The
+    weight matrix carries an extra trailing zero column, so ``UNANSWERED``
+    selects it through NumPy's negative indexing and scores nothing.
+    """
+
+    def __init__(self, questions: List[Dict]):
+        self.questions = questions
+        self.version = questions_version(questions)
+        self.question_ids = [q['id'] for q in questions]
+        self.position = {qid: i for i, qid in enumerate(self.question_ids)}
+        self.option_index = [{option: i for i, option in enumerate(q['options'])} for q in questions]
+
+        validate_questions(questions)
+
+        n_options = max(len(q['options']) for q in questions)
+        self.weights = np.zeros((len(questions), n_options + 1), dtype=np.int64)
+        for i, q in enumerate(questions):
+            self.weights[i, :len(q['options'])] = [OPTION_WEIGHTS[option] for option in q['options']]
+
+        category_of = np.array([CATEGORIES.index(q['category']) for q in questions])
+        self.category_indices = {c: np.flatnonzero(category_of == i) for i, c in enumerate(CATEGORIES)}
+        # (questions x categories) membership matrix: points @ membership -> category totals
+        self.membership = (category_of[:, None] == np.arange(len(CATEGORIES))).astype(np.int64)
+        self.max_scores = self.membership.sum(axis=0) * MAX_OPTION_SCORE
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def encode(self, responses: Dict[int, str]) -> np.ndarray:
+        """Convert a ``{question_id: option}`` dict into an option-index vector."""
+        return self.encode_many([responses])[0]
+
+    def encode_many(self, responses: Sequence[Dict[int, str]]) -> np.ndarray:
+        """Convert many response dicts into an (assessments x questions) option-index matrix."""
+        rows = []
+        for answers in responses:
+            row = [UNANSWERED] * len(self.questions)
+            for qid, response in answers.items():
+                try:
+                    pos = self.position.get(qid)
+                    if pos is None:
+                        continue
+                    row[pos] = self.option_index[pos][response]
+                except (KeyError, TypeError):
+                    raise ValueError(f"Resposta inválida para a pergunta {qid}: {response!r}") from None
+            rows.append(row)
+        return np.array(rows, dtype=np.int8).reshape(len(rows), len(self.questions))
+
+    def score_matrix(self, indices: np.ndarray) -> np.ndarray:
+        """Score an (assessments x questions) option-index matrix as category percentages."""
+        indices = np.asarray(indices, dtype=np.int64)
+        points = self.weights[np.arange(len(self.questions)), indices]
+        return points @ self.membership / self.max_scores * 100
+
+    def score_indices(self, indices: Sequence[int]) -> Dict[str, float]:
+        """Score a single option-index vector."""
+        percentages = self.score_matrix(np.asarray(indices)[None, :])[0]
+        return {c: float(p) for c, p in zip(CATEGORIES, percentages)}
+
+    def score(self, responses: Dict[int, str]) -> Dict[str, float]:
+        """Score a ``{question_id: option}`` dict."""
+        return self.score_indices(self.encode(responses))
+
+
+@functools.lru_cache(maxsize=None)
+def get_question_bank(file_path: str = 'data/questions.json') -> QuestionBank:
+    """Load and compile the question bank once per process."""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return QuestionBank(json.load(file)['questions'])
@@ -0,0 +1,213 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+from content_pack import get_pack
+from utils import get_category_description, get_category_recommendations
+
+SEVERITY_COLORS = {
+    "Muito Alto": "#FF0000",
+    "Alto": "#FF6B6B",
+    "Moderado": "#FFA500",
+    "Baixo": "#4CAF50"
+}
+
+
+class FragmentCache:
+    """Bounded LRU cache for static HTML fragments, with hit/miss counters."""
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable, build: Callable[[], str]) -> str:
+        """Return the fragment for ``key``, building and storing it on a miss."""
+        try:
+            fragment = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            fragment = self._entries[key] = build()
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return fragment
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return fragment
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+
+fragment_cache = FragmentCache()
+
+# Results and testimonial blocks shared by the app and the static export (export_static.py)
+GLOBAL_SEVERITY_TEMPLATE = """
+        <div style="text-align: center; margin: 1rem 0;">
+            <h2 style="font-size: 20px;">Nível de Severidade Global</h2>
+            <div style="background-color: {color}; color: white; padding: 1rem; border-radius: 8px; display: inline-block;">
+                <span style="font-size: 24px; font-weight: bold;">{severity}</span>
+                <br>
+                <span>Score Global: {avg_score:.1f}%</span>
+            </div>
+        </div>
+        """
+
+PLATFORM_PROMOTION = '''
+            <div style="background-color: #1B365D; color: white; padding: 2rem; border-radius: 8px; text-align: center; margin: 2rem 0;">
+                <h2 style="color: white;">Conheça a Ativa-Mente</h2>
+                <p style="font-size: 1.1em; margin: 1rem 0;">
+                    Plataforma completa de treinamento cognitivo com:
+                    <br>• 6+ Jogos Interativos (Memória, Padrões, Foco e mais)
+                    <br>• Sistema de Progresso com Níveis
+                    <br>• Dicas Diárias Personalizadas
+                    <br>• Acompanhamento de Evolução
+                    <br>• Histórias de Sucesso Inspiradoras
+                </p>
+                <div style="background-color: #FFA500; padding: 1.5rem; border-radius: 8px; margin-top: 1.5rem;">
+                    <h3 style="color: #1B365D; margin: 0; font-size: 1.5em;">Oferta Especial</h3>
+                    <p style="margin: 0.5rem 0; font-size: 1.2em;">
+                        <strong>R$ 37,00</strong> - Acesso Vitalício
+                        <br>
+                        <span style="font-size: 0.9em;">Inclui todos os jogos e atualizações futuras</span>
+                    </p>
+                    <button style="background-color: #1B365D; color: white; border: none; padding: 0.75rem 2rem; border-radius: 25px; margin-top: 1rem; font-weight: bold; cursor: pointer;">
+                        Começar Agora
+                    </button>
+                </div>
+            </div>
+        '''
+
+RECOMMENDATION_BLOCK_TEMPLATE = """
+        <div style="background-color: #f8f9fa; padding: 1.5rem; border-radius: 8px; margin: 1.5rem 0;">
+            <h3 style="margin: 0 0 1rem 0;">Recomendação Clínica</h3>
+            <p style="margin: 0;">{recommendation}</p>
+        </div>
+        """
+
+TESTIMONIAL_TEMPLATE = """
+            <div class="testimonial">
+                <p style="margin: 1rem 0;">"{text}"</p>
+                <p style="margin: 0.5rem 0;"><strong>{name}</strong></p>
+                <p style="margin: 0;">{stars}</p>
+            </div>
+            """
+
+
+def _escape_braces(text: str) -> str:
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+def _build_category_template(category: str, severity: str) -> str:
+    color = SEVERITY_COLORS[severity]
+    pack = get_pack()
+    if pack is not None:
+        description, recommendations = pack.description(category, severity), pack.recommendations(category, severity)
+    else:
+        description, recommendations = get_category_description(category, severity), get_category_recommendations(category, severity)
+    static = {
+        'color': color,
+        'title': _escape_braces(category.title()),
+        'severity': severity,
+        'description': _escape_braces(description),
+        'recommendations': _escape_braces(recommendations)
+    }
+    return """
+            <div style="padding: 1.5rem; border-radius: 8px; background-color: #FFFFFF; margin: 1rem 0; border-left: 4px solid {color}">
+                <h4 style="margin: 0 0 1rem 0;">{title}</h4>
+                <div style="display: flex; justify-content: space-between; margin-bottom: 1rem;">
+                    <div>
+                        <strong>Nível de Severidade:</strong> {severity} ({{score:.1f}}%)
+                        {{percentile_html}}
+                    </div>
+                    <div style="text-align: right;">
+                        <span style="background-color: {color}; color: white; padding: 0.25rem 0.5rem; border-radius: 4px;">
+                            {severity}
+                        </span>
+                    </div>
+                </div>
+                <div style="margin: 1rem 0;">
+                    <strong>Padrões Comportamentais:</strong>
+                    <p style="margin: 0.5rem 0;">{description}</p>
+                </div>
+                <div style="margin-top: 1rem;">
+                    <strong>Recomendações da Ativa-Mente:</strong>
+                    <ul style="margin: 0.5rem 0; padding-left: 1.5rem;">
+                        {recommendations}
+                    </ul>
+                </div>
+            </div>
+            """.format(**static)
+
+
+def category_template(category: str, severity: str, content_version: str) -> str:
+    """Results card for one category and severity, with ``{score:.1f}`` and ``{percentile_html}`` left to fill."""
+    return fragment_cache.get(('category', category, severity, content_version),
+                              lambda: _build_category_template(category, severity))
+
+
+def render_category_card(category: str, severity: str, score: float, percentile: Optional[int],
+                         content_version: str) -> str:
+    """Per-category results card; only the score and percentile vary per session."""
+    template = category_template(category, severity, content_version)
+    percentile_html = f'<br><strong>Percentil:</strong> {percentile}' if percentile is not None else ''
+    return template.format(score=score, percentile_html=percentile_html)
+
+
+def _build_social_proof(content: Dict) -> str:
+    return """
+            <div style="background-color: #f8f9fa; padding: 2rem; border-radius: 8px; margin: 2rem 0;">
+                <h2 style="text-align: center; color: #1B365D; margin-bottom: 1.5rem;">Reconhecido por Especialistas</h2>
+
+                <!-- Partner Institutions Grid -->
+                <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem; margin-bottom: 2rem;">
+                    {partner_logos_html}
+                </div>
+
+                <!-- Institutional Testimonials -->
+                <div style="margin-top: 2rem;">
+                    <h3 style="text-align: center; color: #1B365D; margin-bottom: 1.5rem;">O que dizem os especialistas</h3>
+                    <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 1.5rem;">
+                        {institutional_testimonials_html}
+                    </div>
+                </div>
+            </div>
+        """.format(
+        partner_logos_html=''.join([
+            f"""
+                <div style="background: white; padding: 1rem; border-radius: 8px; text-align: center; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+                    <div style="font-size: 2rem; margin-bottom: 0.5rem;">{partner['logo']}</div>
+                    <h4 style="margin: 0.5rem 0; color: #1B365D;">{partner['name']}</h4>
+                    <p style="margin: 0; color: #666; font-size: 0.9em;">{partner['description']}</p>
+                </div>
+                """ for partner in content['partner_institutions']
+        ]),
+        institutional_testimonials_html=''.join([
+            f"""
+                <div style="background: white; padding: 1.5rem; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1);">
+                    <p style="font-style: italic; margin-bottom: 1rem;">"{testimonial['text']}"</p>
+                    <div>
+                        <strong style="color: #1B365D;">{testimonial['author']}</strong>
+                        <br>
+                        <small style="color: #666;">{testimonial['role']}</small>
+                        <br>
+                        <small style="color: #666;">{testimonial['institution']}</small>
+                    </div>
+                </div>
+                """ for testimonial in content['institutional_testimonials']
+        ])
+    )
+
+
+def render_social_proof(content: Dict, content_version: str) -> str:
+    """Partner institutions and institutional testimonials block."""
+    return fragment_cache.get(('social_proof', content_version), lambda: _build_social_proof(content))
+
+
+def render_testimonial(testimonial: Dict) -> str:
+    """Parent testimonial card."""
+    return TESTIMONIAL_TEMPLATE.format(text=testimonial['text'], name=testimonial['name'],
+                                       stars='⭐' * testimonial['rating'])
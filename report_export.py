@@ -0,0 +1,185 @@
+"""Downloadable results reports (HTML, or PDF when WeasyPrint is installed).
+
+Reports are built in a process pool so rendering never stalls a Streamlit
+rerun. ``ReportExporter.submit`` returns a handle at once; the results page
+polls ``status(handle)`` until the file is ready.
+
+Reports are content-addressed: the handle is a hash of everything that goes
+into the file (format, scores, percentiles and ``REPORT_VERSION``), and the
+file is written to ``REPORTS_DIR`` under that name. Identical requests,
+from one parent clicking twice or from many parents with the same answers,
+share one file and one build. The cache directory can be emptied at any
+time.
+
+Usage:
+    exporter = ReportExporter()
+    handle = exporter.submit('html', scores, percentiles)
+    exporter.status(handle)   # 'pending', 'ready', 'failed' or 'missing'
+    exporter.path(handle)
+"""
+import concurrent.futures
+import functools
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+REPORTS_DIR = os.environ.get('REPORTS_DIR', 'data/reports')
+REPORT_VERSION = 1  # Bump when the report layout changes, so cached files are not reused
+FORMATS = ('html', 'pdf') if importlib.util.find_spec('weasyprint') else ('html',)
+MIME_TYPES = {'html': 'text/html', 'pdf': 'application/pdf'}
+FAILED_JOBS_KEPT = 256  # Failed builds remembered for ``status``/``error``; finished ones are forgotten at once
+
+REPORT_PAGE = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>Relatório da Avaliação TDAH - Ativa-Mente</title>
+<style>
+body {{ font-family: sans-serif; color: #1B365D; max-width: 800px; margin: 2rem auto; padding: 0 1rem; }}
+h1, h2 {{ text-align: center; }}
+svg {{ display: block; max-width: 400px; margin: 1rem auto; }}
+@page {{ size: A4; margin: 1.5cm; }}
+</style>
+</head>
+<body>
+<h1 style="font-size: 24px;">Resultados da Avaliação</h1>
+{global_severity}
+<h2 style="font-size: 20px;">Análise Comparativa</h2>
+{radar}
+{bars}
+<h2 style="font-size: 20px;">Análise Clínica Detalhada</h2>
+{cards}
+{recommendation}
+<p style="text-align: center; padding: 2rem 0;">Ativa-Mente | Este questionário não substitui uma avaliação profissional</p>
+</body>
+</html>
+"""
+
+
+def render_report_html(scores: Dict[str, float], percentiles: Optional[Dict[str, int]]) -> str:
+    """Standalone results page with inline SVG charts."""
+    from charts import bar_svg, radar_svg
+    from report import (GLOBAL_SEVERITY_TEMPLATE, RECOMMENDATION_BLOCK_TEMPLATE, SEVERITY_COLORS,
+                        render_category_card)
+    from utils import get_recommendation, get_severity_level
+
+    avg_score = sum(scores.values()) / len(scores)
+    severity_level = get_severity_level(avg_score)
+    cards = ''.join(
+        render_category_card(category, get_severity_level(score), score,
+                             percentiles[category] if percentiles else None, f'report-{REPORT_VERSION}')
+        for category, score in scores.items()
+    )
+    return REPORT_PAGE.format(
+        global_severity=GLOBAL_SEVERITY_TEMPLATE.format(color=SEVERITY_COLORS[severity_level],
+                                                        severity=severity_level, avg_score=avg_score),
+        radar=radar_svg(scores),
+        bars=bar_svg(scores),
+        cards=cards,
+        recommendation=RECOMMENDATION_BLOCK_TEMPLATE.format(recommendation=get_recommendation(scores))
+    )
+
+
+def build_report(job: Dict) -> str:
+    """Worker entry point: render the report and atomically write it to ``job['path']``."""
+    html = render_report_html(job['scores'], job['percentiles'])
+    tmp_path = f"{job['path']}.{os.getpid()}.tmp"
+    if job['format'] == 'pdf':
+        from weasyprint import HTML
+        HTML(string=html).write_pdf(tmp_path)
+    else:
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(html)
+    os.replace(tmp_path, job['path'])
+    return job['path']
+
+
+class ReportExporter:
+    """Process-pool report builder with a content-addressed file cache."""
+
+    def __init__(self, cache_dir: str = REPORTS_DIR, workers: int = 2):
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self._pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._jobs: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def handle(self, fmt: str, scores: Dict[str, float], percentiles: Optional[Dict[str, int]] = None) -> str:
+        """Content address of a report: the same inputs always give the same handle."""
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato de relatório indisponível: {fmt}")
+        key = json.dumps([REPORT_VERSION, fmt, scores, percentiles], sort_keys=True)
+        return f"{hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]}.{fmt}"
+
+    def path(self, handle: str) -> str:
+        return os.path.join(self.cache_dir, handle)
+
+    def _executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned workers: forking the multi-threaded Streamlit server is not safe
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._pool
+
+    def _prune(self):
+        """Forget built reports (their file is the record) and all but the latest failures (lock held)."""
+        failed = []
+        for handle, job in list(self._jobs.items()):
+            if job.done():
+                if job.cancelled() or job.exception() is None:
+                    del self._jobs[handle]
+                else:
+                    failed.append(handle)
+        for handle in failed[:max(0, len(failed) - FAILED_JOBS_KEPT)]:
+            del self._jobs[handle]
+
+    def submit(self, fmt: str, scores: Dict[str, float], percentiles: Optional[Dict[str, int]] = None) -> str:
+        """Queue a report unless it is cached or already being built; returns its handle."""
+        handle = self.handle(fmt, scores, percentiles)
+        with self._lock:
+            job = self._jobs.get(handle)
+            if os.path.exists(self.path(handle)) or (job is not None and not job.done()):
+                return handle
+            self._prune()
+            payload = {'format': fmt, 'scores': scores, 'percentiles': percentiles, 'path': self.path(handle)}
+            try:
+                self._jobs[handle] = self._executor().submit(build_report, payload)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); start a fresh pool
+                self._pool = None
+                self._jobs[handle] = self._executor().submit(build_report, payload)
+        return handle
+
+    def status(self, handle: str) -> str:
+        """``ready``, ``pending``, ``failed`` or ``missing`` (never submitted, or evicted from the cache)."""
+        if os.path.exists(self.path(handle)):
+            return 'ready'
+        job = self._jobs.get(handle)
+        if job is None:
+            return 'missing'
+        if not job.done():
+            return 'pending'
+        return 'failed' if job.exception() is not None else 'missing'
+
+    def error(self, handle: str) -> Optional[str]:
+        job = self._jobs.get(handle)
+        if job is None or not job.done() or job.exception() is None:
+            return None
+        return f"{type(job.exception()).__name__}: {job.exception()}"
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+@functools.lru_cache(maxsize=None)
+def get_report_exporter() -> ReportExporter:
+    """Process-wide exporter: one worker pool per Streamlit process."""
+    return ReportExporter()
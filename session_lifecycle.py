@@ -0,0 +1,217 @@
+"""Idle-session eviction: funnel state of idle tabs goes to disk, and comes back on return.
+
+A parent can leave the tab open for hours after a few questions, and the
+worker keeps that session's state all along. Every rerun registers its
+Streamlit session here (``touch``); a background sweep then evicts:
+
+- sessions idle for longer than the idle budget (``SESSION_IDLE_BUDGET``
+  seconds, default 15 minutes);
+- while the worker's resident memory is above ``SESSION_MEMORY_CAP_MB``,
+  the least recently active sessions idle for at least ``MIN_IDLE``
+  seconds, a quarter of them per sweep.
+
+Evicting writes the funnel state (``SNAPSHOT_KEYS``: step, answers, mode,
+...) to ``SESSION_SNAPSHOT_DIR/<session>.json`` and removes it, with the
+transient values (``TRANSIENT_KEYS``), from the session. The tab stays
+connected and its page stays on screen; the next rerun's ``touch`` loads
+the snapshot back before the script reads any state, so the parent carries
+on where they stopped. Widget state is kept: a click on a form button
+still reaches its callback.
+
+The connection itself and Streamlit's per-session objects cannot be
+dropped while the tab is open (a closed websocket is reopened by the
+browser at once); they are released when the tab closes, and this sweep
+then forgets the session without writing a snapshot. Freed memory is
+reused by new sessions, so the memory cap bounds the worker's growth
+rather than shrinking its resident size.
+
+Counters (evictions by reason, restores, resident and evicted sessions)
+are exported with the funnel metrics (see ``metrics.py``).
+"""
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from metrics import resident_memory_bytes
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.environ.get('SESSION_SNAPSHOT_DIR', 'data/idle_sessions')
+IDLE_BUDGET = float(os.environ.get('SESSION_IDLE_BUDGET', str(15 * 60)))
+MEMORY_CAP = int(float(os.environ.get('SESSION_MEMORY_CAP_MB', '0')) * 1024 * 1024)  # 0: no cap
+MIN_IDLE = 60  # Seconds without a rerun before the memory cap may evict a session
+SNAPSHOT_RETENTION = 24 * 3600  # Snapshots of sessions that never came back are removed after this
+
+SNAPSHOT_KEYS = ('session_id', 'step', 'mode', 'content_version', 'answers', 'totals', 'recorded_answers')
+TRANSIENT_KEYS = ('validation_message',)
+
+
+def _encode(value):
+    if isinstance(value, (bytes, bytearray)):
+        return {type(value).__name__: value.hex()}
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if 'bytearray' in value:
+            return bytearray.fromhex(value['bytearray'])
+        if 'bytes' in value:
+            return bytes.fromhex(value['bytes'])
+    return value
+
+
+def _session_alive(session_id: str) -> bool:
+    """Whether Streamlit still has the session connected (always true outside a server)."""
+    from streamlit.runtime import Runtime
+
+    return not Runtime.exists() or Runtime.instance().is_active_session(session_id)
+
+
+class SessionLifecycle:
+    """Tracks session activity in this worker and evicts idle funnel state to disk."""
+
+    def __init__(self, snapshot_dir: str = SNAPSHOT_DIR, idle_budget: float = IDLE_BUDGET,
+                 memory_cap: int = MEMORY_CAP):
+        self.snapshot_dir = snapshot_dir
+        self.idle_budget = idle_budget
+        self.memory_cap = memory_cap
+        # Streamlit session id -> (last rerun, its session state)
+        self._sessions: Dict[str, Tuple[float, object]] = {}
+        # Evicted session id -> eviction time
+        self._evicted: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.counters = {'evicted_idle': 0, 'evicted_memory': 0, 'restored': 0}
+        os.makedirs(snapshot_dir, exist_ok=True)
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.snapshot_dir, f'{session_id}.json')
+
+    def touch(self, session_id: str, state) -> bool:
+        """Mark the session active, first restoring its evicted state; ``True`` if it was restored.
+
+        Call before anything reads the session's state in a rerun (or a callback).
+        """
+        with self._lock:
+            self._sessions[session_id] = (time.monotonic(), state)
+            if session_id not in self._evicted:
+                return False
+            del self._evicted[session_id]
+            try:
+                with open(self._path(session_id), 'r', encoding='utf-8') as file:
+                    saved = json.load(file)
+                os.remove(self._path(session_id))
+            except (OSError, ValueError):
+                logger.warning("Snapshot da sessão %s perdido; ela recomeça do início", session_id)
+                return False
+            for key, value in saved.items():
+                state[key] = _decode(value)
+            self.counters['restored'] += 1
+            return True
+
+    def _snapshot(self, session_id: str, state) -> Optional[bool]:
+        """Write one session's funnel state to disk (lock not held).
+
+        ``None`` if the tab had closed, otherwise whether a snapshot was written.
+        """
+        if not _session_alive(session_id):
+            return None
+        saved = {key: _encode(state[key]) for key in SNAPSHOT_KEYS if key in state}
+        if not saved:
+            return False
+        path = self._path(session_id)
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as file:
+            json.dump(saved, file)
+        os.replace(f'{path}.tmp', path)
+        return True
+
+    def _drop(self, session_id: str, state, reason: str, written: bool):
+        """Remove the snapshotted state from the session (lock held)."""
+        for key in SNAPSHOT_KEYS + TRANSIENT_KEYS:
+            if key in state:
+                del state[key]
+        if written:
+            self._evicted[session_id] = time.time()
+        self.counters[f'evicted_{reason}'] += 1
+
+    def _candidates(self, now: float) -> List[Tuple[str, object, str]]:
+        """Take the sessions over the idle budget, then over the memory cap, out of the active ones (lock held)."""
+        candidates = [(session_id, state, 'idle') for session_id, (seen, state) in self._sessions.items()
+                      if now - seen > self.idle_budget]
+        for session_id, _, _ in candidates:
+            del self._sessions[session_id]
+        if self.memory_cap and resident_memory_bytes() > self.memory_cap:
+            oldest = sorted((seen, session_id) for session_id, (seen, _) in self._sessions.items()
+                            if now - seen > MIN_IDLE)
+            for _, session_id in oldest[:max(1, len(self._sessions) // 4)]:
+                candidates.append((session_id, self._sessions.pop(session_id)[1], 'memory'))
+        return candidates
+
+    def sweep(self) -> List[str]:
+        """Evict what is over the idle budget, then over the memory cap; returns the evicted ids.
+
+        Snapshots are written without the lock, so reruns calling ``touch``
+        never wait on disk; a session touched meanwhile keeps its state.
+        """
+        with self._lock:
+            candidates = self._candidates(time.monotonic())
+        written = {session_id: self._snapshot(session_id, state) for session_id, state, _ in candidates}
+
+        evicted, stale = [], []
+        with self._lock:
+            for session_id, state, reason in candidates:
+                if written[session_id] is None:
+                    # Tab closed: Streamlit releases the state once nothing references it
+                    continue
+                if session_id in self._sessions:
+                    # Back while its snapshot was being written
+                    if written[session_id]:
+                        stale.append(session_id)
+                    continue
+                self._drop(session_id, state, reason, written[session_id])
+                evicted.append(session_id)
+            cutoff = time.time() - SNAPSHOT_RETENTION
+            for session_id in [s for s, at in self._evicted.items() if at < cutoff]:
+                del self._evicted[session_id]
+        for session_id in stale:
+            try:
+                os.remove(self._path(session_id))
+            except OSError:
+                pass
+        # Includes snapshots left by workers that have since stopped (the directory can be shared)
+        for entry in os.scandir(self.snapshot_dir):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+        return evicted
+
+    def start(self, interval: Optional[float] = None) -> 'SessionLifecycle':
+        """Sweep from a daemon thread, by default four times per idle budget (at most every minute)."""
+        interval = interval or min(60.0, self.idle_budget / 4)
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.sweep()
+                except Exception:
+                    logger.exception("Falha ao despejar sessões ociosas")
+
+        threading.Thread(target=run, name='session-lifecycle', daemon=True).start()
+        return self
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.counters, resident=len(self._sessions), evicted=len(self._evicted))
+
+
+@functools.lru_cache(maxsize=None)
+def get_lifecycle() -> SessionLifecycle:
+    """Process-wide lifecycle manager, sweeping in the background."""
+    return SessionLifecycle().start()
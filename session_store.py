@@ -0,0 +1,138 @@
+"""Shared funnel-session state for multi-worker deployments.
+
+With several app workers behind the launcher (see ``launcher.py``), a parent's
+progress must survive their websocket landing on another worker, after a
+crash or a recycle. Each session's resume token (``progress.encode_token``:
+step plus answers) is written under ``funnel:<sid>`` whenever it changes, and
+the session id travels in the URL as ``?sid=``, so whichever worker picks the
+session up restores it from the store.
+
+Stores speak a small Redis-shaped interface, ``get(key)``, ``set(key,
+value, ex=seconds)`` and ``delete(key)`` on ``bytes`` values, so a
+``redis.Redis`` client is a store as is. ``SESSION_STORE`` selects one:
+
+- ``sqlite:///data/sessions.db`` (default): a SQLite file (WAL mode) shared
+  by every worker on the box;
+- ``redis://host:6379/0``: a Redis server, or anything speaking its protocol
+  (needs the ``redis`` package);
+- ``memory``: a dict in this process, a stand-in for tests and single-worker
+  runs.
+
+Usage:
+    store = open_session_store('sqlite:///data/sessions.db')
+    store.set('funnel:abc', token.encode('ascii'), ex=SESSION_TTL)
+    store.get('funnel:abc')
+"""
+import functools
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+SESSION_STORE_URL = os.environ.get('SESSION_STORE', 'sqlite:///data/sessions.db')
+SESSION_TTL = int(os.environ.get('SESSION_TTL', str(7 * 24 * 3600)))  # Seconds a paused session stays resumable
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at);
+"""
+
+
+def session_key(sid: str) -> str:
+    return f'funnel:{sid}'
+
+
+class MemorySessionStore:
+    """In-process stand-in with the same interface (not shared between workers)."""
+
+    def __init__(self):
+        self._items: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[1] is not None and item[1] <= time.time():
+                del self._items[key]
+                return None
+            return item[0]
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._items[key] = (bytes(value), time.time() + ex if ex else None)
+        return True
+
+    def delete(self, key: str) -> int:
+        with self._lock:
+            return 1 if self._items.pop(key, None) is not None else 0
+
+
+class SQLiteSessionStore:
+    """Session store in a SQLite file, safe to share between worker processes."""
+
+    def __init__(self, path: str, purge_interval: float = 3600):
+        self.path = path
+        self.purge_interval = purge_interval
+        self._purged_at = 0.0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value FROM sessions WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)',
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO sessions (key, value, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at',
+                (key, bytes(value), now + ex if ex else None)
+            )
+            if now - self._purged_at > self.purge_interval:
+                self._purged_at = now
+                self._conn.execute('DELETE FROM sessions WHERE expires_at <= ?', (now,))
+        return True
+
+    def delete(self, key: str) -> int:
+        with self._lock:
+            return self._conn.execute('DELETE FROM sessions WHERE key = ?', (key,)).rowcount
+
+
+def open_session_store(url: str = SESSION_STORE_URL):
+    """Store for ``url``: ``sqlite:///path``, ``redis://...`` or ``memory``."""
+    if url == 'memory':
+        return MemorySessionStore()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("SESSION_STORE com Redis requer o pacote redis: pip install redis") from None
+        return redis.Redis.from_url(url)
+    if url.startswith('sqlite:///'):
+        return SQLiteSessionStore(url[len('sqlite:///'):])
+    raise ValueError(f"SESSION_STORE inválido: {url}")
+
+
+@functools.lru_cache(maxsize=None)
+def get_session_store():
+    """Process-wide store for ``SESSION_STORE``, shared by every session of the worker."""
+    return open_session_store()
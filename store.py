@@ -0,0 +1,183 @@
+"""Durable storage of completed assessments and leads.
+
+Records are written to SQLite (WAL mode) by a background thread that drains
+a bounded queue and commits in batches, so the results page only pays for a
+``queue.put``. Answers are stored as option indices packed into a ``BLOB``
+(one byte per question, ``0xFF`` for unanswered), not as the option text.
+
+The writer flushes everything still queued when the process exits, and
+``close()`` can be called to do the same explicitly. A batch that fails to
+commit (database locked past the timeout, disk full, ...) is logged and
+counted in ``dropped``; the writer carries on with the next one.
+
+The same transactions keep the population aggregates in ``analytics`` up to
+date: score histograms and severity mix per day, and funnel steps reached.
+"""
+import atexit
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import analytics
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.environ.get('ASSESSMENT_DB', 'data/assessments.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assessments (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL UNIQUE,
+    created_at REAL NOT NULL,
+    bank_version TEXT NOT NULL,
+    answers BLOB NOT NULL,
+    concentracao REAL NOT NULL,
+    impulsividade REAL NOT NULL,
+    hiperatividade REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leads (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    source TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS assessments_created_at ON assessments (created_at);
+"""
+
+UNANSWERED_BYTE = 0xFF
+
+
+def pack_answers(indices: Sequence[int]) -> bytes:
+    """Pack an option-index vector into one byte per question."""
+    return bytes(UNANSWERED_BYTE if i < 0 else i for i in indices)
+
+
+def unpack_answers(blob: bytes) -> List[int]:
+    """Inverse of ``pack_answers``."""
+    return [-1 if b == UNANSWERED_BYTE else b for b in blob]
+
+
+class AssessmentStore:
+    """SQLite-backed store with a bounded, batched background writer."""
+
+    def __init__(self, path: str = DB_PATH, max_queue: int = 10000, batch_size: int = 200,
+                 flush_interval: float = 0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._closed = threading.Event()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA + analytics.SCHEMA)
+
+        self._writer = threading.Thread(target=self._run, name='assessment-store-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _enqueue(self, item: Tuple) -> bool:
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            # Never block a page render on disk I/O; count what we lose instead
+            self.dropped += 1
+            return False
+
+    def record_assessment(self, session_id: str, bank_version: str, indices: Sequence[int],
+                          scores: dict) -> bool:
+        """Queue a completed assessment; returns ``False`` if the queue is full."""
+        return self._enqueue(('assessment', (
+            session_id, time.time(), bank_version, pack_answers(indices),
+            scores['concentracao'], scores['impulsividade'], scores['hiperatividade']
+        )))
+
+    def record_step(self, session_id: str, step: int) -> bool:
+        """Queue a funnel step reached by a session, for drop-off analytics."""
+        return self._enqueue(('step', (session_id, time.time(), step)))
+
+    def record_lead(self, session_id: str, source: str) -> bool:
+        """Queue a lead (a call-to-action click) linked to a session."""
+        return self._enqueue(('lead', (session_id, time.time(), source)))
+
+    def _write(self, conn: sqlite3.Connection, batch: List[Tuple]):
+        assessments = [row for kind, row in batch if kind == 'assessment']
+        leads = [row for kind, row in batch if kind == 'lead']
+        steps = [row for kind, row in batch if kind == 'step']
+        with conn:
+            if assessments:
+                analytics.apply_assessments(conn, assessments)
+                # A parent may go back and change answers; the latest submission wins
+                conn.executemany(
+                    'INSERT INTO assessments (session_id, created_at, bank_version, answers, '
+                    'concentracao, impulsividade, hiperatividade) VALUES (?, ?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT (session_id) DO UPDATE SET created_at = excluded.created_at, '
+                    'bank_version = excluded.bank_version, answers = excluded.answers, '
+                    'concentracao = excluded.concentracao, impulsividade = excluded.impulsividade, '
+                    'hiperatividade = excluded.hiperatividade',
+                    assessments
+                )
+            if leads:
+                conn.executemany('INSERT INTO leads (session_id, created_at, source) VALUES (?, ?, ?)', leads)
+            if steps:
+                analytics.apply_steps(conn, steps)
+
+    def _flush(self, conn: sqlite3.Connection, batch: List[Tuple]):
+        try:
+            self._write(conn, batch)
+        except Exception:
+            logger.exception("Falha ao gravar %d registros de avaliação", len(batch))
+            self.dropped += len(batch)
+
+    def _drain(self, first: Optional[Tuple] = None) -> List[Tuple]:
+        batch = [first] if first is not None else []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = self._connect()
+        while not self._closed.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._flush(conn, self._drain(first))
+        # Durable flush of whatever is still queued at shutdown
+        while True:
+            batch = self._drain()
+            if not batch:
+                break
+            self._flush(conn, batch)
+        try:
+            conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        except sqlite3.Error:
+            logger.exception("Falha no checkpoint final do banco de avaliações")
+        conn.close()
+
+    def close(self, timeout: float = 10):
+        """Stop the writer after flushing every queued record."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._writer.join(timeout)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
@@ -0,0 +1,209 @@
+"""Synthetic assessment responses at scale, for benchmarks, load tests and fixtures.
+
+Answers come from a latent-trait model over ``questions.json``, sampled as
+NumPy matrices one chunk at a time:
+
+- every respondent has a latent severity per category, normally
+  distributed around ``--severity`` (in standard deviations, 0 = typical)
+  and correlated across categories by ``--between``;
+- each answer is that category's severity, plus noise of its own, cut into
+  the question's options ordered by weight: questions of one category are
+  correlated by ``--within`` (the share of an answer's variance that comes
+  from the category), and a typical respondent answers the low end most;
+- questions with descriptive options instead of the frequency scale (ids
+  6, 11 and 16 in the current bank) lean ``--custom-skew`` standard
+  deviations toward their heavier options;
+- ``--missing`` leaves that fraction of answers unanswered.
+
+Output is chosen by extension and written chunk by chunk, so memory is
+bounded by ``--chunk-size`` whatever ``-n`` is:
+
+- ``.csv`` and ``.jsonl``: the layouts ``batch_score.py`` reads (option
+  text, empty or absent when unanswered);
+- ``.npy``: an (assessments x questions) ``int8`` matrix of option indices
+  in bank order, ``-1`` for unanswered, ready for
+  ``QuestionBank.score_matrix`` (open with ``mmap_mode='r'``);
+- ``.parquet``: one ``int8`` option-index column per question id, null when
+  unanswered (needs ``pyarrow``).
+
+Usage:
+    python synth.py -n 1000000 -o respostas.csv
+    python synth.py -n 5000000 -o respostas.npy --severity concentracao=1.0 --within 0.6
+    python synth.py -n 100000 -o respostas.jsonl --missing 0.02 --seed 7
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from question_bank import UNANSWERED
+from utils import CATEGORIES, OPTION_WEIGHTS, validate_questions
+
+# Latent cut points spread over this range; with 4 options a typical respondent
+# answers about 40% / 32% / 20% / 8% from the lightest option up
+CUT_RANGE = (-0.25, 1.4)
+
+
+def custom_question_ids(questions: List[Dict]) -> List[int]:
+    """Questions whose options differ from the bank's usual scale."""
+    usual = Counter(tuple(q['options']) for q in questions).most_common(1)[0][0]
+    return [q['id'] for q in questions if tuple(q['options']) != usual]
+
+
+class SyntheticGenerator:
+    """Vectorized sampler of option-index matrices for one question bank."""
+
+    def __init__(self, questions: List[Dict], severity: Optional[Dict[str, float]] = None, within: float = 0.5,
+                 between: float = 0.4, custom_skew: float = 0.5, missing: float = 0.0):
+        validate_questions(questions)
+        if not 0 <= within <= 1 or not 0 <= between < 1 or not 0 <= missing < 1:
+            raise ValueError("--within deve estar em [0, 1], --between e --missing em [0, 1)")
+        unknown = set(severity or {}) - set(CATEGORIES)
+        if unknown:
+            raise ValueError(f"Categorias desconhecidas: {', '.join(sorted(unknown))}")
+        self.questions = questions
+        self.within = within
+        self.missing = missing
+        self.category = np.array([CATEGORIES.index(q['category']) for q in questions])
+        self.mean = np.array([(severity or {}).get(c, 0.0) for c in CATEGORIES])
+        # Cross-category correlation of the latent severities
+        correlation = np.full((len(CATEGORIES), len(CATEGORIES)), between)
+        np.fill_diagonal(correlation, 1.0)
+        self.cholesky = np.linalg.cholesky(correlation)
+
+        custom = set(custom_question_ids(questions))
+        self.shift = np.array([custom_skew if q['id'] in custom else 0.0 for q in questions])
+        n_options = max(len(q['options']) for q in questions)
+        if any(len(q['options']) != n_options for q in questions):
+            raise ValueError("Todas as perguntas devem ter o mesmo número de opções")
+        self.cuts = np.linspace(*CUT_RANGE, n_options - 1)
+        # Level k (0 = lightest) -> option index, per question
+        self.by_weight = np.array([
+            sorted(range(n_options), key=lambda i: OPTION_WEIGHTS[q['options'][i]]) for q in questions
+        ], dtype=np.int8)
+
+    def sample(self, n: int, rng: np.random.Generator) -> np.ndarray:
+        """``n`` synthetic assessments as an (n x questions) ``int8`` option-index matrix."""
+        latent = self.mean + rng.standard_normal((n, len(CATEGORIES))) @ self.cholesky.T
+        answers = (np.sqrt(self.within) * latent[:, self.category]
+                   + np.sqrt(1 - self.within) * rng.standard_normal((n, len(self.questions)))
+                   + self.shift)
+        levels = np.digitize(answers, self.cuts)
+        indices = self.by_weight[np.arange(len(self.questions)), levels]
+        if self.missing:
+            indices[rng.random(indices.shape) < self.missing] = UNANSWERED
+        return indices
+
+
+def _text_cells(questions: List[Dict], fmt: str) -> List[np.ndarray]:
+    """Per question, the serialized cell for each option index (the last entry is unanswered)."""
+    cells = []
+    for q in questions:
+        if fmt == 'csv':
+            options = [f'"{o}"' if any(c in o for c in ',"\n') else o for o in (o.replace('"', '""') for o in q['options'])]
+            cells.append(np.array(options + [''], dtype=object))
+        else:
+            options = [f'{json.dumps(str(q["id"]))}: {json.dumps(o, ensure_ascii=False)}' for o in q['options']]
+            cells.append(np.array(options + [None], dtype=object))
+    return cells
+
+
+def write(path: str, n: int, generator: SyntheticGenerator, chunk_size: int = 100000, seed: Optional[int] = None) -> int:
+    """Stream ``n`` synthetic assessments to ``path``; returns the number written."""
+    rng = np.random.default_rng(seed)
+    questions = generator.questions
+    ext = os.path.splitext(path)[1].lower()
+    ids = [str(q['id']) for q in questions]
+
+    if ext == '.npy':
+        matrix = np.lib.format.open_memmap(path, mode='w+', dtype=np.int8, shape=(n, len(questions)))
+        for start in range(0, n, chunk_size):
+            matrix[start:start + chunk_size] = generator.sample(min(chunk_size, n - start), rng)
+        matrix.flush()
+        del matrix
+        return n
+
+    if ext == '.parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("A saída .parquet requer o pyarrow: pip install pyarrow") from None
+        schema = pa.schema([('id', pa.int64())] + [(qid, pa.int8()) for qid in ids])
+        with pq.ParquetWriter(path, schema) as writer:
+            for start in range(0, n, chunk_size):
+                indices = generator.sample(min(chunk_size, n - start), rng)
+                columns = [pa.array(np.arange(start + 1, start + len(indices) + 1))]
+                columns += [pa.array(indices[:, i], mask=indices[:, i] == UNANSWERED) for i in range(len(ids))]
+                writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+        return n
+
+    if ext not in ('.csv', '.jsonl', '.ndjson'):
+        raise ValueError(f"Formato de saída não suportado: {ext} (use .csv, .jsonl, .npy ou .parquet)")
+    fmt = 'csv' if ext == '.csv' else 'jsonl'
+    cells = _text_cells(questions, fmt)
+    with open(path, 'w', encoding='utf-8', newline='') as out:
+        if fmt == 'csv':
+            out.write(','.join(['id'] + ids) + '\n')
+        for start in range(0, n, chunk_size):
+            indices = generator.sample(min(chunk_size, n - start), rng)
+            # Unanswered (-1) picks each question's last cell
+            columns = [cells[i][indices[:, i]] for i in range(len(questions))]
+            rows = np.column_stack(columns).tolist()
+            if fmt == 'csv':
+                out.write(''.join(f'{start + k + 1},{",".join(row)}\n' for k, row in enumerate(rows)))
+            else:
+                out.write(''.join(
+                    f'{{"id": "{start + k + 1}", "responses": {{{", ".join(c for c in row if c is not None)}}}}}\n'
+                    for k, row in enumerate(rows)
+                ))
+    return n
+
+
+def parse_severity(values: List[str]) -> Dict[str, float]:
+    severity = {}
+    for value in values:
+        category, _, level = value.partition('=')
+        try:
+            severity[category.strip()] = float(level)
+        except ValueError:
+            raise ValueError(f"--severity inválido: {value!r} (use categoria=desvios, ex. concentracao=1.0)") from None
+    return severity
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Gera avaliações sintéticas a partir do banco de perguntas.")
+    parser.add_argument('-n', '--count', type=int, required=True, help="Número de avaliações")
+    parser.add_argument('-o', '--output', required=True, help="Arquivo de saída (.csv, .jsonl, .npy ou .parquet)")
+    parser.add_argument('--questions', default='data/questions.json', help="Banco de perguntas")
+    parser.add_argument('--severity', action='append', default=[], metavar='CATEGORIA=DESVIOS',
+                        help="Severidade latente média de uma categoria, em desvios-padrão (padrão: 0)")
+    parser.add_argument('--within', type=float, default=0.5,
+                        help="Correlação entre respostas da mesma categoria (padrão: 0.5)")
+    parser.add_argument('--between', type=float, default=0.4,
+                        help="Correlação entre as severidades das categorias (padrão: 0.4)")
+    parser.add_argument('--custom-skew', type=float, default=0.5,
+                        help="Desvio das perguntas de opções descritivas rumo às opções mais pesadas (padrão: 0.5)")
+    parser.add_argument('--missing', type=float, default=0.0, help="Fração de respostas em branco (padrão: 0)")
+    parser.add_argument('--chunk-size', type=int, default=100000, help="Avaliações por bloco (padrão: 100000)")
+    parser.add_argument('--seed', type=int, help="Semente para resultados reproduzíveis")
+    args = parser.parse_args(argv)
+
+    with open(args.questions, 'r', encoding='utf-8') as file:
+        questions = json.load(file)['questions']
+    generator = SyntheticGenerator(questions, parse_severity(args.severity), args.within, args.between,
+                                   args.custom_skew, args.missing)
+    started = time.perf_counter()
+    written = write(args.output, args.count, generator, args.chunk_size, args.seed)
+    elapsed = time.perf_counter() - started
+    print(f"{written} avaliações em {elapsed:.1f} s ({written / elapsed * 60 / 1e6:.1f} milhões/min) -> {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""Funnel event telemetry, emitted without blocking the rerun.
+
+``main.py`` emits one event per funnel action: ``step_entered``,
+``answer_selected``, ``back_pressed``, ``results_viewed`` and
+``cta_clicked``. ``emit`` only appends a tuple to an in-process deque (no
+lock on the default policy); a background thread drains it in batches to a
+sink:
+
+- ``jsonl:///data/events.jsonl`` (default): one JSON object per line,
+  rotated at ``TELEMETRY_MAX_BYTES`` with ``TELEMETRY_BACKUPS`` old files
+  kept (``events.jsonl.1``, ...); under ``launcher.py`` each worker writes
+  its own file (``events.0.jsonl``, ``events.1.jsonl``, ...), since
+  processes cannot share a rotation;
+- ``sqlite:///data/events.db``: an ``events`` table;
+- ``off``: nothing is recorded.
+
+When the sink falls behind and the queue holds ``TELEMETRY_QUEUE`` events,
+``TELEMETRY_POLICY`` decides:
+
+- ``drop_newest`` (default): the new event is dropped;
+- ``drop_oldest``: the oldest queued event makes room for it;
+- ``block``: the rerun waits up to ``TELEMETRY_BLOCK_TIMEOUT`` seconds
+  for room, then drops the new event.
+
+Dropped events are counted and exported with the funnel metrics.
+
+Usage:
+    TELEMETRY_SINK=sqlite:///data/events.db streamlit run main.py
+    python telemetry.py bench --events 200000                # emit cost per policy, in µs
+    python telemetry.py bench --rate 20000 --sink sqlite     # at a rate the sink keeps up with
+"""
+import argparse
+import atexit
+import collections
+import functools
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TELEMETRY_SINK = os.environ.get('TELEMETRY_SINK', 'jsonl:///data/events.jsonl')
+POLICIES = ('drop_newest', 'drop_oldest', 'block')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    created_at REAL NOT NULL,
+    session_id TEXT NOT NULL,
+    event TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS events_created_at ON events (created_at);
+"""
+
+Event = Tuple[float, str, str, int, Optional[str]]
+
+
+class JsonlSink:
+    """Appends events as JSON lines, rotating the file once it reaches ``max_bytes``."""
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, backups: int = 5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f'{self.path}.{i}'):
+                os.replace(f'{self.path}.{i}', f'{self.path}.{i + 1}')
+        if self.backups:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def write(self, batch: List[Event]):
+        self._file.write(''.join(
+            json.dumps({'created_at': created_at, 'session_id': session_id, 'event': event, 'step': step,
+                        'detail': detail}, ensure_ascii=False) + '\n'
+            for created_at, session_id, event, step, detail in batch
+        ))
+        self._file.flush()
+        if self._file.tell() >= self.max_bytes:
+            self._rotate()
+
+    def close(self):
+        self._file.close()
+
+
+class SQLiteSink:
+    """Inserts events into the ``events`` table, one transaction per batch."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+
+    def write(self, batch: List[Event]):
+        with self._conn:
+            self._conn.executemany('INSERT INTO events (created_at, session_id, event, step, detail) '
+                                   'VALUES (?, ?, ?, ?, ?)', batch)
+
+    def close(self):
+        self._conn.close()
+
+
+def open_sink(url: str = TELEMETRY_SINK):
+    """Sink for ``url``: ``jsonl:///path``, ``sqlite:///path`` or ``off`` (``None``)."""
+    if url == 'off':
+        return None
+    if url.startswith('jsonl:///'):
+        return JsonlSink(url[len('jsonl:///'):], int(os.environ.get('TELEMETRY_MAX_BYTES', str(50 * 1024 * 1024))),
+                         int(os.environ.get('TELEMETRY_BACKUPS', '5')))
+    if url.startswith('sqlite:///'):
+        return SQLiteSink(url[len('sqlite:///'):])
+    raise ValueError(f"TELEMETRY_SINK inválido: {url}")
+
+
+def worker_sink_url(url: str, index: int) -> str:
+    """Sink URL for worker ``index`` of a multi-worker deployment: one JSONL file per worker."""
+    if url.startswith('jsonl:///'):
+        root, ext = os.path.splitext(url)
+        return f'{root}.{index}{ext}'
+    return url
+
+
+class Telemetry:
+    """Bounded event queue drained by a background flusher."""
+
+    def __init__(self, sink, max_queue: int = 10000, policy: str = 'drop_newest', batch_size: int = 500,
+                 flush_interval: float = 1.0, block_timeout: float = 0.05):
+        if policy not in POLICIES:
+            raise ValueError(f"TELEMETRY_POLICY inválida: {policy} (use {', '.join(POLICIES)})")
+        self.sink = sink
+        self.max_queue = max_queue
+        self.policy = policy
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self.emitted = 0
+        self.dropped = 0
+        self.written = 0
+        # drop_oldest lets the deque discard from the left by itself
+        self._queue: collections.deque = collections.deque(maxlen=max_queue if policy == 'drop_oldest' else None)
+        self._wake = threading.Event()
+        self._room = threading.Condition()
+        self._closed = threading.Event()
+
+        self._flusher = threading.Thread(target=self._run, name='telemetry-flusher', daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def emit(self, event: str, session_id: str, step: int, detail: Optional[str] = None):
+        """Queue one event; never waits on the sink (except briefly under the ``block`` policy)."""
+        queue = self._queue
+        if len(queue) >= self.max_queue:
+            if self.policy == 'drop_newest' or (self.policy == 'block' and not self._wait_for_room()):
+                self.dropped += 1
+                return
+            if self.policy == 'drop_oldest':
+                self.dropped += 1
+        queue.append((time.time(), session_id, event, step, detail))
+        self.emitted += 1
+        if len(queue) >= self.batch_size:
+            self._wake.set()
+
+    def _wait_for_room(self) -> bool:
+        self._wake.set()
+        with self._room:
+            return self._room.wait_for(lambda: len(self._queue) < self.max_queue, self.block_timeout)
+
+    def _drain(self) -> List[Event]:
+        batch = []
+        popleft = self._queue.popleft
+        try:
+            while len(batch) < self.batch_size:
+                batch.append(popleft())
+        except IndexError:
+            pass
+        return batch
+
+    def _flush(self):
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            try:
+                if self.sink is not None:
+                    self.sink.write(batch)
+                self.written += len(batch)
+            except Exception:
+                logger.exception("Falha ao gravar %d eventos de telemetria", len(batch))
+                self.dropped += len(batch)
+            if self.policy == 'block':
+                with self._room:
+                    self._room.notify_all()
+
+    def _run(self):
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._flush()
+        # Whatever is still queued at shutdown
+        self._flush()
+        if self.sink is not None:
+            self.sink.close()
+
+    def close(self, timeout: float = 10):
+        """Stop the flusher after writing every queued event."""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._wake.set()
+        self._flusher.join(timeout)
+
+    def pending(self) -> int:
+        return len(self._queue)
+
+
+@functools.lru_cache(maxsize=None)
+def get_telemetry() -> Telemetry:
+    """Process-wide pipeline, configured from the environment."""
+    return Telemetry(
+        open_sink(),
+        max_queue=int(os.environ.get('TELEMETRY_QUEUE', '10000')),
+        policy=os.environ.get('TELEMETRY_POLICY', 'drop_newest'),
+        block_timeout=float(os.environ.get('TELEMETRY_BLOCK_TIMEOUT', '0.05'))
+    )
+
+
+def bench(events: int, sink_kind: str, policy: str, rate: float = 0) -> dict:
+    """Emit ``events`` events, ``rate`` per second (0: as fast as possible), and time each call."""
+    import statistics
+    import tempfile
+
+    directory = tempfile.mkdtemp()
+    sink = open_sink(f'{sink_kind}:///{directory}/events.{sink_kind}') if sink_kind != 'off' else None
+    telemetry = Telemetry(sink, policy=policy)
+    timer = time.perf_counter_ns
+    costs = []
+    began = time.perf_counter()
+    for i in range(events):
+        if rate and i % 100 == 0:
+            time.sleep(max(0.0, began + i / rate - time.perf_counter()))
+        start = timer()
+        telemetry.emit('answer_selected', 'bench', i % 20 + 1, '7:2')
+        costs.append(timer() - start)
+    started = time.perf_counter()
+    telemetry.close()
+    cuts = statistics.quantiles(costs, n=100)
+    return {
+        'sink': sink_kind,
+        'policy': policy,
+        'mean_us': statistics.fmean(costs) / 1000,
+        'p50_us': cuts[49] / 1000,
+        'p99_us': cuts[98] / 1000,
+        'dropped': telemetry.dropped,
+        'written': telemetry.written,
+        'final_flush_s': time.perf_counter() - started
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mede o custo de emitir eventos de telemetria do funil.")
+    parser.add_argument('command', choices=('bench',))
+    parser.add_argument('--events', type=int, default=200000, help="Eventos por política (padrão: 200000)")
+    parser.add_argument('--sink', choices=('jsonl', 'sqlite', 'off'), default='jsonl',
+                        help="Destino dos eventos (padrão: jsonl)")
+    parser.add_argument('--rate', type=float, default=0,
+                        help="Eventos por segundo (padrão: 0, o mais rápido possível, saturando a fila)")
+    args = parser.parse_args(argv)
+
+    for policy in POLICIES:
+        result = bench(args.events, args.sink, policy, args.rate)
+        print(f"{result['policy']:12s} média {result['mean_us']:.2f} µs  p50 {result['p50_us']:.2f} µs  "
+              f"p99 {result['p99_us']:.2f} µs  descartados {result['dropped']}  gravados {result['written']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
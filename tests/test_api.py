@@ -0,0 +1,90 @@
+"""Request validation of the scoring service: bad input is a 400 with ``{"error": ...}``, never a 500."""
+import asyncio
+import json
+import os
+
+import pytest
+
+import api
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch):
+    # The content registry reads data/ relative to the working directory, as the service does
+    monkeypatch.chdir(ROOT)
+
+
+def call(path: str, body: bytes, method: str = 'POST'):
+    """Run one request through the ASGI app; returns (status, decoded JSON body)."""
+    messages = [{'type': 'http.request', 'body': body}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(api.app({'type': 'http', 'path': path, 'method': method}, receive, send))
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+
+def post(path: str, payload) -> tuple:
+    return call(path, json.dumps(payload).encode('utf-8'))
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/recommendation', b'{"scores": {"concentracao": NaN}}'),
+    ('/recommendation', b'{"scores": {"concentracao": Infinity, "impulsividade": 10}}'),
+    ('/recommendation', b'{"batch": [{"concentracao": -Infinity}]}'),
+    ('/severity', b'{"score": NaN}'),
+    ('/severity', b'{"batch": [10, Infinity]}'),
+    ('/severity', b'{"score": 1' + b'0' * 400 + b'}'),
+])
+def test_non_finite_scores_are_rejected(path, body):
+    status, payload = call(path, body)
+    assert status == 400
+    assert 'finitos' in payload['error']
+
+
+@pytest.mark.parametrize('path, payload', [
+    ('/score', {'responses': {'1': ['Raramente']}}),
+    ('/score', {'batch': [{'1': {}}]}),
+    ('/score', {'responses': {'x': 'Raramente'}}),
+    ('/score', {'responses': {'1': 'Talvez'}}),
+    ('/score', {'responses': []}),
+    ('/score', {'batch': {}}),
+    ('/feedback', {'question_id': [6], 'response': 'Abandona a atividade'}),
+    ('/feedback', {'question_id': 6, 'response': {}}),
+    ('/feedback', {'question_id': 999, 'response': 'Raramente'}),
+    ('/severity', {'score': '72'}),
+    ('/severity', {'score': True}),
+    ('/recommendation', {'scores': {}}),
+])
+def test_invalid_requests_are_400(path, payload):
+    status, body = post(path, payload)
+    assert status == 400
+    assert isinstance(body['error'], str)
+
+
+def test_malformed_body_and_routing():
+    assert call('/score', b'{not json')[0] == 400
+    assert call('/score', b'[1, 2]')[0] == 400
+    assert call('/nope', b'{}')[0] == 404
+    assert call('/score', b'', method='GET')[0] == 405
+    assert call('/score', b'{"batch": [' + b'{},' * api.MAX_BATCH + b'{}]}')[0] == 413
+
+
+def test_valid_requests():
+    status, body = post('/severity', {'score': 72.5})
+    assert (status, body) == (200, {'severity': 'Alto'})
+
+    status, body = post('/recommendation', {'scores': {'concentracao': 90.0, 'impulsividade': 80.0}})
+    assert status == 200 and 'concentracao (90.0%)' in body['recommendation']
+
+    status, body = post('/score', {'batch': [{'1': 'Sempre'}, {}]})
+    assert status == 200
+    assert body['results'][0]['concentracao'] > 0
+    assert body['results'][1] == {'concentracao': 0.0, 'impulsividade': 0.0, 'hiperatividade': 0.0}
@@ -0,0 +1,28 @@
+"""Affinity key and worker choice of the sticky balancer (``launcher.py``)."""
+from launcher import Worker, client_key, rendezvous_order
+
+HEAD = (b'GET /_stcore/stream HTTP/1.1\r\nHost: example.org\r\n'
+        b'X-Forwarded-For: 203.0.113.7, 10.0.0.2\r\n\r\n')
+
+
+def test_forwarded_for_is_ignored_by_default():
+    assert client_key(HEAD, '10.0.0.2') == '10.0.0.2'
+
+
+def test_forwarded_for_is_used_behind_a_trusted_proxy():
+    assert client_key(HEAD, '10.0.0.2', trust_proxy=True) == '203.0.113.7'
+
+
+def test_trusted_proxy_without_header_falls_back_to_peer():
+    head = b'GET / HTTP/1.1\r\nHost: example.org\r\n\r\nX-Forwarded-For: 198.51.100.1'
+    assert client_key(head, '10.0.0.2', trust_proxy=True) == '10.0.0.2'
+
+
+def test_only_clients_of_a_removed_worker_move():
+    workers = [Worker(i, 8600 + i) for i in range(4)]
+    keys = [f'198.51.100.{i}' for i in range(200)]
+    before = {key: rendezvous_order(key, workers)[0] for key in keys}
+    remaining = [worker for worker in workers if worker.index != 1]
+    for key in keys:
+        if before[key].index != 1:
+            assert rendezvous_order(key, remaining)[0] is before[key]
@@ -0,0 +1,39 @@
+"""Session gauge of ``metrics.Metrics``: sessions unseen for ``SESSION_TTL`` are dropped, scraped or not."""
+import metrics
+from metrics import SESSION_TTL, Metrics
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_reruns_prune_expired_sessions(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(metrics.time, 'time', clock)
+    m = Metrics()
+    for i in range(1000):
+        m.begin_rerun(f'old-{i}')
+    m.begin_rerun('returning')
+    clock.now += SESSION_TTL / 2
+    m.begin_rerun('returning')
+    clock.now += SESSION_TTL / 2 + 1
+
+    # No scrape in between: the next rerun alone drops everything unseen for a TTL
+    m.begin_rerun('new')
+    assert list(m.sessions) == ['returning', 'new']
+    assert m.active_sessions() == 2
+
+
+def test_active_sessions_expire_without_reruns(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(metrics.time, 'time', clock)
+    m = Metrics()
+    m.begin_rerun('a')
+    m.begin_rerun('b')
+    assert m.active_sessions() == 2
+    clock.now += SESSION_TTL + 1
+    assert m.active_sessions() == 0
@@ -0,0 +1,73 @@
+"""Running totals (``progress.ScoreTable``) against a full recompute."""
+import json
+import os
+import random
+
+import pytest
+
+from progress import ScoreTable, new_answers
+from question_bank import QuestionBank
+from store import UNANSWERED_BYTE
+from utils import CATEGORIES, OPTION_WEIGHTS
+
+QUESTIONS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'questions.json')
+
+with open(QUESTIONS_PATH, 'r', encoding='utf-8') as file:
+    QUESTIONS = json.load(file)['questions']
+
+
+def random_bank(rng: random.Random):
+    """A bank of random size, categories and option sets (weights from ``OPTION_WEIGHTS``)."""
+    options = list(OPTION_WEIGHTS)
+    questions = []
+    for qid in range(1, rng.randint(len(CATEGORIES), 30) + 1):
+        category = CATEGORIES[qid - 1] if qid <= len(CATEGORIES) else rng.choice(CATEGORIES)
+        questions.append({'id': qid, 'category': category, 'text': f'Pergunta {qid}',
+                          'options': rng.sample(options, rng.randint(2, min(6, len(options))))})
+    return questions
+
+
+def check(table: ScoreTable, bank: QuestionBank, questions, answers: bytearray, totals):
+    assert totals == table.totals(answers)
+    responses = {q['id']: q['options'][index] for q, index in zip(questions, answers) if index != UNANSWERED_BYTE}
+    # Same integer totals and the same division as the NumPy scorer, so equal to the last bit
+    assert table.scores(totals) == bank.score(responses)
+
+
+def run_sequence(questions, rng: random.Random, steps: int):
+    """Answer, change, clear and re-answer at random, checking the totals after every step."""
+    table = ScoreTable(questions)
+    bank = QuestionBank(questions)
+    answers = new_answers(questions)
+    totals = table.totals(answers)
+    check(table, bank, questions, answers, totals)
+    for _ in range(steps):
+        position = rng.randrange(len(questions))
+        old = answers[position]
+        if old != UNANSWERED_BYTE and rng.random() < 0.2:
+            new = UNANSWERED_BYTE
+        else:
+            new = rng.randrange(len(questions[position]['options']))
+        table.apply(totals, position, old, new)
+        answers[position] = new
+        check(table, bank, questions, answers, totals)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_running_totals_match_recompute(seed):
+    run_sequence(QUESTIONS, random.Random(seed), steps=200)
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_running_totals_match_recompute_random_bank(seed):
+    rng = random.Random(seed)
+    run_sequence(random_bank(rng), rng, steps=100)
+
+
+def test_same_answer_again_keeps_totals():
+    table = ScoreTable(QUESTIONS)
+    answers = new_answers(QUESTIONS)
+    answers[0] = 2
+    totals = table.totals(answers)
+    table.apply(totals, 0, 2, 2)
+    assert totals == table.totals(answers)
@@ -0,0 +1,104 @@
+"""Batched assessment writer (``store.AssessmentStore``): what is queued reaches SQLite, and a failed batch is not fatal."""
+import sqlite3
+import threading
+import time
+
+import analytics
+from store import AssessmentStore, pack_answers, unpack_answers
+
+SCORES = {'concentracao': 50.0, 'impulsividade': 25.0, 'hiperatividade': 75.0}
+
+
+def rows(path, query):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(query).fetchall()
+    finally:
+        conn.close()
+
+
+def test_pack_round_trip():
+    indices = [0, 3, -1, 2, -1]
+    assert pack_answers(indices) == b'\x00\x03\xff\x02\xff'
+    assert unpack_answers(pack_answers(indices)) == indices
+
+
+def test_queued_records_are_written_in_batches(tmp_path):
+    path = str(tmp_path / 'assessments.db')
+    store = AssessmentStore(path, batch_size=7, flush_interval=0.05)
+    for i in range(50):
+        assert store.record_assessment(f's{i}', 'v1', [i % 4, -1], SCORES)
+        assert store.record_step(f's{i}', 3)
+    assert store.record_lead('s1', 'cta')
+    store.close()
+
+    assert store.pending() == 0 and store.dropped == 0
+    assert rows(path, 'SELECT COUNT(*) FROM assessments') == [(50,)]
+    assert rows(path, "SELECT answers FROM assessments WHERE session_id = 's5'") == [(b'\x01\xff',)]
+    assert rows(path, 'SELECT session_id, source FROM leads') == [('s1', 'cta')]
+    conn = sqlite3.connect(path)
+    assert analytics.summary(conn)['assessments'] == 50
+    conn.close()
+
+
+def test_resubmission_replaces_the_assessment(tmp_path):
+    path = str(tmp_path / 'assessments.db')
+    store = AssessmentStore(path, flush_interval=0.05)
+    store.record_assessment('s', 'v1', [0, 0], SCORES)
+    store.record_assessment('s', 'v1', [3, 3], dict(SCORES, concentracao=90.0))
+    store.close()
+    assert rows(path, 'SELECT answers, concentracao FROM assessments') == [(b'\x03\x03', 90.0)]
+
+
+def test_failed_batch_is_dropped_and_the_writer_keeps_going(tmp_path, caplog):
+    path = str(tmp_path / 'assessments.db')
+    store = AssessmentStore(path, flush_interval=0.05)
+    write = store._write
+    failed = threading.Event()
+
+    def flaky(conn, batch):
+        if not failed.is_set():
+            failed.set()
+            raise sqlite3.OperationalError('database is locked')
+        write(conn, batch)
+
+    store._write = flaky
+    store.record_lead('lost', 'cta')
+    assert failed.wait(5)
+    store.record_lead('kept', 'cta')
+    store.close()
+
+    assert store.dropped == 1
+    assert rows(path, 'SELECT session_id FROM leads') == [('kept',)]
+    assert 'Falha ao gravar 1 registros' in caplog.text
+
+
+def test_failing_shutdown_flush_does_not_escape_close(tmp_path):
+    path = str(tmp_path / 'assessments.db')
+    store = AssessmentStore(path, flush_interval=0.05)
+    write = store._write
+    writing, release = threading.Event(), threading.Event()
+
+    def first_ok_then_broken(conn, batch):
+        if not writing.is_set():
+            # Hold the writer in its first batch until close() has been requested
+            writing.set()
+            release.wait(5)
+            write(conn, batch)
+            return
+        raise sqlite3.OperationalError('disk I/O error')
+
+    store._write = first_ok_then_broken
+    store.record_lead('first', 'cta')
+    assert writing.wait(5)
+    store.record_lead('second', 'cta')  # Still queued when the writer stops: written by the shutdown flush
+    closer = threading.Thread(target=store.close)
+    closer.start()
+    while not store._closed.is_set():
+        time.sleep(0.01)
+    release.set()
+    closer.join(10)
+
+    assert not store._writer.is_alive()
+    assert store.dropped == 1
+    assert rows(path, 'SELECT session_id FROM leads') == [('first',)]
@@ -0,0 +1,108 @@
+"""Resume tokens (``progress.encode_token``/``decode_token``): round-trips and rejection of bad tokens."""
+import base64
+import json
+import os
+import random
+
+import pytest
+
+from progress import decode_token, encode_token, new_answers
+from store import UNANSWERED_BYTE
+from utils import questions_version
+
+QUESTIONS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'questions.json')
+
+with open(QUESTIONS_PATH, 'r', encoding='utf-8') as file:
+    QUESTIONS = json.load(file)['questions']
+VERSION = questions_version(QUESTIONS)
+
+
+def answered_up_to(step: int, rng: random.Random) -> bytearray:
+    """Answers for every question before ``step`` (and some after it), as a session at that step has."""
+    answers = new_answers(QUESTIONS)
+    for position, question in enumerate(QUESTIONS):
+        if position < step - 1 or rng.random() < 0.3:
+            answers[position] = rng.randrange(len(question['options']))
+    return answers
+
+
+def raw(token: str) -> bytearray:
+    return bytearray(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+
+
+def pack(data: bytes) -> str:
+    return base64.urlsafe_b64encode(bytes(data)).rstrip(b'=').decode('ascii')
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_round_trip(seed):
+    rng = random.Random(seed)
+    step = rng.randint(0, len(QUESTIONS) + 2)
+    answers = answered_up_to(step, rng)
+    token = encode_token(QUESTIONS, VERSION, step, answers)
+    assert len(token) == 22
+    assert decode_token(token, QUESTIONS, VERSION) == (step, answers)
+
+
+def test_empty_answers_round_trip():
+    answers = new_answers(QUESTIONS)
+    assert decode_token(encode_token(QUESTIONS, VERSION, 0, answers), QUESTIONS, VERSION) == (0, answers)
+
+
+def test_token_is_url_safe():
+    answers = bytearray([len(q['options']) - 1 for q in QUESTIONS])
+    token = encode_token(QUESTIONS, VERSION, len(QUESTIONS) + 1, answers)
+    assert set(token) <= set('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_')
+
+
+def test_other_bank_version_is_rejected():
+    token = encode_token(QUESTIONS, VERSION, 3, answered_up_to(3, random.Random(0)))
+    other = 'f' * len(VERSION) if not VERSION.startswith('f') else '0' * len(VERSION)
+    with pytest.raises(ValueError, match='outra versão'):
+        decode_token(token, QUESTIONS, other)
+
+
+@pytest.mark.parametrize('token', ['', 'A', '!!!!', 'a' * 21, 'a' * 23, 'a' * 200])
+def test_malformed_tokens_are_rejected(token):
+    with pytest.raises(ValueError):
+        decode_token(token, QUESTIONS, VERSION)
+
+
+def test_truncated_and_extended_tokens_are_rejected():
+    data = raw(encode_token(QUESTIONS, VERSION, 5, answered_up_to(5, random.Random(1))))
+    for tampered in (data[:-1], data[:8], data + b'\0'):
+        with pytest.raises(ValueError):
+            decode_token(pack(tampered), QUESTIONS, VERSION)
+
+
+def test_unknown_format_is_rejected():
+    data = raw(encode_token(QUESTIONS, VERSION, 5, answered_up_to(5, random.Random(2))))
+    data[0] ^= 0xFF
+    with pytest.raises(ValueError):
+        decode_token(pack(data), QUESTIONS, VERSION)
+
+
+def test_step_out_of_range_is_rejected():
+    data = raw(encode_token(QUESTIONS, VERSION, 5, answered_up_to(5, random.Random(3))))
+    data[7] = len(QUESTIONS) + 3
+    with pytest.raises(ValueError):
+        decode_token(pack(data), QUESTIONS, VERSION)
+
+
+def test_step_past_unanswered_question_is_rejected():
+    answers = answered_up_to(8, random.Random(4))
+    answers[3] = UNANSWERED_BYTE
+    token = encode_token(QUESTIONS, VERSION, 8, answers)
+    with pytest.raises(ValueError):
+        decode_token(token, QUESTIONS, VERSION)
+    # Orders that skip questions (adaptive) opt out of the check
+    assert decode_token(token, QUESTIONS, VERSION, check_steps=False) == (8, answers)
+
+
+def test_flipped_mask_bit_keeps_the_step_check():
+    """Clearing an answered question's mask bit makes it unanswered, which the step check then catches."""
+    answers = answered_up_to(6, random.Random(5))
+    data = raw(encode_token(QUESTIONS, VERSION, 6, answers))
+    data[8] &= ~1  # Question 1 no longer answered
+    with pytest.raises(ValueError):
+        decode_token(pack(data), QUESTIONS, VERSION)
@@ -1,53 +1,73 @@
+import hashlib
 import json
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+CATEGORIES = ('concentracao', 'impulsividade', 'hiperatividade')
+
+MAX_OPTION_SCORE = 3  # Maximum possible score per question
+
+OPTION_WEIGHTS = {
+    'Raramente': 0,
+    'Às vezes': 1,
+    'Frequentemente': 2,
+    'Sempre': 3,
+    # Custom weights for specific questions
+    'Ignora completamente': 3,
+    'Perde o foco por alguns minutos': 2,
+    'Abandona a atividade': 2,
+    'Não consegue retomar o foco': 3,
+    'Pensa antes de agir': 0,
+    'Age e depois percebe consequências': 1,
+    'Age por impulso frequentemente': 2,
+    'Não considera consequências': 3,
+    'Comunica-se adequadamente': 0,
+    'Fala mais que o comum': 1,
+    'Domina conversas constantemente': 2,
+    'Fala sem parar e fora de contexto': 3
+}
+
+def validate_questions(questions: List[Dict]):
+    """Reject a question bank with options that have no weight or unknown categories."""
+    missing = sorted({option for q in questions for option in q['options'] if option not in OPTION_WEIGHTS})
+    if missing:
+        raise ValueError(f"Opções sem peso definido: {', '.join(missing)}")
+    unknown = sorted({q['category'] for q in questions} - set(CATEGORIES))
+    if unknown:
+        raise ValueError(f"Categorias desconhecidas: {', '.join(unknown)}")
+
+def questions_version(questions: List[Dict]) -> str:
+    """Short content hash identifying a question bank."""
+    return hashlib.sha1(json.dumps(questions, sort_keys=True).encode('utf-8')).hexdigest()[:12]
 
 def load_json_data(file_path: str) -> Dict:
     """Load and return JSON data from file."""
     with open(file_path, 'r', encoding='utf-8') as file:
         return json.load(file)
 
-def calculate_score(responses: Dict[int, str]) -> Dict[str, float]:
-    """Calculate scores for each category based on responses."""
-    categories = {
-        'concentracao': 0,
-        'impulsividade': 0,
-        'hiperatividade': 0
-    }
-    
-    weights = {
-        'Raramente': 0,
-        'Às vezes': 1,
-        'Frequentemente': 2,
-        'Sempre': 3,
-        # Custom weights for specific questions
-        'Ignora completamente': 3,
-        'Perde o foco por alguns minutos': 2,
-        'Abandona a atividade': 2,
-        'Não consegue retomar o foco': 3,
-        'Pensa antes de agir': 0,
-        'Age e depois percebe consequências': 1,
-        'Age por impulso frequentemente': 2,
-        'Não considera consequências': 3,
-        'Comunica-se adequadamente': 0,
-        'Fala mais que o comum': 1,
-        'Domina conversas constantemente': 2,
-        'Fala sem parar e fora de contexto': 3
-    }
-    
-    questions = load_json_data('data/questions.json')['questions']
-    
-    for q in questions:
-        if q['id'] in responses:
-            score = weights[responses[q['id']]]
-            categories[q['category']] += score
-    
-    # Normalize scores to percentages
-    max_score = 3  # Maximum possible score per question
-    question_counts = {'concentracao': 0, 'impulsividade': 0, 'hiperatividade': 0}
-    for q in questions:
-        question_counts[q['category']] += 1
-    
-    return {k: (v / (max_score * question_counts[k])) * 100 for k, v in categories.items()}
+def calculate_score(responses: Dict[int, str], bank: Optional['QuestionBank'] = None) -> Dict[str, float]:
+    """Calculate scores for each category based on responses.
+
+    Scores against ``bank`` when given (e.g. the version a session started
+    with), otherwise against the current content registry snapshot.
+    """
+    if bank is None:
+        from content_registry import get_registry
+        bank = get_registry().current().bank
+    return bank.score(responses)
+
+SEVERITY_THRESHOLDS = (
+    (80, "Muito Alto"),
+    (70, "Alto"),
+    (40, "Moderado")
+)
+SEVERITY_LEVELS = tuple(level for _, level in SEVERITY_THRESHOLDS) + ("Baixo",)
+
+def get_severity_level(score: float) -> str:
+    """Get clinical severity level."""
+    for threshold, level in SEVERITY_THRESHOLDS:
+        if score >= threshold:
+            return level
+    return "Baixo"
 
 def get_feedback(question: Dict, response: str) -> str:
     """Get appropriate feedback based on response."""
@@ -89,202 +109,208 @@ def get_feedback(question: Dict, response: str) -> str:
     
     return question['feedback'][severity]
 
+RECOMMENDATION_TEMPLATES = (
+    (70, """
+        Com base no perfil clínico apresentado (média de {avg_score:.1f}%), recomendamos fortemente uma avaliação profissional especializada em TDAH. 
+        Os indicadores são particularmente significativos na área de {category} ({category_score:.1f}%).
+        A Ativa-Mente pode ser uma ferramenta complementar valiosa no processo terapêutico, oferecendo suporte estruturado ao desenvolvimento do seu filho.
+        """),
+    (40, """
+        O perfil apresentado (média de {avg_score:.1f}%) sugere a presença de alguns comportamentos que merecem atenção profissional. 
+        A área de {category} ({category_score:.1f}%) apresenta os indicadores mais relevantes.
+        Recomendamos considerar uma avaliação profissional e utilizar a Ativa-Mente como ferramenta de suporte no desenvolvimento de habilidades específicas.
+        """),
+    (float('-inf'), """
+        O perfil atual (média de {avg_score:.1f}%) indica comportamentos majoritariamente típicos para a faixa etária.
+        Mesmo com indicadores dentro da normalidade, a Ativa-Mente pode contribuir para o desenvolvimento contínuo de habilidades cognitivas e comportamentais.
+        """)
+)
+
 def get_recommendation(scores: Dict[str, float]) -> str:
     """Generate detailed clinical recommendation based on scores."""
     avg_score = sum(scores.values()) / len(scores)
     max_category = max(scores.items(), key=lambda x: x[1])
     
-    if avg_score >= 70:
-        return f"""
-        Com base no perfil clínico apresentado (média de {avg_score:.1f}%), recomendamos fortemente uma avaliação profissional especializada em TDAH. 
-        Os indicadores são particularmente significativos na área de {max_category[0]} ({max_category[1]:.1f}%).
-        A Ativa-Mente pode ser uma ferramenta complementar valiosa no processo terapêutico, oferecendo suporte estruturado ao desenvolvimento do seu filho.
+    # The last template is the unconditional fallback (as the original ``else``), NaN included
+    template = next((template for threshold, template in RECOMMENDATION_TEMPLATES[:-1] if avg_score >= threshold),
+                    RECOMMENDATION_TEMPLATES[-1][1])
+    return template.format(avg_score=avg_score, category=max_category[0], category_score=max_category[1])
+
+CATEGORY_DESCRIPTIONS = {
+    'concentracao': {
+        'Muito Alto': """
+            Apresenta déficit significativo na função executiva de atenção sustentada e seletiva.
+            Manifestações clínicas incluem:
+            - Dificuldade acentuada em manter foco em tarefas estruturadas
+            - Comprometimento na filtragem de estímulos irrelevantes
+            - Prejuízo significativo na organização e conclusão de tarefas
+            - Alta susceptibilidade à distração por estímulos externos
+            Recomenda-se avaliação neuropsicológica completa.
+        """,
+        'Alto': """
+            Demonstra desafios importantes na manutenção da atenção e processamento executivo.
+            Características observadas:
+            - Dificuldade frequente em sustentar atenção em tarefas
+            - Comprometimento na conclusão de atividades sequenciais
+            - Tendência a perder materiais e objetos importantes
+            - Desorganização em atividades cotidianas
+        """,
+        'Moderado': """
+            Apresenta alguns desafios no controle atencional que podem impactar o desempenho.
+            Aspectos observados:
+            - Oscilação na manutenção do foco
+            - Necessidade de suporte na organização de tarefas
+            - Eventual dificuldade com instruções complexas
+        """,
+        'Baixo': """
+            Mantém níveis adequados de atenção e organização.
+            Características positivas:
+            - Boa capacidade de manter foco em tarefas
+            - Habilidade adequada de organização
+            - Processamento eficiente de instruções
         """
-    elif avg_score >= 40:
-        return f"""
-        O perfil apresentado (média de {avg_score:.1f}%) sugere a presença de alguns comportamentos que merecem atenção profissional. 
-        A área de {max_category[0]} ({max_category[1]:.1f}%) apresenta os indicadores mais relevantes.
-        Recomendamos considerar uma avaliação profissional e utilizar a Ativa-Mente como ferramenta de suporte no desenvolvimento de habilidades específicas.
+    },
+    'impulsividade': {
+        'Muito Alto': """
+            Apresenta comprometimento significativo no controle inibitório comportamental.
+            Manifestações clínicas incluem:
+            - Dificuldade acentuada em esperar sua vez
+            - Interrupções frequentes em contextos sociais
+            - Tomada de decisão sem análise de consequências
+            - Respostas precipitadas em situações diversas
+            Recomenda-se avaliação especializada em regulação comportamental.
+        """,
+        'Alto': """
+            Demonstra desafios importantes no autocontrole e regulação comportamental.
+            Características observadas:
+            - Dificuldade em controlar respostas imediatas
+            - Tendência a agir sem reflexão prévia
+            - Interrupções frequentes em interações sociais
+            - Desafios na regulação emocional
+        """,
+        'Moderado': """
+            Apresenta alguns comportamentos impulsivos que podem ser trabalhados.
+            Aspectos observados:
+            - Ocasional dificuldade em esperar sua vez
+            - Algumas decisões sem planejamento adequado
+            - Momentos de interrupção em conversas
+        """,
+        'Baixo': """
+            Demonstra bom controle sobre comportamentos impulsivos.
+            Características positivas:
+            - Adequada capacidade de espera
+            - Boa regulação em interações sociais
+            - Tomada de decisão reflexiva
         """
-    else:
-        return f"""
-        O perfil atual (média de {avg_score:.1f}%) indica comportamentos majoritariamente típicos para a faixa etária.
-        Mesmo com indicadores dentro da normalidade, a Ativa-Mente pode contribuir para o desenvolvimento contínuo de habilidades cognitivas e comportamentais.
+    },
+    'hiperatividade': {
+        'Muito Alto': """
+            Apresenta níveis clinicamente significativos de atividade motora excessiva.
+            Manifestações clínicas incluem:
+            - Agitação motora constante e invasiva
+            - Inquietação significativa em situações estruturadas
+            - Dificuldade acentuada em atividades que exigem quietude
+            - Verbalização excessiva e descontextualizada
+            Recomenda-se avaliação especializada em regulação psicomotora.
+        """,
+        'Alto': """
+            Demonstra níveis elevados de atividade motora que impactam o funcionamento.
+            Características observadas:
+            - Inquietação frequente em diversos contextos
+            - Dificuldade em permanecer sentado quando necessário
+            - Tendência a falar excessivamente
+            - Movimento constante em situações inadequadas
+        """,
+        'Moderado': """
+            Apresenta alguns padrões de inquietação que podem ser regulados.
+            Aspectos observados:
+            - Momentos de agitação em situações específicas
+            - Ocasional dificuldade com atividades calmas
+            - Níveis de energia acima da média
+        """,
+        'Baixo': """
+            Mantém níveis adequados de atividade motora e regulação.
+            Características positivas:
+            - Boa capacidade de autorregulação motora
+            - Participação adequada em atividades calmas
+            - Controle apropriado da energia física
         """
+    }
+}
 
 def get_category_description(category: str, severity: str) -> str:
     """Get detailed clinical description for each category based on severity."""
-    descriptions = {
-        'concentracao': {
-            'Muito Alto': """
-                Apresenta déficit significativo na função executiva de atenção sustentada e seletiva.
-                Manifestações clínicas incluem:
-                - Dificuldade acentuada em manter foco em tarefas estruturadas
-                - Comprometimento na filtragem de estímulos irrelevantes
-                - Prejuízo significativo na organização e conclusão de tarefas
-                - Alta susceptibilidade à distração por estímulos externos
-                Recomenda-se avaliação neuropsicológica completa.
-            """,
-            'Alto': """
-                Demonstra desafios importantes na manutenção da atenção e processamento executivo.
-                Características observadas:
-                - Dificuldade frequente em sustentar atenção em tarefas
-                - Comprometimento na conclusão de atividades sequenciais
-                - Tendência a perder materiais e objetos importantes
-                - Desorganização em atividades cotidianas
-            """,
-            'Moderado': """
-                Apresenta alguns desafios no controle atencional que podem impactar o desempenho.
-                Aspectos observados:
-                - Oscilação na manutenção do foco
-                - Necessidade de suporte na organização de tarefas
-                - Eventual dificuldade com instruções complexas
-            """,
-            'Baixo': """
-                Mantém níveis adequados de atenção e organização.
-                Características positivas:
-                - Boa capacidade de manter foco em tarefas
-                - Habilidade adequada de organização
-                - Processamento eficiente de instruções
-            """
-        },
-        'impulsividade': {
-            'Muito Alto': """
-                Apresenta comprometimento significativo no controle inibitório comportamental.
-                Manifestações clínicas incluem:
-                - Dificuldade acentuada em esperar sua vez
-                - Interrupções frequentes em contextos sociais
-                - Tomada de decisão sem análise de consequências
-                - Respostas precipitadas em situações diversas
-                Recomenda-se avaliação especializada em regulação comportamental.
-            """,
-            'Alto': """
-                Demonstra desafios importantes no autocontrole e regulação comportamental.
-                Características observadas:
-                - Dificuldade em controlar respostas imediatas
-                - Tendência a agir sem reflexão prévia
-                - Interrupções frequentes em interações sociais
-                - Desafios na regulação emocional
-            """,
-            'Moderado': """
-                Apresenta alguns comportamentos impulsivos que podem ser trabalhados.
-                Aspectos observados:
-                - Ocasional dificuldade em esperar sua vez
-                - Algumas decisões sem planejamento adequado
-                - Momentos de interrupção em conversas
-            """,
-            'Baixo': """
-                Demonstra bom controle sobre comportamentos impulsivos.
-                Características positivas:
-                - Adequada capacidade de espera
-                - Boa regulação em interações sociais
-                - Tomada de decisão reflexiva
-            """
-        },
-        'hiperatividade': {
-            'Muito Alto': """
-                Apresenta níveis clinicamente significativos de atividade motora excessiva.
-                Manifestações clínicas incluem:
-                - Agitação motora constante e invasiva
-                - Inquietação significativa em situações estruturadas
-                - Dificuldade acentuada em atividades que exigem quietude
-                - Verbalização excessiva e descontextualizada
-                Recomenda-se avaliação especializada em regulação psicomotora.
-            """,
-            'Alto': """
-                Demonstra níveis elevados de atividade motora que impactam o funcionamento.
-                Características observadas:
-                - Inquietação frequente em diversos contextos
-                - Dificuldade em permanecer sentado quando necessário
-                - Tendência a falar excessivamente
-                - Movimento constante em situações inadequadas
-            """,
-            'Moderado': """
-                Apresenta alguns padrões de inquietação que podem ser regulados.
-                Aspectos observados:
-                - Momentos de agitação em situações específicas
-                - Ocasional dificuldade com atividades calmas
-                - Níveis de energia acima da média
-            """,
-            'Baixo': """
-                Mantém níveis adequados de atividade motora e regulação.
-                Características positivas:
-                - Boa capacidade de autorregulação motora
-                - Participação adequada em atividades calmas
-                - Controle apropriado da energia física
-            """
-        }
+    return CATEGORY_DESCRIPTIONS[category][severity].strip()
+
+CATEGORY_RECOMMENDATIONS = {
+    'concentracao': {
+        'Muito Alto': """
+            <li>Jogos de memória sequencial com dificuldade progressiva</li>
+            <li>Exercícios de atenção sustentada com feedback imediato</li>
+            <li>Atividades de organização e planejamento gamificadas</li>
+        """,
+        'Alto': """
+            <li>Jogos de foco com elementos visuais dinâmicos</li>
+            <li>Exercícios de categorização e ordenação</li>
+            <li>Atividades de rastreamento visual</li>
+        """,
+        'Moderado': """
+            <li>Jogos de memória com complexidade moderada</li>
+            <li>Exercícios de atenção dividida</li>
+            <li>Atividades de organização básica</li>
+        """,
+        'Baixo': """
+            <li>Jogos de manutenção de atenção recreativos</li>
+            <li>Exercícios de reforço cognitivo leve</li>
+            <li>Atividades de desenvolvimento contínuo</li>
+        """
+    },
+    'impulsividade': {
+        'Muito Alto': """
+            <li>Jogos de controle inibitório intensivo</li>
+            <li>Exercícios de autorregulação emocional</li>
+            <li>Atividades de planejamento estratégico</li>
+        """,
+        'Alto': """
+            <li>Jogos de espera e recompensa</li>
+            <li>Exercícios de controle de resposta</li>
+            <li>Atividades de tomada de decisão</li>
+        """,
+        'Moderado': """
+            <li>Jogos de paciência e estratégia</li>
+            <li>Exercícios de autocontrole básico</li>
+            <li>Atividades de reflexão antes da ação</li>
+        """,
+        'Baixo': """
+            <li>Jogos de manutenção do autocontrole</li>
+            <li>Exercícios de reforço comportamental</li>
+            <li>Atividades de desenvolvimento social</li>
+        """
+    },
+    'hiperatividade': {
+        'Muito Alto': """
+            <li>Jogos de controle motor intensivo</li>
+            <li>Exercícios de regulação de energia</li>
+            <li>Atividades de foco com movimento controlado</li>
+        """,
+        'Alto': """
+            <li>Jogos de controle corporal</li>
+            <li>Exercícios de canalização de energia</li>
+            <li>Atividades de ritmo e coordenação</li>
+        """,
+        'Moderado': """
+            <li>Jogos de equilíbrio energia-foco</li>
+            <li>Exercícios de autorregulação básica</li>
+            <li>Atividades físico-cognitivas</li>
+        """,
+        'Baixo': """
+            <li>Jogos de manutenção do equilíbrio</li>
+            <li>Exercícios de desenvolvimento motor</li>
+            <li>Atividades de coordenação avançada</li>
+        """
     }
-    return descriptions[category][severity].strip()
+}
 
 def get_category_recommendations(category: str, severity: str) -> str:
     """Get specific Ativa-Mente recommendations for each category and severity level."""
-    recommendations = {
-        'concentracao': {
-            'Muito Alto': """
-                <li>Jogos de memória sequencial com dificuldade progressiva</li>
-                <li>Exercícios de atenção sustentada com feedback imediato</li>
-                <li>Atividades de organização e planejamento gamificadas</li>
-            """,
-            'Alto': """
-                <li>Jogos de foco com elementos visuais dinâmicos</li>
-                <li>Exercícios de categorização e ordenação</li>
-                <li>Atividades de rastreamento visual</li>
-            """,
-            'Moderado': """
-                <li>Jogos de memória com complexidade moderada</li>
-                <li>Exercícios de atenção dividida</li>
-                <li>Atividades de organização básica</li>
-            """,
-            'Baixo': """
-                <li>Jogos de manutenção de atenção recreativos</li>
-                <li>Exercícios de reforço cognitivo leve</li>
-                <li>Atividades de desenvolvimento contínuo</li>
-            """
-        },
-        'impulsividade': {
-            'Muito Alto': """
-                <li>Jogos de controle inibitório intensivo</li>
-                <li>Exercícios de autorregulação emocional</li>
-                <li>Atividades de planejamento estratégico</li>
-            """,
-            'Alto': """
-                <li>Jogos de espera e recompensa</li>
-                <li>Exercícios de controle de resposta</li>
-                <li>Atividades de tomada de decisão</li>
-            """,
-            'Moderado': """
-                <li>Jogos de paciência e estratégia</li>
-                <li>Exercícios de autocontrole básico</li>
-                <li>Atividades de reflexão antes da ação</li>
-            """,
-            'Baixo': """
-                <li>Jogos de manutenção do autocontrole</li>
-                <li>Exercícios de reforço comportamental</li>
-                <li>Atividades de desenvolvimento social</li>
-            """
-        },
-        'hiperatividade': {
-            'Muito Alto': """
-                <li>Jogos de controle motor intensivo</li>
-                <li>Exercícios de regulação de energia</li>
-                <li>Atividades de foco com movimento controlado</li>
-            """,
-            'Alto': """
-                <li>Jogos de controle corporal</li>
-                <li>Exercícios de canalização de energia</li>
-                <li>Atividades de ritmo e coordenação</li>
-            """,
-            'Moderado': """
-                <li>Jogos de equilíbrio energia-foco</li>
-                <li>Exercícios de autorregulação básica</li>
-                <li>Atividades físico-cognitivas</li>
-            """,
-            'Baixo': """
-                <li>Jogos de manutenção do equilíbrio</li>
-                <li>Exercícios de desenvolvimento motor</li>
-                <li>Atividades de coordenação avançada</li>
-            """
-        }
-    }
-    return recommendations[category][severity].strip()
\ No newline at end of file
+    return CATEGORY_RECOMMENDATIONS[category][severity].strip()
\ No newline at end of file